@@ -0,0 +1,601 @@
+"""
+A Pac-Man that plays itself, for attract mode and as a baseline bot to compare AIs with.
+
+Before each move the Autopilot runs a Monte Carlo tree search: it tries the
+directions Pac-Man can go, plays each a few ticks ahead, finishes every line of
+play with random moves and takes the direction whose futures scored best
+(pellets eaten, without being caught). That is thousands of ticks per decision,
+far too many to step a GameEngine for, so the search plays them on a
+ForwardModel: the same rules, worked out by the game's own code once per
+position and then looked up.
+
+    python autopilot.py                    # play a few headless games and report
+    python autopilot.py --budget 0.005     # think 5 ms per decision instead
+    python game.py --autopilot             # watch it play
+"""
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import math
+import random
+import time
+from settings import *
+from collision import get_wall_index
+from navigation import FlowField, get_flow_field
+from next_hop import get_next_hop_table
+from pacman import PacMan
+from ghosts import Ghost
+
+# A pixel position is packed into one int, so positions are dict keys and list items
+# without building a tuple for every one. Coordinates are stored from ORIGIN, as
+# Pac-Man can leave the screen through a tunnel; differences come out the same.
+POSITION_BASE = 1 << 16
+ORIGIN = 1 << 15
+MAX_MODEL_FIELDS = 64  # Flow fields a model keeps for mazes without a next-hop table
+DIRECTION_NUMBERS = {direction: number for number, direction in enumerate(DIRECTIONS)}
+REVERSE = [DIRECTION_NUMBERS[name] for name in ("DOWN", "UP", "RIGHT", "LEFT")]  # Opposite of each direction
+
+# How the search scores a line of play
+CAUGHT_PENALTY = 1000  # Points lost for being caught
+CELL_COST = 1  # Points lost per navigation cell between Pac-Man and the nearest pellet when a line ends
+DISCOUNT = 0.95  # Worth of points one move (action_ticks ticks) later, so sooner is better
+ROLLOUT_GREED = 0.75  # Share of rollout moves that head for the nearest pellet; the rest are random
+
+
+def pack(x, y):
+    """Return pixel (x, y) as one int"""
+    return (y + ORIGIN) * POSITION_BASE + x + ORIGIN
+
+
+def unpack(position):
+    """Return the pixel (x, y) of a packed position"""
+    y, x = divmod(position, POSITION_BASE)
+    return x - ORIGIN, y - ORIGIN
+
+
+class ForwardModel:
+    """
+    The engine's rules for Pac-Man, the ghosts and the pellets, played on plain ints.
+
+    A tick runs as GameEngine.step runs it: Pac-Man moves (PacMan.move), every
+    ghost steers towards him (Ghost.move_towards), then he eats every pellet within
+    PELLET_DISTANCE and is caught by any ghost within the catch distance. Each
+    move is worked out by the game's own code the first time it comes up and
+    looked up after that, so a tick builds no game objects and ends exactly where
+    the game's would.
+
+    Not modelled: fruits (they only add points), ghost swarms and planners, and a
+    ghost boxed in so tightly no step is free (the game moves it at random with
+    Ghost.follow_wall; here it stays put).
+
+    Usage:
+        model = ForwardModel(engine)
+        pacman, ghosts, alive = model.state(engine)
+        pacman, alive, ticks, caught = model.advance(pacman, ghosts, alive, 0, 4)  # UP for 4 ticks
+    """
+    def __init__(self, engine):
+        """
+        Parameters:
+            engine (GameEngine): The game to model. Its ghosts all move at one speed.
+        """
+        if engine.swarm is not None:
+            raise ValueError("the forward model can't play a ghost swarm")
+        self.walls = engine.walls
+        self.pellet_field = engine.pellets
+        self.pacman_speed = engine.pacman.speed
+        self.ghost_speed = engine.ghosts[0].speed if engine.ghosts else 0
+        self.catch_limit = engine.catch_distance * engine.catch_distance
+        self.ticks = 0  # Ticks played, for rollouts per second
+        self.forget()
+
+    def forget(self):
+        """Drop every move worked out so far (needed when the walls change)"""
+        self.wall_index = get_wall_index(self.walls)
+        self.table = get_next_hop_table(self.walls)
+        self.nav_grid = get_flow_field(self.walls).nav_grid
+        # Stand-ins the game's own movement code runs on
+        self.scout_pacman = PacMan(0, 0, walls=self.walls)
+        self.scout_pacman.speed = self.pacman_speed
+        self.scout_ghost = Ghost(0, 0, RED, walls=self.walls, rng=random.Random(0))
+        self.scout_ghost.speed = self.ghost_speed
+        self.pacman_steps = {}  # position * 4 + direction -> where PacMan.move ends
+        self.ghost_paths = {}  # position * 4 + direction -> where Ghost.follow_path ends, -1 if stuck
+        self.ghost_steps = {}  # position -> the free whole steps of Ghost.chase_point, in DIRECTIONS order
+        self.cells = {}  # position -> navigation cell, -1 off the grid
+        self.pellet_masks = {}  # position -> bits of the pellets Pac-Man eats there
+        self.open_moves = {}  # position -> directions that move Pac-Man
+        self.flow_fields = {}  # target cell -> FlowField, when the maze has no next-hop table
+
+    def state(self, engine):
+        """
+        Read the model's state from a game.
+        Returns:
+            tuple: (pacman, ghosts, alive): packed positions of Pac-Man and of every ghost
+                   (a new list, for advance() to update) and the bits of the pellets left.
+        """
+        if get_wall_index(self.walls) is not self.wall_index:
+            self.forget()
+        return (pack(engine.pacman.x, engine.pacman.y),
+                [pack(ghost.x, ghost.y) for ghost in engine.ghosts], engine.pellets.alive)
+
+    def moves(self, pacman):
+        """Return the directions (numbers) that move Pac-Man from a packed position"""
+        moves = self.open_moves.get(pacman)
+        if moves is None:
+            moves = self.open_moves[pacman] = tuple(
+                number for number in range(len(DIRECTIONS)) if self._pacman_step(pacman * 4 + number) != pacman)
+        return moves
+
+    def advance(self, pacman, ghosts, alive, direction, ticks):
+        """
+        Play up to `ticks` ticks with Pac-Man holding one direction.
+        Parameters:
+            pacman (int): Pac-Man's packed position.
+            ghosts (list): Every ghost's packed position; moved in place.
+            alive (int): Bits of the pellets on the board.
+            direction (int): Number of the direction in DIRECTIONS, or -1 to stand still.
+            ticks (int): Ticks to play.
+        Returns:
+            tuple: (pacman, alive, ticks played, caught). Play stops early when Pac-Man is
+                   caught or eats the last pellet.
+        """
+        pacman_steps, ghost_paths, ghost_steps = self.pacman_steps, self.ghost_paths, self.ghost_steps
+        cells, pellet_masks = self.cells, self.pellet_masks
+        table, flow_fields = self.table, self.flow_fields
+        count = len(ghosts)
+        played = 0
+        caught = False
+        while played < ticks and not caught:
+            played += 1
+            if direction >= 0:
+                moved = pacman_steps.get(pacman * 4 + direction)
+                pacman = self._pacman_step(pacman * 4 + direction) if moved is None else moved
+            pacman_y, pacman_x = divmod(pacman, POSITION_BASE)
+            target = cells.get(pacman)
+            if target is None:
+                target = self.cell(pacman)
+            if table is None:
+                # One search per cell Pac-Man stands in, kept while the line of play moves on
+                flow_field = flow_fields.get(target)
+                if flow_field is None:
+                    flow_field = self._flow_field(pacman, target)
+
+            for number in range(count):
+                ghost = ghosts[number]
+                # Ghost.steer_towards: a step along the shortest path...
+                way = None
+                if table is not None:
+                    cell = cells.get(ghost)
+                    if cell is None:
+                        cell = self.cell(ghost)
+                    if cell >= 0 and target >= 0:
+                        way = table.direction(cell, target)
+                else:
+                    way = flow_field.direction_at(*unpack(ghost))
+                moved = -1
+                if way is not None:
+                    key = ghost * 4 + DIRECTION_NUMBERS[way]
+                    moved = ghost_paths.get(key)
+                    if moved is None:
+                        moved = self._ghost_path(key)
+                if moved < 0:
+                    # ...or else Ghost.chase_point: the free step ending closest to Pac-Man,
+                    # the first in DIRECTIONS order on a tie
+                    steps = ghost_steps.get(ghost)
+                    if steps is None:
+                        steps = self._ghost_steps(ghost)
+                    moved = ghost
+                    best = -1
+                    for step in steps:
+                        step_y, step_x = divmod(step, POSITION_BASE)
+                        distance = (step_x - pacman_x) ** 2 + (step_y - pacman_y) ** 2
+                        if best < 0 or distance < best:
+                            best, moved = distance, step
+                ghosts[number] = moved
+
+            # Then the pellets he eats, and whether a ghost has him
+            mask = pellet_masks.get(pacman)
+            if mask is None:
+                mask = self._pellet_mask(pacman)
+            alive &= ~mask
+            caught = self._caught(pacman_x, pacman_y, ghosts)
+            if not alive:
+                break
+        self.ticks += played
+        return pacman, alive, played, caught
+
+    def _caught(self, x, y, ghosts):
+        """Check if any ghost is within the catch distance of Pac-Man at (x, y)"""
+        limit = self.catch_limit
+        for ghost in ghosts:
+            ghost_y, ghost_x = divmod(ghost, POSITION_BASE)
+            if (ghost_x - x) ** 2 + (ghost_y - y) ** 2 < limit:
+                return True
+        return False
+
+    def _pacman_step(self, key):
+        """Work out where PacMan.move takes Pac-Man (key is position * 4 + direction)"""
+        position, number = divmod(key, 4)
+        scout = self.scout_pacman
+        scout.x, scout.y = unpack(position)
+        scout.move(DIRECTIONS[number])
+        moved = self.pacman_steps[key] = pack(scout.x, scout.y)
+        return moved
+
+    def _ghost_path(self, key):
+        """Work out where Ghost.follow_path takes a ghost, or -1 if it can't move"""
+        position, number = divmod(key, 4)
+        scout = self.scout_ghost
+        scout.x, scout.y = unpack(position)
+        moved = pack(scout.x, scout.y) if scout.follow_path(DIRECTIONS[number], self.nav_grid) else -1
+        self.ghost_paths[key] = moved
+        return moved
+
+    def _flow_field(self, position, target):
+        """Search the maze from Pac-Man's cell, for mazes with no next-hop table"""
+        if len(self.flow_fields) >= MAX_MODEL_FIELDS:
+            self.flow_fields.clear()
+        flow_field = self.flow_fields[target] = FlowField(self.nav_grid)
+        flow_field.retarget(*unpack(position))
+        return flow_field
+
+    def _ghost_steps(self, position):
+        """Work out the whole steps Ghost.chase_point can take from a position"""
+        x, y = unpack(position)
+        speed = self.ghost_speed
+        steps = []
+        for direction in DIRECTIONS:
+            dx, dy = DIRECTION_STEPS[direction]
+            if self.wall_index.is_clear(x, y, dx * speed, dy * speed):
+                steps.append(pack(x + dx * speed, y + dy * speed))
+        steps = self.ghost_steps[position] = tuple(steps)
+        return steps
+
+    def cell(self, position):
+        """Return the navigation cell of a packed position (-1 off the grid)"""
+        cell = self.cells.get(position)
+        if cell is None:
+            cell = self.nav_grid.cell_at(*unpack(position))
+            cell = self.cells[position] = -1 if cell is None else cell
+        return cell
+
+    def _pellet_mask(self, position):
+        """Work out which pellets Pac-Man eats standing at a position"""
+        x, y = unpack(position)
+        field = self.pellet_field
+        limit = PELLET_DISTANCE * PELLET_DISTANCE
+        mask = 0
+        for index in field.near(x, y, PELLET_DISTANCE, bits=field.full):
+            pellet_x, pellet_y = field.positions[index]
+            if (x - pellet_x) ** 2 + (y - pellet_y) ** 2 < limit:
+                mask |= 1 << index
+        self.pellet_masks[position] = mask
+        return mask
+
+
+class Node:
+    """A state in the search tree: where a line of play got to, and how it has scored"""
+    __slots__ = ("direction", "pacman", "ghosts", "alive", "tick", "reward", "over",
+                 "visits", "total", "children", "untried")
+
+    def __init__(self, direction, pacman, ghosts, alive, tick, reward, over, untried):
+        self.direction = direction  # The direction held to get here (-1 at the root)
+        self.pacman = pacman
+        self.ghosts = ghosts  # Tuple of packed ghost positions
+        self.alive = alive
+        self.tick = tick  # Ticks from the root
+        self.reward = reward  # Points for the move that led here
+        self.over = over  # Caught or the level is cleared
+        self.visits = 0
+        self.total = 0.0  # Sum of the scores of every line of play through here
+        self.children = []
+        self.untried = list(untried)  # Directions not expanded yet
+
+
+class Autopilot:
+    """
+    Picks Pac-Man's moves by Monte Carlo tree search on a ForwardModel.
+
+    Each decision grows a tree from the game's current state for `budget`
+    seconds (or a set number of rollouts). A move in the tree holds a direction
+    for action_ticks ticks; every new leaf is played on until `depth` ticks ahead,
+    mostly heading for the nearest pellet (ROLLOUT_GREED of the moves) and
+    otherwise at random, never straight back. A line of play scores the points
+    it eats, minus CAUGHT_PENALTY if Pac-Man is caught, minus CELL_COST for every
+    cell he ends up from the nearest pellet, so even lines that eat nothing
+    know which way the food is. The direction tried most is played until the
+    next decision.
+
+    Usage:
+        autopilot = Autopilot(engine)
+        while not engine.game_over:
+            engine.step(autopilot.act())
+        print(autopilot.stats()["rollouts_per_sec"])
+    """
+    def __init__(self, engine, budget=AUTOPILOT_BUDGET, rollouts=None, action_ticks=AUTOPILOT_ACTION_TICKS,
+                 depth=AUTOPILOT_DEPTH, exploration=1.0, seed=0):
+        """
+        Parameters:
+            engine (GameEngine): The game to play.
+            budget (float): Seconds to think per decision.
+            rollouts (int): Think for exactly this many rollouts instead of a time, so the
+                            same game always gets the same moves.
+            action_ticks (int): Ticks a move is held for, in the tree and in the game.
+            depth (int): Ticks a decision looks ahead.
+            exploration (float): How much the search favours directions it has tried less.
+            seed (int): Seed for the random moves of the rollouts.
+        """
+        self.engine = engine
+        self.model = ForwardModel(engine)
+        self.budget = budget
+        self.rollout_limit = rollouts
+        self.action_ticks = action_ticks
+        self.depth = depth
+        self.exploration = exploration
+        self.random = random.Random(seed)  # Its own source, so the ghosts' choices don't change
+        self.scratch = [0] * len(engine.ghosts)  # Ghost positions the search plays on
+        self.pellet_distance = []  # Cells from every navigation cell to the nearest pellet
+        self.distance_alive = None  # The pellets pellet_distance was worked out for
+        self.direction = None  # Move being held
+        self.decided_at = None  # Tick of the last decision
+        self.prediction = None  # (tick, pacman, ghosts, alive) the model expects the game to reach next
+        self.low, self.high = math.inf, -math.inf  # Range of scores seen this decision, to scale exploration
+        self.decisions = 0
+        self.rollouts = 0
+        self.search_time = 0.0  # Seconds spent deciding
+        self.search_ticks = 0  # Ticks the model played while deciding
+        self.last_rollouts = 0
+        self.model_checks = 0  # Ticks the model's prediction was compared with the game
+        self.model_mismatches = 0  # ... and came out different
+
+    def act(self):
+        """
+        Return Pac-Man's move for the coming tick, deciding again every action_ticks ticks.
+        Returns:
+            str: A direction, or None when no direction moves Pac-Man.
+        """
+        engine = self.engine
+        tick = engine.tick
+        if self.prediction is not None and self.prediction[0] == tick:
+            self.model_checks += 1
+            pacman, ghosts, alive = self.model.state(engine)
+            if self.prediction[1:] != (pacman, tuple(ghosts), alive):
+                self.model_mismatches += 1
+        self.prediction = None
+        if self.decided_at is None or not 0 <= tick - self.decided_at < self.action_ticks:
+            self.direction = self.decide()
+            self.decided_at = tick
+        # Ask the model where the game goes next, to check it against the real tick
+        model = self.model
+        pacman, ghosts, alive = model.state(engine)
+        number = -1 if self.direction is None else DIRECTION_NUMBERS[self.direction]
+        pacman, alive, _, _ = model.advance(pacman, ghosts, alive, number, 1)
+        self.prediction = (tick + 1, pacman, tuple(ghosts), alive)
+        return self.direction
+
+    def decide(self):
+        """
+        Search from the game's current state.
+        Returns:
+            str: The best direction, or None when no direction moves Pac-Man.
+        """
+        start = time.perf_counter()
+        model = self.model
+        ticks_before = model.ticks
+        pacman, ghosts, alive = model.state(self.engine)
+        if alive != self.distance_alive:
+            self._measure_pellet_distance(alive)
+        root = Node(-1, pacman, tuple(ghosts), alive, 0, 0, False, model.moves(pacman))
+        self.low, self.high = math.inf, -math.inf
+        rollouts = 0
+        if root.untried:
+            deadline = start + self.budget
+            while True:
+                self._search(root)
+                rollouts += 1
+                if self.rollout_limit is not None:
+                    if rollouts >= self.rollout_limit:
+                        break
+                elif time.perf_counter() >= deadline:
+                    break
+        self.decisions += 1
+        self.rollouts += rollouts
+        self.last_rollouts = rollouts
+        self.search_ticks += model.ticks - ticks_before
+        self.search_time += time.perf_counter() - start
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        return DIRECTIONS[best.direction]
+
+    def _search(self, root):
+        """Play one line of play: down the tree, one new node, a rollout, and back up"""
+        node = root
+        path = [root]
+        score = 0.0
+        weight = 1.0
+        # Down the tree while every direction of a node has been tried
+        while not node.over and not node.untried and node.children:
+            node = self._select(node)
+            path.append(node)
+            score += weight * node.reward
+            weight *= DISCOUNT
+        # Try a new direction
+        if not node.over and node.untried and node.tick < self.depth:
+            node = self._expand(node, node.untried.pop())
+            path.append(node)
+            score += weight * node.reward
+            weight *= DISCOUNT
+        if not node.over:
+            score += weight * self._rollout(node)
+        for visited in path:
+            visited.visits += 1
+            visited.total += score
+        self.low = min(self.low, score)
+        self.high = max(self.high, score)
+
+    def _select(self, node):
+        """Return the child with the best upper confidence bound (UCB1, scores scaled to 0-1)"""
+        spread = self.high - self.low if self.high > self.low else 1.0
+        low = self.low if self.high > self.low else 0.0
+        explore = self.exploration * math.sqrt(math.log(node.visits))
+        best, best_bound = None, -math.inf
+        for child in node.children:
+            bound = (child.total / child.visits - low) / spread + explore / math.sqrt(child.visits)
+            if bound > best_bound:
+                best, best_bound = child, bound
+        return best
+
+    def _expand(self, node, direction):
+        """Add the child reached by holding a direction for action_ticks ticks"""
+        ghosts = self.scratch
+        ghosts[:] = node.ghosts
+        pacman, alive, played, caught = self.model.advance(node.pacman, ghosts, node.alive,
+                                                           direction, self.action_ticks)
+        reward = (node.alive.bit_count() - alive.bit_count()) * PELLET_POINTS
+        if caught:
+            reward -= CAUGHT_PENALTY
+        over = caught or not alive
+        child = Node(direction, pacman, tuple(ghosts), alive, node.tick + played, reward, over,
+                     () if over else self.model.moves(pacman))
+        node.children.append(child)
+        return child
+
+    def _rollout(self, node):
+        """Play random moves from a node until `depth` ticks ahead and return their score"""
+        model = self.model
+        ghosts = self.scratch
+        ghosts[:] = node.ghosts
+        pacman, alive, tick, heading = node.pacman, node.alive, node.tick, node.direction
+        random_number = self.random.random
+        pellet_distance = self.pellet_distance
+        neighbours = model.nav_grid.neighbours
+        score = 0.0
+        weight = 1.0
+        while tick < self.depth:
+            moves = model.moves(pacman)
+            if not moves:
+                break
+            direction = -1
+            cell = model.cell(pacman)
+            if cell >= 0 and random_number() < ROLLOUT_GREED:
+                # Downhill on the pellet distance, if Pac-Man fits that way
+                nearest = pellet_distance[cell]
+                for name, next_cell in neighbours[cell]:
+                    if pellet_distance[next_cell] < nearest and DIRECTION_NUMBERS[name] in moves:
+                        nearest, direction = pellet_distance[next_cell], DIRECTION_NUMBERS[name]
+            if direction < 0:
+                direction = moves[int(random_number() * len(moves))]
+                while heading >= 0 and direction == REVERSE[heading] and len(moves) > 1:
+                    direction = moves[int(random_number() * len(moves))]
+            eaten = alive
+            pacman, alive, played, caught = model.advance(pacman, ghosts, alive, direction, self.action_ticks)
+            score += weight * (eaten.bit_count() - alive.bit_count()) * PELLET_POINTS
+            if caught:
+                return score - weight * CAUGHT_PENALTY
+            if not alive:
+                return score
+            weight *= DISCOUNT
+            tick += played
+            heading = direction
+        cell = model.cell(pacman)
+        return score - weight * CELL_COST * (self.pellet_distance[cell] if cell >= 0 else len(self.pellet_distance))
+
+    def _measure_pellet_distance(self, alive):
+        """Search outwards from every pellet left, for how many cells each cell is from the nearest one"""
+        nav_grid = self.model.nav_grid
+        links = nav_grid.links
+        field = self.model.pellet_field
+        far = len(links)  # Further than any path
+        distance = [far] * len(links)
+        frontier = []
+        for index in field.indices(alive):
+            cell = nav_grid.cell_at(*field.positions[index])
+            if cell is not None and distance[cell]:
+                distance[cell] = 0
+                frontier.append(cell)
+        next_distance = 1
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for next_cell in links[current]:
+                    if distance[next_cell] == far:
+                        distance[next_cell] = next_distance
+                        next_frontier.append(next_cell)
+            frontier = next_frontier
+            next_distance += 1
+        # Pac-Man can stand in a cell a ghost can't: it is one step from its neighbours
+        for cell, walkable in enumerate(nav_grid.walkable):
+            if not walkable and distance[cell] and links[cell]:
+                distance[cell] = min(distance[cell], 1 + min(distance[next_cell] for next_cell in links[cell]))
+        self.pellet_distance = distance
+        self.distance_alive = alive
+
+    def stats(self):
+        """
+        Summarise how much the autopilot has thought.
+        Returns:
+            dict: decisions, rollouts, rollouts_per_sec, ticks_per_sec (model ticks played
+                  while searching), last_rollouts (in the latest decision), think_mean (ms
+                  per decision), and model_checks and model_mismatches: ticks where the
+                  model's prediction was compared with the game, and how many differed.
+        """
+        search_time = self.search_time or 1e-9
+        return {
+            "decisions": self.decisions,
+            "rollouts": self.rollouts,
+            "rollouts_per_sec": self.rollouts / search_time,
+            "ticks_per_sec": self.search_ticks / search_time,
+            "last_rollouts": self.last_rollouts,
+            "think_mean": self.search_time * 1000 / self.decisions if self.decisions else 0.0,
+            "model_checks": self.model_checks,
+            "model_mismatches": self.model_mismatches,
+        }
+
+
+def play(engine, autopilot, max_ticks):
+    """
+    Let the autopilot play one game.
+    Returns:
+        str: "caught", "cleared" or "timeout".
+    """
+    while engine.tick < max_ticks:
+        state, events = engine.step(autopilot.act())
+        for name, data in events:
+            if name == "CAUGHT":
+                return "caught"
+            if name == "LEVEL_CLEARED":
+                return "cleared"
+    return "timeout"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Let the autopilot play headless games and report")
+    parser.add_argument("--games", type=int, default=3, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--budget", type=float, default=AUTOPILOT_BUDGET, help="seconds to think per decision")
+    parser.add_argument("--rollouts", type=int, help="think for this many rollouts per decision instead")
+    parser.add_argument("--depth", type=int, default=AUTOPILOT_DEPTH, help="ticks each decision looks ahead")
+    parser.add_argument("--max-ticks", type=int, default=3000, help="ticks after which a game is cut off")
+    parser.add_argument("--level", metavar="FILE", help="play a level file instead of the built-in maze")
+    args = parser.parse_args()
+    from engine import GameEngine
+    from levels import load_level
+    level_options = load_level(args.level).engine_options() if args.level else {}
+    for game in range(args.games):
+        seed = args.seed + game
+        engine = GameEngine(seed=seed, **level_options)
+        autopilot = Autopilot(engine, budget=args.budget, rollouts=args.rollouts, depth=args.depth, seed=seed)
+        pellets_total = len(engine.pellets)
+        outcome = play(engine, autopilot, args.max_ticks)
+        stats = autopilot.stats()
+        print(f"game {seed}: {outcome} after {engine.tick} ticks, score {engine.score}, "
+              f"{pellets_total - len(engine.pellets)}/{pellets_total} pellets | "
+              f"{stats['rollouts_per_sec']:,.0f} rollouts/s, {stats['ticks_per_sec']:,.0f} model ticks/s, "
+              f"{stats['think_mean']:.1f} ms/decision | model off on "
+              f"{stats['model_mismatches']}/{stats['model_checks']} ticks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Run many headless games in parallel, for AI work and parameter sweeps.
+
+Example: try three ghost speeds, 100 games each, on every core:
+    python batch.py --ghost-speed 3 4 5 --games 100 --output results.jsonl
+"""
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Don't greet once per worker
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+from settings import *
+from engine import GameEngine
+
+# Values used for any setting a game config leaves out
+DEFAULT_CONFIG = {
+    "seed": 0,
+    "pacman_speed": 8,
+    "ghost_speed": 4,
+    "catch_distance": CATCH_DISTANCE,
+    "max_ticks": 3000,
+    "turn_every": 8,  # The random Pac-Man picks a new direction this often (in ticks)
+}
+
+
+def run_game(config):
+    """
+    Play one headless game with a random-walking Pac-Man.
+    Parameters:
+        config (dict): Settings for the game; missing keys come from DEFAULT_CONFIG.
+    Returns:
+        dict: The config plus survival_ticks, pellets_eaten, score, caught and cleared.
+    """
+    config = dict(DEFAULT_CONFIG, **config)
+    engine = GameEngine(seed=config["seed"], pacman_speed=config["pacman_speed"],
+                        ghost_speed=config["ghost_speed"], catch_distance=config["catch_distance"])
+    # Pac-Man's moves get their own random source so they don't change the ghosts' choices
+    policy = random.Random(config["seed"] * 2 + 1)
+    pellets_total = len(engine.pellets)
+    caught = cleared = False
+    action = None
+    while engine.tick < config["max_ticks"] and not engine.game_over:
+        if engine.tick % config["turn_every"] == 0:
+            action = policy.choice(DIRECTIONS)
+        state, events = engine.step(action)
+        for name, data in events:
+            if name == "CAUGHT":
+                caught = True
+            elif name == "LEVEL_CLEARED":
+                cleared = True
+        if cleared:
+            break
+    return dict(config, survival_ticks=engine.tick, pellets_eaten=pellets_total - len(engine.pellets),
+                score=engine.score, caught=caught, cleared=cleared)
+
+
+def make_sweep(games=1, first_seed=0, **values):
+    """
+    Build one config for every combination of values, each played `games` times.
+    Parameters:
+        games (int): Games (seeds) per combination.
+        first_seed (int): Seed of the first game of each combination.
+        values: Lists of values per setting, e.g. ghost_speed=[3, 4, 5].
+    Returns:
+        list: Config dicts for run_batch().
+    """
+    names = list(values)
+    configs = []
+    for combination in itertools.product(*(values[name] for name in names)):
+        for seed in range(first_seed, first_seed + games):
+            configs.append(dict(zip(names, combination), seed=seed))
+    return configs
+
+
+def run_batch(configs, workers=None, chunksize=1):
+    """
+    Play every config on a pool of worker processes.
+    Results are yielded as soon as each game finishes, so they arrive in any order.
+    Parameters:
+        configs (list): Config dicts, see run_game().
+        workers (int): Number of processes (one per CPU core if None).
+        chunksize (int): Games handed to a worker at a time; bigger chunks cost
+                         less overhead, smaller ones balance the load better.
+    Yields:
+        dict: The result of run_game() for each config.
+    """
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(run_game, configs, chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless Pac-Man games in parallel")
+    parser.add_argument("--pacman-speed", type=int, nargs="+", default=[DEFAULT_CONFIG["pacman_speed"]])
+    parser.add_argument("--ghost-speed", type=int, nargs="+", default=[DEFAULT_CONFIG["ghost_speed"]])
+    parser.add_argument("--catch-distance", type=int, nargs="+", default=[DEFAULT_CONFIG["catch_distance"]])
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_CONFIG["max_ticks"])
+    parser.add_argument("--games", type=int, default=10, help="games per combination")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=1, help="games sent to a worker at a time")
+    parser.add_argument("--output", help="write one JSON result per line to this file (default: stdout)")
+    args = parser.parse_args()
+
+    configs = make_sweep(games=args.games, pacman_speed=args.pacman_speed, ghost_speed=args.ghost_speed,
+                         catch_distance=args.catch_distance, max_ticks=[args.max_ticks])
+    output = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    for result in run_batch(configs, workers=args.workers, chunksize=args.chunksize):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+    elapsed = time.perf_counter() - start
+    if output is not sys.stdout:
+        output.close()
+    print(f"{len(configs)} games in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
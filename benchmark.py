@@ -0,0 +1,272 @@
+"""
+Benchmarks for the movement, collision, AI and render hot paths.
+
+Runs under SDL's dummy video driver, so no window opens. Every benchmark
+reports operations per second; results are saved as JSON and compared with
+a stored baseline, and the run fails if anything got slower than allowed.
+
+    python benchmark.py --save-baseline   # record the baseline on this machine
+    python benchmark.py                   # compare against it (exit code 1 on regression)
+
+Baselines only mean something on the machine that recorded them, so none is
+kept in the repository; a run with no baseline to compare with fails (exit
+code 2) rather than passing without checking anything.
+"""
+import os
+os.environ["SDL_VIDEODRIVER"] = "dummy"  # Must be set before pygame opens a display
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import pygame
+from settings import *
+from collision import WallList, get_wall_index
+from navigation import get_flow_field
+from next_hop import get_next_hop_table
+from maze import maze_walls, draw_maze
+from pacman import PacMan
+from ghosts import Ghost
+from pellets import draw_pellets
+from spatial_hash import SpatialHash
+from engine import GameEngine
+from renderer import Renderer
+from vec_env import VecPacmanEnv
+from mazegen import generate_maze
+from autopilot import Autopilot
+
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+GHOST_COLORS = [RED, BLUE, ORANGE, GRAY]
+
+
+def measure(function, min_time=0.2, repeats=3):
+    """
+    Time a function and return how many calls per second it manages.
+    The function is called in growing batches until a batch takes min_time,
+    and the best of `repeats` batches is kept to filter out noise.
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        calls *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return calls / best
+
+
+# --- Scenarios ---
+
+def make_level(wall_count, pellet_count, ghost_count, size=WIDTH, seed=0):
+    """
+    Build a random level for scaling tests.
+    Walls are 10-pixel thick segments on a 50-pixel grid, like the classic maze.
+    Returns:
+        dict: Keyword arguments for GameEngine.
+    """
+    rng = random.Random(seed)
+    walls = WallList()
+    for _ in range(wall_count):
+        x, y = rng.randrange(0, size, 50), rng.randrange(0, size, 50)
+        length = rng.choice([50, 100, 150, 200])
+        walls.append(pygame.Rect(x, y, length, 10) if rng.random() < 0.5 else pygame.Rect(x, y, 10, length))
+    wall_index = get_wall_index(walls)
+    free = [(x, y) for x in range(20, size - 20, 10) for y in range(20, size - 20, 10)
+            if wall_index.is_free(x, y)]
+    rng.shuffle(free)
+    pacman_start = free.pop()
+    pellets = free[:pellet_count]
+    ghosts = [(x, y, GHOST_COLORS[index % len(GHOST_COLORS)])
+              for index, (x, y) in enumerate(free[pellet_count:pellet_count + ghost_count])]
+    return dict(walls=walls, pellet_positions=pellets, pacman_start=pacman_start, ghost_starts=ghosts)
+
+
+SCENARIOS = {
+    "classic": lambda: {},
+    "walls_100": lambda: make_level(100, 24, 1, size=1200),
+    "walls_1000": lambda: make_level(1000, 24, 1, size=4000),
+    "pellets_1000": lambda: make_level(12, 1000, 1),
+    "pellets_5000": lambda: make_level(12, 5000, 1, size=1500),
+    "ghosts_50": lambda: make_level(12, 24, 50),
+    "ghosts_500_swarm": lambda: dict(make_level(12, 24, 500), use_swarm=True),
+    # Generated mazes (see mazegen.py), 50 to 1000 tiles across
+    "maze_50": lambda: generate_maze(50, density=0.8).engine_options(),
+    "maze_200": lambda: generate_maze(200, density=0.8).engine_options(),
+    "maze_1000_swarm": lambda: dict(generate_maze(1000, density=0.8).engine_options(), use_swarm=True),
+}
+
+
+# --- Benchmarks ---
+
+def micro_benchmarks(min_time):
+    """Benchmarks of single hot functions on the classic maze"""
+    results = {}
+    pacman = PacMan(300, 300)
+    directions = ["LEFT", "RIGHT"]
+    def move_pacman():
+        pacman.move(directions[pacman.x // 8 % 2])
+    results["pacman_move"] = measure(move_pacman, min_time)
+
+    ghost = Ghost(100, 100, RED, rng=random.Random(0))
+    target = PacMan(500, 500)
+    def chase():
+        ghost.x, ghost.y = 100, 100
+        ghost.move_towards(target)
+    results["ghost_move_towards"] = measure(chase, min_time)
+
+    flow_field = get_flow_field(maze_walls)
+    cells = [(x, 300) for x in range(80, 520, 10)]
+    position = itertools.cycle(cells)  # A new cell every call, so every call searches
+    def retarget():
+        flow_field.retarget(*next(position))
+    results["flow_field_retarget"] = measure(retarget, min_time)
+
+    table = get_next_hop_table(maze_walls)  # The same new targets, but a lookup each
+    results["next_hop_lookup"] = measure(lambda: table.direction_at(100, 100, *next(position)), min_time)
+
+    wall_index = get_wall_index(maze_walls)
+    results["wall_index_is_free"] = measure(lambda: wall_index.is_free(300, 300), min_time)
+    results["wall_index_sweep"] = measure(lambda: wall_index.sweep(300, 300, 48, 0), min_time)
+
+    items = SpatialHash()
+    rng = random.Random(0)
+    for _ in range(5000):
+        items.insert(object(), rng.randrange(WIDTH), rng.randrange(HEIGHT))
+    results["spatial_hash_query"] = measure(lambda: items.query(300, 300, TOUCH_RADIUS), min_time)
+
+    env = VecPacmanEnv(1024)
+    env_actions = [random.Random(0).randrange(5) for _ in range(env.num_envs)]
+    # Counted per game, so it reads as environment steps per second
+    results["vec_env_steps"] = measure(lambda: env.step(env_actions), min_time) * env.num_envs
+
+    engine = GameEngine(seed=0)
+    snapshot = engine.snapshot()
+    results["engine_snapshot"] = measure(engine.snapshot, min_time)
+    results["engine_restore"] = measure(lambda: engine.restore(snapshot), min_time)
+
+    # The autopilot's search, counted per rollout, and one tick of its forward model
+    autopilot = Autopilot(engine, rollouts=100)
+    results["autopilot_rollouts"] = measure(autopilot.decide, min_time) * 100
+    model = autopilot.model
+    pacman, start_ghosts, alive = model.state(engine)
+    ghosts = list(start_ghosts)
+    def model_tick():
+        ghosts[:] = start_ghosts
+        model.advance(pacman, ghosts, alive, DIRECTIONS.index("LEFT"), 1)
+    results["forward_model_tick"] = measure(model_tick, min_time)
+
+    surface = pygame.display.get_surface()
+    results["draw_maze"] = measure(lambda: draw_maze(surface), min_time)
+    results["draw_pellets"] = measure(lambda: draw_pellets(surface, engine.pellets), min_time)
+    return results
+
+
+def scenario_benchmarks(min_time, names=None):
+    """End-to-end ticks per second and frames per second for every scenario"""
+    results = {}
+    screen = pygame.display.get_surface()
+    for name, make in SCENARIOS.items():
+        if names and name not in names:
+            continue
+        engine = GameEngine(seed=1, **make())
+        policy = random.Random(2)
+        action = [None]
+
+        def tick():
+            if engine.tick % 8 == 0:
+                action[0] = policy.choice(DIRECTIONS)
+            engine.step(action[0])
+            if engine.game_over:
+                engine.reset()
+        results[f"{name}_ticks_per_sec"] = measure(tick, min_time)
+
+        renderer = Renderer(screen, engine)
+        renderer.draw(engine)
+        def frame():
+            tick()
+            renderer.draw(engine)
+        results[f"{name}_frames_per_sec"] = measure(frame, min_time)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline.
+    Returns:
+        list: (name, baseline, result, change) for everything more than `tolerance` slower.
+    """
+    regressions = []
+    for name, value in sorted(results.items()):
+        old = baseline.get(name)
+        if old:
+            change = value / old - 1
+            if change < -tolerance:
+                regressions.append((name, old, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Pac-Man hot paths")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to save this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--quick", action="store_true", help="shorter timings, for a smoke test")
+    parser.add_argument("--scenario", nargs="+", help="only run these scenarios")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    min_time = 0.05 if args.quick else 0.2
+
+    results = {}
+    if not args.scenario:
+        results.update(micro_benchmarks(min_time))
+    results.update(scenario_benchmarks(min_time, args.scenario))
+    pygame.quit()
+
+    for name, value in sorted(results.items()):
+        print(f"{name:40} {value:14,.1f} /s")
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNO BASELINE: nothing was compared, as {args.baseline} does not exist. "
+              f"Run with --save-baseline on this machine first.", file=sys.stderr)
+        return 2
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION ({len(regressions)} benchmark(s) more than "
+              f"{args.tolerance:.0%} slower than {args.baseline}):")
+        for name, old, new, change in regressions:
+            print(f"  {name:38} {old:14,.1f} -> {new:14,.1f} /s  ({change:+.0%})")
+        return 1
+    print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+A scrolling view of mazes bigger than the window.
+
+The Renderer draws a level that fits in the window onto full-window layers. A
+bigger level (a generated maze, say) would need layers as big as the whole
+maze, and drawing every wall and pellet onto them costs time and memory that
+grow with the maze. Instead a Camera follows Pac-Man around a window-sized
+part of the level, and a ChunkCache cuts the level into CHUNK_SIZE squares,
+each drawn (walls and pellets) onto a surface of its own the first time it
+comes into view. Each frame only the chunks and sprites the camera can see
+are copied to the screen, so drawing costs the same on a 600-pixel maze as
+on a 20,000-pixel one.
+
+Up to MAX_CHUNKS chunk surfaces are kept; when a new one is needed, the one
+that has gone longest without being seen is thrown away (least recently used
+first) and redrawn if it comes back into view.
+"""
+from collections import OrderedDict
+import pygame
+from settings import *
+
+
+def level_size(walls, size=(WIDTH, HEIGHT)):
+    """
+    Return the size of the area a level covers: up to its furthest wall, and at least `size`.
+    Parameters:
+        walls (list): pygame.Rect walls of the maze.
+        size (tuple): Smallest (width, height) to return, usually the window's.
+    """
+    width, height = size
+    for wall in walls:
+        width, height = max(width, wall.right), max(height, wall.bottom)
+    return width, height
+
+
+class Camera:
+    """
+    The part of the level shown in the window, kept centred on a point and inside the level.
+
+    Usage:
+        camera = Camera(screen.get_size(), level_size(engine.walls))
+        camera.follow(pacman.x, pacman.y)
+        screen_x, screen_y = camera.to_screen(ghost.x, ghost.y)
+    """
+    def __init__(self, size, world_size):
+        """
+        Parameters:
+            size (tuple): (width, height) of the window.
+            world_size (tuple): (width, height) of the level, from level_size().
+        """
+        self.rect = pygame.Rect((0, 0), size)  # The visible area, in level coordinates
+        self.world = pygame.Rect((0, 0), world_size)
+
+    def follow(self, x, y):
+        """Centre the view on (x, y), stopping at the edges of the level"""
+        self.rect.center = (x, y)
+        self.rect.clamp_ip(self.world)
+
+    def to_screen(self, x, y):
+        """Return where level point (x, y) is in the window"""
+        return x - self.rect.x, y - self.rect.y
+
+    def sees(self, rect):
+        """Return True if any of a level rectangle is in view"""
+        return self.rect.colliderect(rect)
+
+
+class ChunkCache:
+    """
+    The level (walls and pellets) drawn in CHUNK_SIZE squares, kept in least recently used order.
+
+    Chunk (column, row) covers the level from (column * CHUNK_SIZE, row * CHUNK_SIZE)
+    to CHUNK_SIZE pixels further on, and is drawn just as draw_maze() and
+    draw_pellets() would draw that area.
+
+    Usage:
+        chunks = ChunkCache(engine.walls, engine.pellets.positions, screen)
+        chunks.draw(screen, camera, engine.pellets)
+        chunks.erase_pellet(x, y, engine.pellets)  # after it was eaten
+    """
+    def __init__(self, walls, pellet_positions, screen, chunk_size=CHUNK_SIZE, max_chunks=MAX_CHUNKS):
+        """
+        Parameters:
+            walls (list): pygame.Rect walls of the maze.
+            pellet_positions (list): (x, y) of every pellet, numbered as in the PelletField.
+            screen (pygame.Surface): The display, whose pixel format the chunks are made in.
+            chunk_size (int): Width and height of a chunk in pixels.
+            max_chunks (int): Chunk surfaces to keep (at least as many as fit in the window).
+        """
+        self.screen = screen
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (column, row) -> surface, least recently used first
+        self.renders = 0  # Chunks drawn, for profiling
+        self.evictions = 0  # Chunks thrown away to make room
+
+        # Sort the walls and pellets into every chunk they overlap, once
+        self.walls = {}  # (column, row) -> walls
+        for wall in walls:
+            for key in self._keys(wall):
+                self.walls.setdefault(key, []).append(wall)
+        self.pellets = {}  # (column, row) -> pellet numbers
+        self.positions = pellet_positions
+        for index, (x, y) in enumerate(pellet_positions):
+            for key in self._keys(self._pellet_rect(x, y)):
+                self.pellets.setdefault(key, []).append(index)
+
+    @staticmethod
+    def _pellet_rect(x, y):
+        """Return the area a pellet is drawn over"""
+        radius = PELLET_RADIUS
+        return pygame.Rect(x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)
+
+    def _keys(self, rect):
+        """Return the (column, row) of every chunk a rectangle overlaps"""
+        size = self.chunk_size
+        return [(column, row)
+                for row in range(rect.top // size, (rect.bottom - 1) // size + 1)
+                for column in range(rect.left // size, (rect.right - 1) // size + 1)]
+
+    def _paint(self, key, surface, pellets, area=None):
+        """Draw a chunk's walls and uneaten pellets onto its surface (only inside area, if given)"""
+        size = self.chunk_size
+        left, top = key[0] * size, key[1] * size
+        surface.set_clip(area)
+        surface.fill(BLACK)
+        for wall in self.walls.get(key, ()):
+            pygame.draw.rect(surface, WHITE, wall.move(-left, -top))
+        alive, positions = pellets.alive, self.positions
+        for index in self.pellets.get(key, ()):
+            if alive >> index & 1:
+                x, y = positions[index]
+                pygame.draw.circle(surface, PELLET_COLOR, (x - left, y - top), PELLET_RADIUS)
+        surface.set_clip(None)
+
+    def get(self, key, pellets):
+        """
+        Return a chunk's surface, drawing it if it isn't cached.
+        Parameters:
+            key (tuple): The chunk's (column, row).
+            pellets (PelletField): Which pellets are left.
+        """
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+        if len(self.chunks) >= self.max_chunks:
+            # Reuse the surface of the chunk that has gone longest without being seen
+            surface = self.chunks.popitem(last=False)[1]
+            self.evictions += 1
+        else:
+            surface = pygame.Surface((self.chunk_size, self.chunk_size)).convert(self.screen)
+        self._paint(key, surface, pellets)
+        self.renders += 1
+        self.chunks[key] = surface
+        return surface
+
+    def draw(self, surface, camera, pellets, area=None):
+        """
+        Copy what the camera sees onto a surface (the window).
+        Parameters:
+            surface (pygame.Surface): The window.
+            camera (Camera): Where the window is in the level.
+            pellets (PelletField): Which pellets are left.
+            area (pygame.Rect): Only copy this part of the window (all of it if None).
+        """
+        size = self.chunk_size
+        view = camera.rect if area is None else camera.rect.clip(area.move(camera.rect.topleft))
+        if not view:
+            return
+        for key in self._keys(view):
+            left, top = key[0] * size, key[1] * size
+            part = view.clip((left, top, size, size))
+            surface.blit(self.get(key, pellets), camera.to_screen(*part.topleft), part.move(-left, -top))
+
+    def erase_pellet(self, x, y, pellets):
+        """
+        Take an eaten pellet off the cached chunks it was drawn on (the rest draw it without).
+        Returns:
+            pygame.Rect: The area of the level that changed.
+        """
+        size = self.chunk_size
+        area = self._pellet_rect(x, y)
+        for key in self._keys(area):
+            surface = self.chunks.get(key)
+            if surface is not None:
+                # Redraw just that spot: the wall and pellets under it, minus the eaten one
+                self._paint(key, surface, pellets, area.move(-key[0] * size, -key[1] * size))
+        return area
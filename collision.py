@@ -0,0 +1,300 @@
+import pygame
+from settings import *
+
+
+class WallList(list):
+    """
+    A list of wall Rects that counts its own changes.
+
+    Adding, removing or replacing walls bumps `version`, which is how a WallIndex
+    built from the list knows it has to rebuild. Moving a Rect in place is not
+    noticed, so replace the wall instead (walls[i] = new_rect).
+    """
+    def __init__(self, walls=()):
+        super().__init__(walls)
+        self.version = 0
+
+    def _changed(self):
+        self.version += 1
+
+    def append(self, wall):
+        super().append(wall)
+        self._changed()
+
+    def extend(self, walls):
+        super().extend(walls)
+        self._changed()
+
+    def insert(self, index, wall):
+        super().insert(index, wall)
+        self._changed()
+
+    def remove(self, wall):
+        super().remove(wall)
+        self._changed()
+
+    def pop(self, index=-1):
+        wall = super().pop(index)
+        self._changed()
+        return wall
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, walls):
+        result = super().__iadd__(walls)
+        self._changed()
+        return result
+
+
+def wall_version(walls):
+    """Return a value that changes whenever the wall list changes"""
+    if not isinstance(walls, WallList):
+        # A plain list can't tell when a wall is replaced, so an index built from it could go stale unnoticed
+        raise TypeError(f"walls must be a WallList, not {type(walls).__name__}")
+    return walls.version
+
+
+class WallIndex:
+    """
+    Uniform grid of buckets over the maze walls.
+
+    Every wall is stored in each grid cell it overlaps. A hitbox only has to be
+    tested against the walls in the few cells it covers, so a collision check
+    costs the same no matter how many walls the maze has.
+    """
+    def __init__(self, walls, cell_size=WALL_CELL_SIZE):
+        """
+        Parameters:
+            walls (WallList): pygame.Rect walls of the maze.
+            cell_size (int): Width and height of one grid cell in pixels.
+        """
+        self.walls = walls
+        self.version = wall_version(walls)
+        self.cell_size = cell_size
+        self.probes = 0  # How many hitboxes have been checked, for profiling
+        self._cell_table = None  # Built by _cells() the first time NumPy checks are made
+        self.buckets = {}  # (column, row) -> list of walls overlapping that cell
+        for wall in walls:
+            for column in range(wall.left // cell_size, (wall.right - 1) // cell_size + 1):
+                for row in range(wall.top // cell_size, (wall.bottom - 1) // cell_size + 1):
+                    self.buckets.setdefault((column, row), []).append(wall)
+
+    def is_stale(self):
+        """True if the wall list changed after this index was built"""
+        return wall_version(self.walls) != self.version
+
+    def is_free(self, x, y, size=HITBOX_SIZE):
+        """
+        Check if a size x size hitbox centred on (x, y) touches no wall.
+        Parameters:
+            x (int): X-coordinate of the hitbox centre.
+            y (int): Y-coordinate of the hitbox centre.
+            size (int): Width and height of the hitbox.
+        Returns:
+            bool: True if the hitbox can stand at (x, y).
+        """
+        self.probes += 1
+        half = size // 2
+        left, top = x - half, y - half
+        hitbox = pygame.Rect(left, top, size, size)
+        cell_size = self.cell_size
+        buckets = self.buckets
+        for column in range(left // cell_size, (left + size - 1) // cell_size + 1):
+            for row in range(top // cell_size, (top + size - 1) // cell_size + 1):
+                bucket = buckets.get((column, row))
+                if bucket and hitbox.collidelist(bucket) != -1:
+                    return False
+        return True
+
+    def sweep(self, x, y, dx, dy, size=HITBOX_SIZE):
+        """
+        Slide a size x size hitbox centred on (x, y) by (dx, dy), stopping where it touches a wall.
+        The whole path is checked, not just the end, so a fast-moving hitbox can't
+        jump through a wall. A diagonal move is swept along x first, then along y.
+        Parameters:
+            x (int): X-coordinate of the hitbox centre.
+            y (int): Y-coordinate of the hitbox centre.
+            dx (int): Pixels to move along x.
+            dy (int): Pixels to move along y.
+            size (int): Width and height of the hitbox.
+        Returns:
+            tuple: (x, y, blocked): the centre where the hitbox stops (touching the wall
+                   if it hit one) and True if a wall stopped it short.
+        """
+        blocked = False
+        if dx:
+            travel = self._travel(x, y, dx, True, size)
+            x += travel if dx > 0 else -travel
+            blocked = travel < abs(dx)
+        if dy:
+            travel = self._travel(x, y, dy, False, size)
+            y += travel if dy > 0 else -travel
+            blocked = blocked or travel < abs(dy)
+        return x, y, blocked
+
+    def is_clear(self, x, y, dx, dy, size=HITBOX_SIZE):
+        """True if a hitbox centred on (x, y) can move the whole way by (dx, dy) (see sweep)"""
+        return not self.sweep(x, y, dx, dy, size)[2]
+
+    def _travel(self, x, y, distance, horizontal, size):
+        """How many of the pixels in distance a hitbox can move along one axis before touching a wall"""
+        self.probes += 1
+        half = size // 2
+        left, top = x - half, y - half
+        # The strip the hitbox passes through, beyond the edge it moves out of
+        if horizontal:
+            ahead = pygame.Rect(left + size if distance > 0 else left + distance, top, abs(distance), size)
+        else:
+            ahead = pygame.Rect(left, top + size if distance > 0 else top + distance, size, abs(distance))
+        travel = abs(distance)
+        cell_size = self.cell_size
+        buckets = self.buckets
+        for column in range(ahead.left // cell_size, (ahead.right - 1) // cell_size + 1):
+            for row in range(ahead.top // cell_size, (ahead.bottom - 1) // cell_size + 1):
+                bucket = buckets.get((column, row))
+                if not bucket:
+                    continue
+                for index in ahead.collidelistall(bucket):
+                    wall = bucket[index]
+                    # Gap between the hitbox's leading edge and the wall's near side
+                    if horizontal:
+                        gap = wall.left - (left + size) if distance > 0 else left - wall.right
+                    else:
+                        gap = wall.top - (top + size) if distance > 0 else top - wall.bottom
+                    travel = min(travel, max(gap, 0))
+        return travel
+
+    def _cells(self):
+        """
+        Return the walls cut into cells, for checking many hitboxes at once with NumPy.
+        The field is cut along every wall edge, so each cell is all wall or all floor
+        however big it is: a generated maze needs about one cell per tile, not a
+        table entry per pixel. Built once per index.
+        Returns:
+            tuple: (xs, ys, counts). xs and ys are the sorted wall edges; pixel column x
+                   is in cell column searchsorted(xs, x, "right"), and likewise for rows.
+                   counts[j, i] is the number of wall cells in the rows before j and
+                   the columns before i (a summed-area table).
+        """
+        import numpy as np  # Only the vectorized movers need NumPy
+
+        if self._cell_table is not None:
+            return self._cell_table
+        rects = np.array([tuple(wall) for wall in self.walls], dtype=np.int64).reshape(-1, 4)
+        rects = rects[(rects[:, 2] > 0) & (rects[:, 3] > 0)]
+        left, top = rects[:, 0], rects[:, 1]
+        right, bottom = left + rects[:, 2], top + rects[:, 3]
+        xs = np.unique(np.concatenate([left, right]))
+        ys = np.unique(np.concatenate([top, bottom]))
+
+        # Mark the cells under every wall with a 2D difference array: a wall from edge
+        # xs[a] to xs[b] covers cell columns a + 1 to b
+        first_column, end_column = np.searchsorted(xs, left) + 1, np.searchsorted(xs, right) + 1
+        first_row, end_row = np.searchsorted(ys, top) + 1, np.searchsorted(ys, bottom) + 1
+        cover = np.zeros((len(ys) + 2, len(xs) + 2), dtype=np.int32)
+        np.add.at(cover, (first_row, first_column), 1)
+        np.add.at(cover, (first_row, end_column), -1)
+        np.add.at(cover, (end_row, first_column), -1)
+        np.add.at(cover, (end_row, end_column), 1)
+        wall = cover.cumsum(axis=0, dtype=np.int32).cumsum(axis=1, dtype=np.int32)[:-1, :-1] > 0
+
+        counts = np.zeros((len(ys) + 2, len(xs) + 2), dtype=np.int32)
+        counts[1:, 1:] = wall.cumsum(axis=0, dtype=np.int32).cumsum(axis=1, dtype=np.int32)
+        self._cell_table = (xs, ys, counts)
+        return self._cell_table
+
+    def _walls_in(self, left, top, right, bottom):
+        """Count the wall cells overlapping each pixel area left <= x < right, top <= y < bottom (NumPy arrays)"""
+        import numpy as np
+
+        xs, ys, counts = self._cells()
+        first_column, last_column = np.searchsorted(xs, left, "right"), np.searchsorted(xs, right - 1, "right") + 1
+        first_row, last_row = np.searchsorted(ys, top, "right"), np.searchsorted(ys, bottom - 1, "right") + 1
+        return (counts[last_row, last_column] - counts[first_row, last_column]
+                - counts[last_row, first_column] + counts[first_row, first_column])
+
+    def are_clear(self, x, y, dx, dy, size=HITBOX_SIZE):
+        """
+        Vectorized is_clear: check many moves at once with NumPy.
+        A move counts as clear when the hitbox fits where it starts and touches no wall
+        on the way, swept along x first and then along y, as in sweep(). The arguments
+        are arrays (or numbers) that broadcast together.
+        Parameters:
+            x (numpy.ndarray): X-coordinates of the hitbox centres.
+            y (numpy.ndarray): Y-coordinates of the hitbox centres.
+            dx (numpy.ndarray): Pixels to move along x.
+            dy (numpy.ndarray): Pixels to move along y.
+            size (int): Width and height of the hitboxes.
+        Returns:
+            numpy.ndarray: Boolean array, True for each move that is clear all the way.
+        """
+        import numpy as np
+
+        half = size // 2
+        left, top = np.asarray(x) - half, np.asarray(y) - half
+        if not np.any(np.logical_and(dx, dy)):
+            # Moving along one axis the hitbox covers one box, from where it starts to where it ends
+            return self._walls_in(left + np.minimum(dx, 0), top + np.minimum(dy, 0),
+                                  left + size + np.maximum(dx, 0), top + size + np.maximum(dy, 0)) == 0
+        # The area the hitbox covers moving along x, then along y from where that ended
+        clear = self._walls_in(left + np.minimum(dx, 0), top, left + size + np.maximum(dx, 0), top + size) == 0
+        left = left + dx
+        clear &= self._walls_in(left, top + np.minimum(dy, 0), left + size, top + size + np.maximum(dy, 0)) == 0
+        return clear
+
+    def travels(self, x, y, step_x, step_y, limit, size=HITBOX_SIZE):
+        """
+        Vectorized sweep along one axis: how far many hitboxes can move before touching a wall.
+        Parameters:
+            x (numpy.ndarray): X-coordinates of the hitbox centres.
+            y (numpy.ndarray): Y-coordinates of the hitbox centres.
+            step_x (numpy.ndarray): -1, 0 or 1: the direction of each move along x.
+            step_y (numpy.ndarray): -1, 0 or 1: the direction along y (0 where step_x isn't).
+            limit (int): Furthest to move, e.g. the movers' speed.
+            size (int): Width and height of the hitboxes.
+        Returns:
+            numpy.ndarray: Pixels each hitbox can move, from 0 (blocked, or it doesn't fit
+                           where it is) to limit.
+        """
+        import numpy as np
+
+        low = np.zeros(np.broadcast(x, y, step_x, step_y).shape, dtype=np.int64)
+        high = np.full_like(low, limit)
+        # Binary search for the longest clear move: about log2(limit) rounds of are_clear
+        while (low < high).any():
+            middle = (low + high + 1) // 2
+            clear = self.are_clear(x, y, step_x * middle, step_y * middle, size)
+            low = np.where(clear, middle, low)
+            high = np.where(clear, high, middle - 1)
+        return low
+
+
+# One index per wall list, shared by Pac-Man and every ghost
+_wall_indexes = {}
+MAX_CACHED_INDEXES = 32
+
+def get_wall_index(walls):
+    """
+    Return the shared WallIndex for a wall list, rebuilding it if the walls changed.
+    Parameters:
+        walls (WallList): pygame.Rect walls of the maze.
+    Returns:
+        WallIndex: The index for these walls.
+    """
+    index = _wall_indexes.get(id(walls))
+    if index is None or index.walls is not walls or index.is_stale():
+        if len(_wall_indexes) >= MAX_CACHED_INDEXES:
+            _wall_indexes.clear()  # Forget mazes that are no longer in use
+        index = WallIndex(walls)
+        _wall_indexes[id(walls)] = index
+    return index
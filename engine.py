@@ -0,0 +1,437 @@
+import random
+import struct
+from collections import namedtuple
+from array import array
+import pygame
+from settings import *
+from maze import maze_walls
+from pacman import PacMan
+from ghosts import Ghost
+from pellets import PelletField, pellets
+from fruits import Fruit, FruitPool, FRUIT_DATA
+from spatial_hash import SpatialHash
+from scheduler import Scheduler
+from navigation import get_flow_field
+from next_hop import get_next_hop_table
+
+# Layout of save_state(): tick, score, game over, Pac-Man x, y and speed,
+# then how many ghosts, pellets and fruits follow
+STATE_HEADER = struct.Struct("<IiBiiiHIH")
+FRUIT_RECORD = struct.Struct("<Biii")  # fruit type number, centre x, centre y, ms since spawn
+FRUIT_TYPES = list(FRUIT_DATA)
+RNG_WORDS = 625  # Length of the Mersenne Twister state in random.Random.getstate()
+FRUIT_NUMBERS = {fruit_type: number for number, fruit_type in enumerate(FRUIT_TYPES)}
+DIRECTION_NUMBERS = {direction: number for number, direction in enumerate(DIRECTIONS)}
+
+# The game state as plain values, see GameEngine.snapshot():
+#   pacman  (x, y, speed)
+#   ghosts  flat tuple of x, y, speed, direction number per ghost
+#   pellets int with bit i set while pellet i (see PelletField) is on the board
+#   fruits  (type number, centre x, centre y, ms since spawn) per fruit
+#   rng     random.Random.getstate()
+Snapshot = namedtuple("Snapshot", "tick score game_over pacman ghosts pellets fruits rng")
+
+
+class CountingRandom(random.Random):
+    """
+    random.Random that counts how often its state changes.
+    snapshot() copies the generator's state (625 numbers) only when it has
+    changed since the last copy, which during a lookahead is almost never.
+    """
+    changes = 0
+
+    def random(self):
+        self.changes += 1
+        return super().random()
+
+    def getrandbits(self, k):
+        self.changes += 1
+        return super().getrandbits(k)
+
+    def seed(self, *args, **kwargs):
+        self.changes += 1
+        super().seed(*args, **kwargs)
+
+    def setstate(self, state):
+        self.changes += 1
+        super().setstate(state)
+
+
+def check_ghost_collision(pacman, ghost, threshold=CATCH_DISTANCE):
+    """Check if Pac-Man collides with the ghost"""
+    # Comparing squared distances gives the same answer without a square root
+    dx, dy = pacman.x - ghost.x, pacman.y - ghost.y
+    return dx * dx + dy * dy < threshold * threshold
+
+
+def check_pellet_collision(pacman, pellet, threshold=PELLET_DISTANCE):
+    """Check if Pac-Man is close enough to a pellet to eat it"""
+    dx, dy = pacman.x - pellet.x, pacman.y - pellet.y
+    return dx * dx + dy * dy < threshold * threshold
+
+
+class GameEngine:
+    """
+    Headless Pac-Man game.
+
+    Holds Pac-Man, the ghosts, the pellets and the maze walls and moves them
+    forward one tick at a time. It never touches the display, so games can be
+    simulated as fast as the game logic allows. game.py draws its state.
+
+    Usage:
+        engine = GameEngine(seed=1)
+        state, events = engine.step("LEFT")
+    """
+    def __init__(self, walls=None, pellet_positions=None, pacman_start=PACMAN_START,
+                 ghost_starts=None, seed=None, use_swarm=False, pacman_speed=None,
+                 ghost_speed=None, catch_distance=CATCH_DISTANCE, ghost_planner=None):
+        """
+        Parameters:
+            walls (WallList): pygame.Rect walls of the maze (defaults to maze.maze_walls).
+            pellet_positions (list): (x, y) pellet positions (defaults to the pellets in pellets.py).
+            pacman_start (tuple): Pac-Man's (x, y) start position.
+            ghost_starts (list): (x, y, color) for every ghost (defaults to GHOST_STARTS).
+            seed (int): Seed for the ghosts' random choices, so a game can be replayed.
+            use_swarm (bool): Move the ghosts as one NumPy GhostSwarm (for games with many ghosts).
+            pacman_speed (int): Pac-Man's speed in pixels per tick (PacMan's default if None).
+            ghost_speed (int): Every ghost's speed in pixels per tick (Ghost's default if None).
+            catch_distance (int): How close a ghost has to get to catch Pac-Man.
+            ghost_planner (GhostPlanner): Plans the ghosts' moves in the background (see
+                                          planner.py); not used with use_swarm.
+        """
+        self.walls = maze_walls if walls is None else walls
+        if pellet_positions is None:
+            pellet_positions = [(pellet.x, pellet.y) for pellet in pellets]
+        self.pellet_positions = list(pellet_positions)
+        # Which pellets are on the board is one int (see PelletField), so a reset or a
+        # snapshot copies a single number instead of a list of pellet objects
+        self.pellets = PelletField(self.pellet_positions)
+        self.pacman_start = pacman_start
+        self.ghost_starts = list(GHOST_STARTS if ghost_starts is None else ghost_starts)
+        self.seed = seed
+        self.use_swarm = use_swarm
+        self.pacman_speed = pacman_speed
+        self.ghost_speed = ghost_speed
+        self.catch_distance = catch_distance
+        self.fruits = pygame.sprite.Group()
+        self.scheduler = Scheduler()  # Timed events (fruit expiry) on the game's own clock
+        self.fruit_pool = FruitPool()  # Kept across resets so fruits are reused
+        self.profiler = None  # Set to a FrameProfiler to time the phases of every tick
+        self.ghost_planner = ghost_planner
+        if not use_swarm:
+            # Load (or build) the ghosts' next-hop table while the level loads, so the
+            # first ghost move of the game doesn't stall on it
+            get_next_hop_table(self.walls)
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        Put every game object back at its start position.
+        Parameters:
+            seed (int): New random seed (keeps the previous seed if None).
+        Returns:
+            dict: The starting state, see get_state().
+        """
+        if seed is not None:
+            self.seed = seed
+        self.rng = CountingRandom(self.seed)
+        self.rng_state = None  # Last copy of the generator's state, and its change count
+        self.rng_changes = -1
+        self.pacman = PacMan(*self.pacman_start, walls=self.walls)
+        if self.pacman_speed is not None:
+            self.pacman.speed = self.pacman_speed
+        if self.use_swarm:
+            from swarm import GhostSwarm  # Needs NumPy, so only imported when asked for
+            self.swarm = GhostSwarm(self.ghost_starts, walls=self.walls, rng=self.rng)
+            self.ghosts = list(self.swarm)
+        else:
+            self.swarm = None
+            self.ghosts = [Ghost(x, y, color, walls=self.walls, rng=self.rng)
+                           for x, y, color in self.ghost_starts]
+        if self.ghost_speed is not None:
+            for ghost in self.ghosts:
+                ghost.speed = self.ghost_speed
+        self.ghost_numbers = {ghost: index for index, ghost in enumerate(self.ghosts)}
+        self.pellets.reset()
+        for fruit in self.fruits.sprites():
+            fruit.disappear()  # Empties the group and hands the fruit back to the pool
+        self.scheduler.clear(now=0)
+
+        # The fruits and ghosts Pac-Man can touch, bucketed by position, so checking
+        # what he touches costs the same however big the level is (the pellet field
+        # has its own buckets). A swarm checks its ghosts all at once instead, so
+        # swarm ghosts are not added.
+        self.items = SpatialHash()
+        if self.swarm is None:
+            for ghost in self.ghosts:
+                self.items.insert(ghost, ghost.x, ghost.y)
+        self.tick = 0
+        self.tick_events = []  # Events of the tick being run, for scheduler callbacks
+        self.score = 0
+        self.game_over = False
+        if self.ghost_planner is not None:
+            self.ghost_planner.reset()
+            self.request_plan()
+        return self.get_state()
+
+    def step(self, action=None):
+        """
+        Advance the game by one tick.
+        Parameters:
+            action (str): "UP", "DOWN", "LEFT", "RIGHT", or None to stand still.
+        Returns:
+            tuple: (state, events). state is the dict from get_state(), events is a list of
+                   (name, data) tuples: ("PELLET_EATEN", (x, y)), ("FRUIT_EATEN", fruit_type),
+                   ("FRUIT_EXPIRED", fruit_type), ("CAUGHT", ghost_index) and
+                   ("LEVEL_CLEARED", None).
+        """
+        events = self.tick_events = []
+        if self.game_over:
+            return self.get_state(), events
+
+        profiler = self.profiler
+        if action is not None:
+            self.pacman.move(action)
+        if profiler:
+            profiler.lap("pacman_move")
+        if self.swarm is not None:
+            self.swarm.move_towards(self.pacman)
+        elif self.ghost_planner is not None:
+            self.move_planned_ghosts()
+        else:
+            for ghost in self.ghosts:
+                ghost.move_towards(self.pacman)
+                self.items.move(ghost, ghost.x, ghost.y)
+        if profiler:
+            profiler.lap("ghost_move")
+
+        # Run the timers due by the end of this tick (a fruit that expires calls fruit_expired)
+        self.scheduler.advance_to(self.time_at(self.tick + 1))
+
+        # Ask the pellet field and the spatial hash what is near Pac-Man, then do the exact checks
+        pacman = self.pacman
+        ate_pellet = False
+        limit = PELLET_DISTANCE * PELLET_DISTANCE
+        positions = self.pellets.positions
+        for index in self.pellets.near(pacman.x, pacman.y, PELLET_DISTANCE):
+            x, y = positions[index]
+            if (pacman.x - x) ** 2 + (pacman.y - y) ** 2 < limit:
+                self.eat_pellet(index)
+                ate_pellet = True
+                events.append(("PELLET_EATEN", (x, y)))
+
+        hitbox = pygame.Rect(pacman.x - HITBOX_SIZE // 2, pacman.y - HITBOX_SIZE // 2,
+                             HITBOX_SIZE, HITBOX_SIZE)
+        caught = []
+        reach = max(TOUCH_RADIUS, self.catch_distance)
+        for item in self.items.query(pacman.x, pacman.y, reach):
+            if isinstance(item, Fruit):
+                if hitbox.colliderect(item.rect):
+                    self.score += item.eaten()
+                    self.items.remove(item)
+                    events.append(("FRUIT_EATEN", item.type))
+            elif check_ghost_collision(pacman, item, self.catch_distance):
+                caught.append(self.ghost_numbers[item])
+        if ate_pellet and not self.pellets:
+            events.append(("LEVEL_CLEARED", None))
+
+        if self.swarm is not None:
+            caught = self.swarm.contact_mask(pacman, self.catch_distance).nonzero()[0].tolist()
+        if caught:
+            events.append(("CAUGHT", min(caught)))
+            self.game_over = True
+        if profiler:
+            profiler.lap("collisions")
+
+        self.tick += 1
+        if self.ghost_planner is not None and not self.game_over:
+            self.request_plan()
+        return self.get_state(), events
+
+    def move_planned_ghosts(self):
+        """Move the ghosts by the planner's plan for this tick, or by the greedy step if it is late"""
+        plan = self.ghost_planner.take(self.tick)
+        nav_grid = get_flow_field(self.walls).nav_grid
+        for index, ghost in enumerate(self.ghosts):
+            direction = plan[index] if plan is not None else None
+            if direction is None or not ghost.follow_path(direction, nav_grid):
+                ghost.chase_greedy(self.pacman)
+            self.items.move(ghost, ghost.x, ghost.y)
+
+    def request_plan(self):
+        """Ask the ghost planner for the next tick's moves, from where everyone is now"""
+        if self.swarm is None:
+            self.ghost_planner.submit(self.tick, (self.pacman.x, self.pacman.y), self.ghost_positions())
+
+    def eat_pellet(self, index):
+        """Remove pellet number index (see PelletField) from the board and score it"""
+        self.pellets.eat(index)
+        self.score += PELLET_POINTS
+
+    def time_at(self, tick):
+        """Return the game time in whole milliseconds at the start of a tick"""
+        return tick * 1000 // TICK_RATE
+
+    def spawn_fruit(self, fruit_type, position, age=0):
+        """
+        Put a fruit on the board.
+        Parameters:
+            fruit_type (str): A key of FRUIT_DATA, e.g. 'cherry'.
+            position (tuple): The (x, y) centre of the fruit.
+            age (int): How long (in milliseconds) the fruit has already been out.
+        Returns:
+            Fruit: The new fruit.
+        """
+        fruit = self.fruit_pool.acquire(fruit_type, position, self.fruits, self.scheduler, age)
+        fruit.on_expire = self.fruit_expired
+        self.items.insert(fruit, *fruit.rect.center)
+        return fruit
+
+    def fruit_expired(self, fruit):
+        """Scheduler callback: a fruit's time ran out during the current tick"""
+        self.items.remove(fruit)
+        self.tick_events.append(("FRUIT_EXPIRED", fruit.type))
+
+    def snapshot(self):
+        """
+        Capture the whole game state as plain numbers, cheaply enough to take thousands
+        of times per decision (rollback, undo, lookahead search).
+        No pygame objects are copied: the pellets are one int with a bit per pellet and
+        the random generator's state is an immutable tuple. Pac-Man's position history
+        and timers other than fruit expiry are not part of it.
+        Returns:
+            Snapshot: Pass it to restore() on this engine (or one set up with the same level).
+        """
+        pacman = self.pacman
+        if self.swarm is not None:
+            ghosts = self.swarm.state()
+        else:
+            ghosts = tuple(value for ghost in self.ghosts
+                           for value in (ghost.x, ghost.y, ghost.speed, DIRECTION_NUMBERS[ghost.direction]))
+        if self.rng.changes != self.rng_changes:
+            self.rng_state = self.rng.getstate()
+            self.rng_changes = self.rng.changes
+        return Snapshot(self.tick, self.score, self.game_over, (pacman.x, pacman.y, pacman.speed),
+                        ghosts, self.pellets.alive, self.fruit_records(), self.rng_state)
+
+    def restore(self, snapshot):
+        """
+        Put the game back in a state captured by snapshot().
+        The pellets come back by copying one int, so going back costs about the same
+        however many pellets the level has.
+        Parameters:
+            snapshot (Snapshot): The state to go back to.
+        """
+        if len(snapshot.ghosts) != 4 * len(self.ghosts):
+            raise ValueError("snapshot does not match this engine's level")
+        self.tick, self.score, self.game_over = snapshot.tick, snapshot.score, snapshot.game_over
+        pacman = self.pacman
+        pacman.x, pacman.y, pacman.speed = snapshot.pacman
+
+        ghosts = snapshot.ghosts
+        if self.swarm is not None:
+            self.swarm.set_state(ghosts)
+        else:
+            for index, ghost in enumerate(self.ghosts):
+                ghost.x, ghost.y, ghost.speed, direction = ghosts[index * 4:index * 4 + 4]
+                ghost.direction = DIRECTIONS[direction]
+                self.items.move(ghost, ghost.x, ghost.y)
+
+        self.pellets.alive = snapshot.pellets
+
+        now = self.time_at(self.tick)
+        if self.scheduler.now != now or self.fruit_records() != snapshot.fruits:
+            # Put back the fruits, with their expiry timers rescheduled from their ages
+            for fruit in self.fruits.sprites():
+                self.items.remove(fruit)
+                fruit.disappear()
+            self.scheduler.clear(now=now)
+            for type_number, fruit_x, fruit_y, age in snapshot.fruits:
+                self.spawn_fruit(FRUIT_TYPES[type_number], (fruit_x, fruit_y), age)
+        if snapshot.rng is not self.rng_state or self.rng.changes != self.rng_changes:
+            self.rng.setstate(snapshot.rng)
+            self.rng_state = snapshot.rng
+            self.rng_changes = self.rng.changes
+        if self.ghost_planner is not None:
+            self.ghost_planner.reset()  # Plans in progress are for a game that no longer exists
+            if not self.game_over:
+                self.request_plan()
+
+    def fruit_records(self):
+        """Return (type number, centre x, centre y, ms since spawn) for every fruit on the board"""
+        if not self.fruits:
+            return ()
+        now = self.scheduler.now
+        return tuple((FRUIT_NUMBERS[fruit.type], fruit.rect.centerx, fruit.rect.centery,
+                      now - fruit.creation_time) for fruit in self.fruits if fruit.is_active)
+
+    def save_state(self):
+        """
+        Pack the whole game state into bytes (used for replay keyframes).
+        The bytes can only be loaded into an engine set up with the same level.
+        Returns:
+            bytes: The packed snapshot().
+        """
+        snapshot = self.snapshot()
+        x, y, speed = snapshot.pacman
+        parts = [STATE_HEADER.pack(snapshot.tick, snapshot.score, snapshot.game_over, x, y, speed,
+                                   len(self.ghosts), len(self.pellets.positions), len(snapshot.fruits)),
+                 array('i', snapshot.ghosts).tobytes(),
+                 # One bit per pellet, set while the pellet is still on the board
+                 snapshot.pellets.to_bytes((len(self.pellets.positions) + 7) // 8, "little")]
+        parts.extend(FRUIT_RECORD.pack(*record) for record in snapshot.fruits)
+        version, words, gauss_next = snapshot.rng
+        parts.append(struct.pack("<Bd", version, float("nan") if gauss_next is None else gauss_next))
+        parts.append(array('I', words).tobytes())
+        return b"".join(parts)
+
+    def load_state(self, data):
+        """
+        Restore a state packed by save_state().
+        Parameters:
+            data (bytes): The packed state.
+        """
+        data = memoryview(data)
+        (tick, score, game_over, x, y, speed,
+         ghost_count, pellet_count, fruit_count) = STATE_HEADER.unpack_from(data)
+        if ghost_count != len(self.ghosts) or pellet_count != len(self.pellets.positions):
+            raise ValueError("saved state does not match this engine's level")
+        offset = STATE_HEADER.size
+
+        ghost_values = array('i')
+        ghost_values.frombytes(data[offset:offset + 16 * ghost_count])
+        offset += 16 * ghost_count
+
+        mask_size = (pellet_count + 7) // 8
+        alive = int.from_bytes(data[offset:offset + mask_size], "little")
+        offset += mask_size
+
+        fruits = []
+        for _ in range(fruit_count):
+            fruits.append(FRUIT_RECORD.unpack_from(data, offset))
+            offset += FRUIT_RECORD.size
+
+        version, gauss_next = struct.unpack_from("<Bd", data, offset)
+        offset += struct.calcsize("<Bd")
+        words = array('I')
+        words.frombytes(data[offset:offset + 4 * RNG_WORDS])
+        rng_state = (version, tuple(words), None if gauss_next != gauss_next else gauss_next)
+        self.restore(Snapshot(tick, score, bool(game_over), (x, y, speed), tuple(ghost_values),
+                              alive, tuple(fruits), rng_state))
+
+    def get_state(self):
+        """Return a small dict describing the current game state"""
+        return {
+            "tick": self.tick,
+            "score": self.score,
+            "pacman": (self.pacman.x, self.pacman.y),
+            "ghosts": self.ghost_positions(),
+            "pellets_left": len(self.pellets),
+            "game_over": self.game_over,
+        }
+
+    def ghost_positions(self):
+        """Return every ghost's (x, y), read straight from the swarm's arrays when there is one"""
+        if self.swarm is not None:
+            return list(zip(self.swarm.x.tolist(), self.swarm.y.tolist()))
+        return [(ghost.x, ghost.y) for ghost in self.ghosts]
@@ -1,7 +1,4 @@
 import pygame
-
-class Fruits:
-
 import os
 import random # Can be useful for random fruit spawns if needed
 
@@ -21,10 +18,113 @@ FRUIT_DATA = {
     
 }
 
+# Colour each fruit is drawn in when its image file is missing
+FRUIT_COLORS = {
+    'cherry':     (220, 20, 60),
+    'banana':     (255, 225, 53),
+    'strawberry': (252, 90, 141),
+    'orange':     (255, 140, 0),
+    'apple':      (120, 200, 40),
+    'melon':      (144, 238, 144),
+    'galaxian':   (0, 120, 255),
+    'bell':       (255, 215, 0),
+    'key':        (135, 206, 250),
+}
+
 # Define the base path for fruit images (adjust as necessary)
 # Assumes your images are in a subdirectory like 'assets/images/fruits'
 IMAGE_FOLDER = os.path.join('assets', 'images', 'fruits')
 
+# --- Fruit Images ---
+class FruitAtlas:
+    """
+    Every fruit image, loaded once and packed side by side onto one surface.
+
+    Each fruit type gets a subsurface view of the atlas, so spawning a fruit
+    never touches the disk. A type with no image file is drawn as a circle in
+    its colour instead; types whose image file can't be read share a single
+    fallback slot instead of getting a new surface each time.
+    """
+    FALLBACK_SIZE = 25
+
+    def __init__(self, fruit_data=FRUIT_DATA, image_folder=IMAGE_FOLDER):
+        self.fruit_data = fruit_data
+        self.image_folder = image_folder
+        self.surface = None  # The packed atlas, built by load()
+        self.images = None   # fruit type -> subsurface of the atlas
+
+    def _fallback(self):
+        """Create the placeholder shown for missing images"""
+        # Make it visible so you know there's an error
+        size = self.FALLBACK_SIZE
+        image = pygame.Surface([size, size], pygame.SRCALPHA)
+        image.fill((255, 0, 255)) # Magenta often indicates missing textures
+        pygame.draw.circle(image, (255, 255, 0), (size // 2, size // 2), 10) # Yellow circle
+        return image
+
+    def _drawn(self, fruit_type):
+        """Draw the stand-in for a fruit without an image file: a circle in the fruit's colour"""
+        size = self.FALLBACK_SIZE
+        image = pygame.Surface([size, size], pygame.SRCALPHA)
+        color = FRUIT_COLORS.get(fruit_type, (255, 0, 255))
+        pygame.draw.circle(image, color, (size // 2, size // 2), size // 2 - 2)
+        return image
+
+    def load(self):
+        """
+        Load every fruit image and pack them into the atlas.
+        Call this once after pygame.display.set_mode() so the atlas is converted
+        for fast blitting; otherwise it is loaded on first use.
+        """
+        loaded = {}
+        for fruit_type, data in self.fruit_data.items():
+            image_path = os.path.join(self.image_folder, data['image'])
+            if not os.path.exists(image_path):
+                loaded[fruit_type] = self._drawn(fruit_type)  # No images installed: draw them
+                continue
+            try:
+                loaded[fruit_type] = pygame.image.load(image_path)
+            except (pygame.error, OSError) as e:  # The file is there but can't be read
+                print(f"Error loading fruit image: {image_path}")
+                print(e)
+                loaded[fruit_type] = None
+
+        # Lay the images out in one row; the fallback, if needed, goes first
+        slots = [image for image in loaded.values() if image is not None]
+        fallback = None
+        if len(slots) < len(loaded):
+            fallback = self._fallback()
+            slots.insert(0, fallback)
+        width = sum(image.get_width() for image in slots)
+        height = max([image.get_height() for image in slots] + [1])
+        atlas = pygame.Surface((max(width, 1), height), pygame.SRCALPHA)
+
+        areas = {}
+        x = 0
+        for image in slots:
+            atlas.blit(image, (x, 0))
+            areas[id(image)] = pygame.Rect(x, 0, image.get_width(), image.get_height())
+            x += image.get_width()
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()  # Only possible once a display mode is set
+
+        self.surface = atlas
+        self.images = {
+            fruit_type: atlas.subsurface(areas[id(image if image is not None else fallback)])
+            for fruit_type, image in loaded.items()
+        }
+
+    def get(self, fruit_type):
+        """Return the image for a fruit type, loading the atlas the first time"""
+        if self.images is None:
+            self.load()
+        return self.images[fruit_type]
+
+
+# Shared by every fruit
+fruit_atlas = FruitAtlas()
+
+
 # --- Fruit Class ---
 class Fruit(pygame.sprite.Sprite):
     """
@@ -34,12 +134,15 @@ class Fruit(pygame.sprite.Sprite):
         type (str): The type of fruit (e.g., 'cherry', 'strawberry').
         points (int): Score value awarded when eaten.
         lifespan (int): How long the fruit stays on screen (in milliseconds).
-        image (pygame.Surface): The visual representation of the fruit.
+        image (pygame.Surface): The visual representation of the fruit (a view into the fruit atlas).
         rect (pygame.Rect): The rectangular area of the fruit for positioning and collision.
         is_active (bool): True if the fruit is currently visible and collectible.
         creation_time (int): The time (in milliseconds) when the fruit was created/activated.
+        pool (FruitPool): The pool this fruit goes back to once it is gone, if any.
+        scheduler (Scheduler): The clock that makes the fruit disappear, if any.
+        on_expire (function): Called with the fruit when its time runs out, if set.
     """
-    def __init__(self, fruit_type, position, groups=None):
+    def __init__(self, fruit_type, position, groups=None, pool=None, scheduler=None, age=0):
         """
         Initializes a Fruit instance.
 
@@ -47,14 +150,34 @@ class Fruit(pygame.sprite.Sprite):
             fruit_type (str): The key corresponding to the desired fruit in FRUIT_DATA.
             position (tuple): The (x, y) coordinates for the center of the fruit.
             groups (pygame.sprite.Group or list): Optional sprite group(s) to add this fruit to.
+            pool (FruitPool): Optional pool to return this fruit to when it is eaten or disappears.
+            scheduler (Scheduler): Optional simulation clock. The fruit then registers its
+                expiry once instead of checking the time in update().
+            age (int): How long (in milliseconds) the fruit has already been out.
         """
         # Initialize the parent Sprite class
-        if groups:
+        if groups is not None:  # An empty Group is falsy, so test for None
             super().__init__(groups)
         else:
             super().__init__()
 
+        self.pool = pool
+        self.on_expire = None
+        self.expiry = None
+        self.reset(fruit_type, position, scheduler, age)
 
+    def reset(self, fruit_type, position, scheduler=None, age=0):
+        """
+        (Re)activates the fruit as a new fruit of the given type and position.
+        Used by __init__ and by FruitPool to reuse a fruit instead of creating one.
+
+        Args:
+            fruit_type (str): The key corresponding to the desired fruit in FRUIT_DATA.
+            position (tuple): The (x, y) coordinates for the center of the fruit.
+            scheduler (Scheduler): Optional simulation clock to register the expiry with.
+            age (int): How long (in milliseconds) the fruit has already been out, e.g. when
+                restoring a saved game.
+        """
         if fruit_type not in FRUIT_DATA:
             raise ValueError(f"Unknown fruit type: {fruit_type}")
 
@@ -63,20 +186,8 @@ class Fruit(pygame.sprite.Sprite):
         self.points = data['points']
         self.lifespan = data['duration'] # Time to stay active (ms)
 
-        # Load image
-        image_path = os.path.join(IMAGE_FOLDER, data['image'])
-        try:
-            # Load image with transparency support
-            self.image = pygame.image.load(image_path).convert_alpha()
-        except pygame.error as e:
-            print(f"Error loading fruit image: {image_path}")
-            print(e)
-            # Create a fallback surface if image loading fails
-            # Make it visible so you know there's an error
-            self.image = pygame.Surface([25, 25]) # Adjust size as needed
-            self.image.fill((255, 0, 255)) # Magenta often indicates missing textures
-            pygame.draw.circle(self.image, (255, 255, 0), (12, 12), 10) # Yellow circle
-
+        # The image comes from the shared atlas, so no file is loaded here
+        self.image = fruit_atlas.get(fruit_type)
 
         # Set position and collision rectangle
         # self.rect will store the fruit's position and size
@@ -84,15 +195,23 @@ class Fruit(pygame.sprite.Sprite):
 
         # Activation state and timer
         self.is_active = True
-        self.creation_time = pygame.time.get_ticks() # Record spawn time using Pygame's timer
+        self.scheduler = scheduler
+        if scheduler is None:
+            self.creation_time = pygame.time.get_ticks() - age # Record spawn time using Pygame's timer
+            self.expiry = None
+        else:
+            # Ask for a callback when the time is up, so update() has nothing to check
+            self.creation_time = scheduler.now - age
+            self.expiry = scheduler.schedule(self.lifespan - age, self.expire)
 
     def update(self):
         """
         Updates the fruit's state each frame.
         Checks if the fruit's lifespan has expired.
+        Fruits with a scheduler skip this: the scheduler calls expire() when the time is up.
         """
-        if not self.is_active:
-            return # Do nothing if already eaten or disappeared
+        if not self.is_active or self.scheduler is not None:
+            return # Do nothing if already eaten or disappeared, or if the scheduler keeps time
 
         current_time = pygame.time.get_ticks()
         elapsed_time = current_time - self.creation_time
@@ -108,8 +227,10 @@ class Fruit(pygame.sprite.Sprite):
         """
         if self.is_active:
             self.is_active = False
+            self.cancel_expiry() # Eaten before its time ran out
             # print(f"{self.type.capitalize()} eaten! +{self.points} points.") # Optional: for debugging
             self.kill() # Remove the sprite from all groups it belongs to
+            self.release()
             return self.points
         return 0 # Return 0 if already inactive
 
@@ -120,17 +241,86 @@ class Fruit(pygame.sprite.Sprite):
         """
         if self.is_active:
             self.is_active = False
+            self.cancel_expiry() # In case it was removed before its time ran out
             # print(f"{self.type.capitalize()} disappeared.") # Optional: for debugging
             self.kill() # Remove the sprite from all groups
+            self.release()
+
+    def expire(self):
+        """
+        Called by the scheduler when the fruit's lifespan is over.
+        Makes the fruit disappear and tells its owner through on_expire.
+        """
+        self.expiry = None # The timer has run
+        if self.is_active:
+            self.disappear()
+            if self.on_expire is not None:
+                self.on_expire(self)
+
+    def cancel_expiry(self):
+        """Cancel the scheduled expiry, if there is one"""
+        if self.expiry is not None:
+            self.scheduler.cancel(self.expiry)
+            self.expiry = None
+
+    def release(self):
+        """Hand the fruit back to its pool (if it came from one) so it can be reused"""
+        if self.pool is not None:
+            self.pool.release(self)
 
     def draw(self, screen):
         """
         Draws the fruit onto the specified surface (screen) if active.
         Note: If using sprite groups, group.draw(screen) is often preferred.
               This method is here for completeness or if not using groups for drawing.
+        Returns the rectangle that was drawn over, or None if the fruit is inactive.
         """
         if self.is_active:
-            screen.blit(self.image, self.rect)
+            return screen.blit(self.image, self.rect)
+        return None
+
+# --- Fruit Pool ---
+class FruitPool:
+    """
+    Keeps fruits that have been eaten or disappeared so they can be reused.
+
+    acquire() hands out a recycled Fruit when one is free, so spawning a fruit
+    allocates nothing once the pool has warmed up.
+    """
+    def __init__(self, prefill=0):
+        """
+        Args:
+            prefill (int): How many fruits to create up front.
+        """
+        self.free = []
+        for _ in range(prefill):
+            fruit = Fruit(next(iter(FRUIT_DATA)), (0, 0), pool=self)
+            fruit.is_active = False
+            self.free.append(fruit)
+
+    def acquire(self, fruit_type, position, groups=None, scheduler=None, age=0):
+        """
+        Returns an active fruit, reusing a free one if there is one.
+
+        Args:
+            fruit_type (str): The key corresponding to the desired fruit in FRUIT_DATA.
+            position (tuple): The (x, y) coordinates for the center of the fruit.
+            groups (pygame.sprite.Group or list): Optional sprite group(s) to add the fruit to.
+            scheduler (Scheduler): Optional simulation clock to register the fruit's expiry with.
+            age (int): How long (in milliseconds) the fruit has already been out.
+        """
+        if not self.free:
+            return Fruit(fruit_type, position, groups, pool=self, scheduler=scheduler, age=age)
+        fruit = self.free.pop()
+        fruit.on_expire = None
+        fruit.reset(fruit_type, position, scheduler, age)
+        if groups is not None:
+            fruit.add(groups)
+        return fruit
+
+    def release(self, fruit):
+        """Takes back a fruit that is no longer active"""
+        self.free.append(fruit)
 
 # --- How to Use in your Game ---
 
@@ -139,6 +329,10 @@ class Fruit(pygame.sprite.Sprite):
 # screen = pygame.display.set_mode((800, 600)) # Your screen dimensions
 # clock = pygame.time.Clock()
 
+# # Load every fruit image once, after the display mode is set
+# fruit_atlas.load()
+# fruit_pool = FruitPool(prefill=2) # Fruits are reused instead of created for every spawn
+
 # # Create sprite groups
 # all_sprites = pygame.sprite.Group() # Optional: For managing all sprites
 # fruit_group = pygame.sprite.Group() # Specific group for fruit(s)
@@ -172,7 +366,7 @@ class Fruit(pygame.sprite.Sprite):
 #         if fruit_to_spawn:
 #             print(f"Spawning {fruit_to_spawn}!")
 #             # Add the new fruit to relevant groups
-#             new_fruit = Fruit(fruit_to_spawn, spawn_pos, (all_sprites, fruit_group))
+#             new_fruit = fruit_pool.acquire(fruit_to_spawn, spawn_pos, (all_sprites, fruit_group))
 #             return new_fruit # Return the newly created fruit instance
 #     return active_fruit # Return the existing fruit or None
 
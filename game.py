@@ -1,75 +1,253 @@
+import argparse
+import random
+import sys
 import pygame
 from settings import *
-from maze import *
-from pacman import *
-from ghosts import *
-from pellets import *
-
-# Initialize pygame
-pygame.init()
-
-clock = pygame.time.Clock()
-
-
-def handle_input(pacman):
-    """Handle user input for movement"""
+from engine import GameEngine
+from renderer import Renderer
+from fruits import fruit_atlas
+from replay import ReplayRecorder, Replay, level_checksum
+from profiler import FrameProfiler
+from collision import get_wall_index
+from navigation import get_flow_field
+from next_hop import get_next_hop_table
+from levels import load_level
+from stream import StateStreamer
+from planner import GhostPlanner
+from autopilot import Autopilot
+from simulation import SimulationThread, FrameView
+from maze import maze_walls
+
+
+def handle_input():
+    """
+    Read the arrow keys and return the direction Pac-Man should move in (or None).
+
+    A tick takes one direction, so with several arrows held the first of UP, DOWN,
+    LEFT, RIGHT wins: UP+LEFT moves up, not diagonally as the old loop did.
+    """
     keys = pygame.key.get_pressed()
-    if keys[pygame.K_UP]: pacman.move("UP")
-    if keys[pygame.K_DOWN]: pacman.move("DOWN")
-    if keys[pygame.K_LEFT]: pacman.move("LEFT")
-    if keys[pygame.K_RIGHT]: pacman.move("RIGHT")
-
-def check_ghost_collision(pacman, ghost):
-    """Check if Pac-Man collides with the ghost"""
-    distance = ((pacman.x - ghost.x) ** 2 + (pacman.y - ghost.y) ** 2) ** 0.5
-    return distance < 20  # Collision threshold
-
-def check_pellet_collision(pacman, pellets):
-    """Check if Pac-Man collides with the pellets"""
-    distance = ((pacman.x - pellets.x) ** 2 + (pacman.y - pellets.y) ** 2) ** 0.5
-    print(pellets.x, pellets.y)
-    return distance < 20  # Collision threshold
-
-# Initialize game objects
-pacman = PacMan(300, 300)
-ghost = Ghost(100, 100, RED)
-pellets = Pellet(0,0)
-
-running = True
-while running:
-    screen.fill(BLACK)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Handle user input
-    handle_input(pacman)
-
-    # Move ghost
-    ghost.move_towards(pacman)
-
-    # Draw game elements
-    draw_maze()
-    draw_pellets()
-    pacman.draw()
-    ghost.draw()
-    
-
-    # Check for collision
-    if check_ghost_collision(pacman, ghost):
-        print("Game Over! Pac-Man was caught!")
-        running = False
-
-        # Check for collision
-    if check_pellet_collision(pacman, pellets):
-        for pellet in pellets:
-            if pacman.x == pellet.x and pacman.y == pellet.y:
-                print("PacMan ate the pellet")
-
-
-    pygame.display.flip()
-    clock.tick(30) 
-
-pygame.quit()
-
+    if keys[pygame.K_UP]: return "UP"
+    if keys[pygame.K_DOWN]: return "DOWN"
+    if keys[pygame.K_LEFT]: return "LEFT"
+    if keys[pygame.K_RIGHT]: return "RIGHT"
+    return None
+
+def main(record_path=None, replay_path=None, show_profile=False, trace_path=None, level_path=None,
+         stream_port=None, planner_mode=None, maze_size=None, maze_density=1.0, use_autopilot=False,
+         threaded=False):
+    """
+    Run the game in a window.
+    Parameters:
+        record_path (str): Record the game's inputs to this replay file.
+        replay_path (str): Play back this replay file instead of reading the keyboard.
+        show_profile (bool): Show the frame profiler overlay (F3 toggles it).
+        trace_path (str): Write a Chrome/Perfetto trace of the last frames to this file on exit.
+        level_path (str): Play this level file instead of the built-in maze.
+        stream_port (int): Publish every tick to spectators on this local port (see spectator.py).
+        planner_mode (str): "process" or "thread" to plan the ghosts' moves in the background
+                            (see planner.py); None moves them on the frame thread.
+        maze_size (int): Play a generated maze this many tiles across (see mazegen.py).
+        maze_density (float): Share of a generated maze's extra walls that are kept (0-1).
+        use_autopilot (bool): Let the autopilot play instead of the keyboard (see autopilot.py).
+        threaded (bool): Tick the game on its own thread and draw the newest tick whenever a
+                         frame is ready, so a slow display never delays a tick (see simulation.py).
+    """
+    # Initialize pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Pac-Man Python Game")
+    fruit_atlas.load()  # Load every fruit image once, now that the display is set up
+    clock = pygame.time.Clock()
+
+    # The engine holds all game objects; this loop only reads input and draws
+    level_options = {}
+    if level_path:
+        level_options = load_level(level_path).engine_options()
+    elif maze_size:
+        from mazegen import generate_maze  # Needs NumPy, so only imported when asked for
+        level_options = generate_maze(maze_size, density=maze_density).engine_options()
+    replay = Replay(replay_path) if replay_path else None
+    planner = None
+    if planner_mode:
+        walls = level_options.get("walls", maze_walls)
+        # A recorded or replayed game waits for every plan, or it would not play back the same
+        wait = None if record_path or replay_path else 0.0
+        planner = GhostPlanner(walls, use_process=planner_mode == "process", wait=wait)
+    if replay:
+        engine = GameEngine(seed=replay.seed, ghost_planner=planner, **level_options)
+        if level_checksum(engine) != replay.checksum:
+            # Played on another maze, the recorded inputs would make a different game
+            replay.close()
+            if planner:
+                planner.close()
+            pygame.quit()
+            sys.exit(f"{replay_path} was recorded on a different level: replay it with the "
+                     f"--level or --maze options it was recorded with")
+    else:
+        # Seeded, so a recording can reproduce the ghosts' random choices
+        engine = GameEngine(seed=random.randrange(2 ** 31), ghost_planner=planner, **level_options)
+    recorder = ReplayRecorder(record_path, engine) if record_path else None
+    step = recorder.step if recorder else engine.step
+    streamer = StateStreamer(engine, port=stream_port) if stream_port else None
+    autopilot = Autopilot(engine) if use_autopilot and not replay else None
+    simulation = view = None
+    if threaded:
+        next_action = None
+        if replay:
+            next_action = replay.action_at
+        elif autopilot:
+            next_action = lambda tick: autopilot.act()
+        simulation = SimulationThread(engine, step, next_action, streamer.publish if streamer else None,
+                                      max_ticks=len(replay) if replay else None)
+        view = FrameView(engine)  # From here on the window only draws what the thread publishes
+    # Draws from cached maze and pellet layers, updating only what changed (through a
+    # camera that follows Pac-Man when the level is bigger than the window)
+    renderer = Renderer(screen, view or engine)
+
+    # Optional per-phase timing of every frame
+    profiler = None
+    if show_profile or trace_path:
+        profiler = FrameProfiler()
+        renderer.profiler = profiler
+        if simulation:
+            # Ticks run on their own thread, so they get counted instead of timed
+            profiler.add_counter("ticks", lambda: simulation.ticks)
+            profiler.add_counter("dropped_frames", lambda: simulation.buffer.dropped)
+        else:
+            engine.profiler = profiler
+        profiler.add_counter("collision_probes", lambda: get_wall_index(engine.walls).probes)
+        profiler.add_counter("path_searches", lambda: get_flow_field(engine.walls).recomputes)
+        def path_lookups():
+            table = get_next_hop_table(engine.walls)
+            return get_flow_field(engine.walls).lookups + (table.lookups if table else 0)
+        profiler.add_counter("path_lookups", path_lookups)
+        if planner:
+            profiler.add_counter("plan_fallbacks", lambda: planner.fallbacks)
+        if show_profile:
+            renderer.overlays.append(profiler.draw_overlay)
+
+    # Fixed-timestep loop: the game always ticks TICK_RATE times per second of real
+    # time, however fast or slow frames are drawn. Leftover time is used to draw
+    # Pac-Man and the ghosts part-way between the last two ticks.
+    tick_time = 1.0 / TICK_RATE
+    accumulator = 0.0
+    previous = engine.get_state()
+    if simulation:
+        simulation.start()
+    running = True
+    while running:
+        accumulator += clock.tick(MAX_FPS) / 1000.0
+        if profiler:
+            profiler.begin_frame()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler:
+                if profiler.draw_overlay in renderer.overlays:
+                    renderer.overlays.remove(profiler.draw_overlay)
+                else:
+                    renderer.overlays.append(profiler.draw_overlay)
+        if profiler:
+            profiler.lap("events")
+
+        action = None if replay or autopilot else handle_input()
+        if profiler:
+            profiler.lap("input")
+        events = []
+        ticks = 0
+        if simulation:
+            # Draw the newest tick the thread has published
+            simulation.action = action
+            finished = simulation.finished.is_set()  # Checked first, so the last tick still gets drawn
+            events, previous, alpha = view.show(simulation.buffer.take())
+            if events and events[0][0] == "KEYFRAME":
+                renderer.rebuild(view)
+            if view.game_over:
+                events.append(("CAUGHT", None))
+            elif finished:
+                running = False
+            accumulator = 0.0
+        while not simulation and accumulator >= tick_time and ticks < MAX_FRAME_SKIP:
+            # When a frame took too long, several ticks run here before the next
+            # frame is drawn, so the game skips frames instead of slowing down
+            previous = engine.get_state()
+            if replay:
+                if engine.tick >= len(replay):
+                    running = False
+                    break
+                action = replay.action_at(engine.tick)
+            elif autopilot:
+                action = autopilot.act()
+            state, tick_events = step(action)
+            events.extend(tick_events)
+            if streamer:
+                streamer.publish(tick_events)
+            accumulator -= tick_time
+            ticks += 1
+        if ticks == MAX_FRAME_SKIP:
+            # Too far behind to catch up: drop the backlog rather than spiral
+            accumulator = min(accumulator, tick_time)
+
+        if simulation:
+            renderer.draw(view, events, previous, alpha)
+        else:
+            renderer.draw(engine, events, previous, accumulator / tick_time)
+
+        for name, data in events:
+            if name == "CAUGHT":
+                print("Game Over! Pac-Man was caught!")
+                running = False
+
+        if profiler:
+            profiler.end_frame()
+
+    if simulation:
+        simulation.stop()  # Before closing what its ticks write to
+        stats = simulation.stats()
+        print(f"Simulation thread: {stats['ticks']} ticks, {stats['late_mean']:.1f} ms late mean, "
+              f"{stats['late_p95']:.1f} ms p95; frames: {stats['dropped']} dropped, "
+              f"{stats['duplicated']} duplicated, queue depth {stats['depth_mean']:.2f} mean, "
+              f"{stats['depth_max']} max")
+    if profiler and trace_path:
+        profiler.export_chrome_trace(trace_path)
+    if recorder:
+        recorder.close()
+    if streamer:
+        streamer.close()
+    if planner:
+        stats = planner.stats()
+        print(f"Ghost planner: {stats['plans_used']} plans used, {stats['fallbacks']} fallbacks "
+              f"({stats['fallback_rate']:.0%}), planning took {stats['think_mean']:.1f} ms mean, "
+              f"{stats['think_p95']:.1f} ms p95")
+        planner.close()
+    if autopilot:
+        stats = autopilot.stats()
+        print(f"Autopilot: {stats['decisions']} decisions, {stats['rollouts_per_sec']:,.0f} rollouts/s "
+              f"({stats['ticks_per_sec']:,.0f} ticks/s), {stats['think_mean']:.1f} ms per decision")
+    if replay:
+        replay.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pac-Man Python Game")
+    parser.add_argument("--record", metavar="FILE", help="record the game to a replay file")
+    parser.add_argument("--replay", metavar="FILE", help="play back a replay file")
+    parser.add_argument("--profile", action="store_true", help="show the frame profiler overlay")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome/Perfetto trace file on exit")
+    parser.add_argument("--level", metavar="FILE", help=f"play a level file (see levels.py), e.g. {LEVEL_FOLDER}/classic.txt")
+    parser.add_argument("--stream", metavar="PORT", type=int, nargs="?", const=STREAM_PORT,
+                        help=f"publish the game to spectators (default port {STREAM_PORT})")
+    parser.add_argument("--planner", choices=["process", "thread"],
+                        help="plan the ghosts' moves in a background process or thread")
+    parser.add_argument("--maze", metavar="SIZE", type=int, help="play a generated maze SIZE tiles across")
+    parser.add_argument("--density", type=float, default=1.0, help="share of a generated maze's extra walls kept (0-1)")
+    parser.add_argument("--autopilot", action="store_true", help="let the autopilot play")
+    parser.add_argument("--threaded", action="store_true", help="tick the game on its own thread")
+    args = parser.parse_args()
+    main(record_path=args.record, replay_path=args.replay, show_profile=args.profile,
+         trace_path=args.trace, level_path=args.level, stream_port=args.stream,
+         planner_mode=args.planner, maze_size=args.maze, maze_density=args.density,
+         use_autopilot=args.autopilot, threaded=args.threaded)
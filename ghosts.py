@@ -1,21 +1,85 @@
 import pygame
 from settings import *
 from maze import *
+from navigation import get_flow_field
+from next_hop import get_next_hop_table
 import random
 
 class Ghost:
-    def __init__(self, x, y, color):
+    def __init__(self, x, y, color, walls=None, rng=None):
         self.x = x
         self.y = y
         self.color = color
         self.speed = 4
-        self.direction = random.choice(["UP", "DOWN", "LEFT", "RIGHT"])
+        # The walls this ghost collides with (the default maze unless a level passes its own)
+        self.walls = maze_walls if walls is None else walls
+        # Random number source, so a seeded game always plays out the same way
+        self.rng = random if rng is None else rng
+        self.direction = self.rng.choice(["UP", "DOWN", "LEFT", "RIGHT"])
 
     def move_towards(self, pacman):
-        """Chase Pac-Man and avoid maze walls"""
+        """Chase Pac-Man along the shortest path through the maze"""
+        self.steer_towards(pacman.x, pacman.y)
+
+    def steer_towards(self, x, y):
+        """
+        Take one step along the shortest path to pixel (x, y): Pac-Man himself, or a
+        spot ahead of or beside him that a ghost wants to cut him off at.
+        """
+        # The maze's next-hop table has the first step from every cell to every
+        # other cell, so any target costs one lookup. Mazes too big for a table
+        # use the flow field, which every ghost shares and which is only searched
+        # again when the target moves into a new cell of the navigation grid.
+        table = get_next_hop_table(self.walls)
+        if table is not None:
+            direction, nav_grid = table.direction_at(self.x, self.y, x, y), table.nav_grid
+        else:
+            flow_field = get_flow_field(self.walls)
+            flow_field.retarget(x, y)
+            direction, nav_grid = flow_field.direction_at(self.x, self.y), flow_field.nav_grid
+        if direction is not None and self.follow_path(direction, nav_grid):
+            return
+        # Already in the target's cell (or off the grid): close in on it directly
+        self.chase_point(x, y)
+
+    def follow_path(self, direction, nav_grid):
+        """
+        Take one step along the path the navigation grid points to.
+        Returns:
+            bool: True if the ghost moved.
+        """
+        wall_index = nav_grid.wall_index
+        dx, dy = DIRECTION_STEPS[direction]
+        new_x, new_y = self.x + dx * self.speed, self.y + dy * self.speed
+        # Ghosts take whole steps; the step counts only if nothing is in the way
+        if wall_index.is_clear(self.x, self.y, dx * self.speed, dy * self.speed):
+            self.x, self.y = new_x, new_y
+            self.direction = direction
+            return True
+
+        # The ghost is too far off the middle of the corridor to fit through,
+        # so slide sideways towards the middle of its cell first
+        center_x, center_y = nav_grid.cell_center(nav_grid.cell_at(self.x, self.y))
+        new_x, new_y = self.x, self.y
+        if dx:
+            new_y += max(-self.speed, min(self.speed, center_y - self.y))
+        else:
+            new_x += max(-self.speed, min(self.speed, center_x - self.x))
+        if (new_x, new_y) != (self.x, self.y) and wall_index.is_clear(self.x, self.y, new_x - self.x, new_y - self.y):
+            self.x, self.y = new_x, new_y
+            return True
+        return False
+
+    def chase_greedy(self, pacman):
+        """Take whichever step gets closest to Pac-Man in a straight line, avoiding maze walls"""
+        self.chase_point(pacman.x, pacman.y)
+
+    def chase_point(self, target_x, target_y):
+        """Take whichever step gets closest to pixel (target_x, target_y) in a straight line, avoiding maze walls"""
         directions = ["UP", "DOWN", "LEFT", "RIGHT"]
         best_direction = None
         min_distance = float('inf')
+        wall_index = get_wall_index(self.walls)
 
         for direction in directions:
             new_x, new_y = self.x, self.y
@@ -28,10 +92,9 @@ class Ghost:
             elif direction == "RIGHT":
                 new_x += self.speed
             
-            # Check for collisions with maze walls
-            new_rect = pygame.Rect(new_x - 15, new_y - 15, 30, 30)
-            if not any(new_rect.colliderect(wall) for wall in maze_walls):
-                distance = ((new_x - pacman.x) ** 2 + (new_y - pacman.y) ** 2) ** 0.5
+            # Check for collisions with maze walls (all the way there, not just at the end)
+            if wall_index.is_clear(self.x, self.y, new_x - self.x, new_y - self.y):
+                distance = ((new_x - target_x) ** 2 + (new_y - target_y) ** 2) ** 0.5
                 if distance < min_distance:
                     min_distance = distance
                     best_direction = direction
@@ -53,7 +116,8 @@ class Ghost:
     def follow_wall(self):
         """Follow the wall to avoid getting stuck"""
         directions = ["UP", "DOWN", "LEFT", "RIGHT"]
-        random.shuffle(directions)  # Randomize direction order to avoid getting stuck
+        self.rng.shuffle(directions)  # Randomize direction order to avoid getting stuck
+        wall_index = get_wall_index(self.walls)
 
         for direction in directions:
             new_x, new_y = self.x, self.y
@@ -66,11 +130,11 @@ class Ghost:
             elif direction == "RIGHT":
                 new_x += self.speed
             
-            # Check for collisions with maze walls
-            new_rect = pygame.Rect(new_x - 15, new_y - 15, 30, 30)
-            if not any(new_rect.colliderect(wall) for wall in maze_walls):
+            # Check for collisions with maze walls (all the way there, not just at the end)
+            if wall_index.is_clear(self.x, self.y, new_x - self.x, new_y - self.y):
                 self.x, self.y = new_x, new_y
                 break
 
-    def draw(self):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), 15)
+    def draw(self, surface, position=None):
+        """Draw the ghost (at position, if given, e.g. between two ticks) and return the rectangle that was drawn over"""
+        return pygame.draw.circle(surface, self.color, position or (self.x, self.y), 15)
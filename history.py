@@ -0,0 +1,55 @@
+from array import array
+from settings import *
+
+
+class PositionHistory:
+    """
+    Fixed-size ring buffer of (x, y) positions.
+
+    Positions are kept in two int arrays (8 bytes per entry) instead of a list
+    of tuples, and once the buffer is full the oldest entry is overwritten, so
+    memory stays the same no matter how long the game runs. It behaves like a
+    list of (x, y) tuples for append(), len(), indexing and iteration.
+    """
+    def __init__(self, capacity=HISTORY_LENGTH):
+        """
+        Parameters:
+            capacity (int): How many positions to keep.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.xs = array('i', bytes(4 * capacity))
+        self.ys = array('i', bytes(4 * capacity))
+        self.start = 0  # Slot of the oldest entry
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, position):
+        """Add a position, dropping the oldest one if the buffer is full"""
+        slot = (self.start + self.count) % self.capacity
+        self.xs[slot], self.ys[slot] = position
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def __getitem__(self, index):
+        """Return the position at index (0 is the oldest, -1 the newest)"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("history index out of range")
+        slot = (self.start + index) % self.capacity
+        return self.xs[slot], self.ys[slot]
+
+    def __iter__(self):
+        for index in range(self.count):
+            slot = (self.start + index) % self.capacity
+            yield self.xs[slot], self.ys[slot]
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
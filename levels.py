@@ -0,0 +1,349 @@
+"""
+Levels stored as text files, with a compiled binary cache.
+
+A level is a grid of characters; each character is one TILE_SIZE x TILE_SIZE tile:
+
+    #   wall
+    .   pellet
+    P   Pac-Man's start         p   Pac-Man's start on a pellet
+    G   a ghost's start         g   a ghost's start on a pellet
+    F   a fruit spot            f   a fruit spot on a pellet
+    (space) empty floor
+
+Pellets, starts and fruit spots are placed at the top-left corner of their tile,
+so a '.' in column 10, row 20 is a pellet at pixel (100, 200). Ghosts take their
+colors from GHOST_COLORS in the order they appear. Lines starting with ';' are
+comments.
+
+Reading a text level means merging wall tiles into rectangles and working out
+where a hitbox fits, which takes a while for big levels. load_level() therefore
+keeps a compiled copy in a __pycache__ folder next to the text file, tagged with
+a hash of the text, and only reads the text again when it has changed.
+
+    python levels.py levels/        # compile every level in a folder
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+import pygame
+from settings import *
+from collision import WallList, get_wall_index
+from navigation import provide_walkable
+from pellets import Pellet
+
+GHOST_COLORS = [RED, BLUE, ORANGE, GRAY]
+LEVEL_SUFFIX = ".txt"
+CACHE_SUFFIX = ".lvc"
+
+# Compiled level layout, every number a little-endian 32-bit int after the header:
+#   header     magic, format version, source hash, tile size, counts of walls, pellets,
+#              ghosts, fruit spots and navigation cells, Pac-Man's start
+#   walls      x, y, width, height per wall
+#   pellets    x, y per pellet
+#   ghosts     x, y, red, green, blue per ghost
+#   fruits     x, y per fruit spot
+#   walkable   one byte per navigation cell (see navigation.NavGrid)
+MAGIC = b"PMLV"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sH16sHIIIIIii")
+
+
+class Level:
+    """
+    Everything needed to start a game on a level.
+
+    Usage:
+        level = load_level("levels/classic.txt")
+        engine = GameEngine(seed=1, **level.engine_options())
+    """
+    def __init__(self, name, walls, pellet_positions, pacman_start, ghost_starts,
+                 fruit_positions=(), walkable=None):
+        """
+        Parameters:
+            name (str): Name of the level (the file name without its suffix).
+            walls (WallList): pygame.Rect walls.
+            pellet_positions (list): (x, y) of every pellet.
+            pacman_start (tuple): Pac-Man's (x, y) start position.
+            ghost_starts (list): (x, y, color) for every ghost.
+            fruit_positions (list): (x, y) spots where fruit can appear.
+            walkable (bytes): Precomputed navigation grid, or None.
+        """
+        self.name = name
+        self.walls = walls
+        self.pellet_positions = pellet_positions
+        self.pacman_start = pacman_start
+        self.ghost_starts = ghost_starts
+        self.fruit_positions = fruit_positions
+        if walkable is not None:
+            # Ghosts build their navigation grid from this instead of probing every cell
+            provide_walkable(walls, walkable)
+
+    def make_pellets(self):
+        """Return a new Pellet for every pellet position"""
+        return [Pellet(x, y) for x, y in self.pellet_positions]
+
+    def engine_options(self):
+        """Return the keyword arguments that start a GameEngine on this level"""
+        return dict(walls=self.walls, pellet_positions=self.pellet_positions,
+                    pacman_start=self.pacman_start, ghost_starts=self.ghost_starts)
+
+
+# --- Text format ---
+
+def parse_level(text, name="level", tile_size=TILE_SIZE):
+    """
+    Read a level from its text.
+    Wall tiles are merged into as few rectangles as possible: runs of '#' along
+    each row, stacked into one taller rectangle where the rows below repeat them.
+    Parameters:
+        text (str): The level's text.
+        name (str): Name of the level.
+        tile_size (int): Pixels per character.
+    Returns:
+        Level: The level, without a precomputed navigation grid.
+    """
+    walls = []
+    pellet_positions = []
+    pacman_starts = []
+    ghost_starts = []
+    fruit_positions = []
+    growing = {}  # (first column, last column) -> wall Rect still open at the row above
+    row = 0
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if line.startswith(";"):
+            continue
+        line = line.rstrip()
+        y = row * tile_size
+        runs = {}
+        run_start = None
+        for column, char in enumerate(line + " "):
+            x = column * tile_size
+            if char == "#":
+                if run_start is None:
+                    run_start = column
+                continue
+            if run_start is not None:
+                run = (run_start, column)
+                wall = growing.get(run)
+                if wall is None:
+                    wall = pygame.Rect(run_start * tile_size, y, (column - run_start) * tile_size, tile_size)
+                    walls.append(wall)
+                else:
+                    wall.height += tile_size
+                runs[run] = wall
+                run_start = None
+            if char in ".pgf":
+                pellet_positions.append((x, y))
+            if char in "Pp":
+                pacman_starts.append((x, y))
+            elif char in "Gg":
+                ghost_starts.append((x, y, GHOST_COLORS[len(ghost_starts) % len(GHOST_COLORS)]))
+            elif char in "Ff":
+                fruit_positions.append((x, y))
+            elif char not in " .":
+                raise ValueError(f"{name}, line {line_number}: unknown tile {char!r} in column {column + 1}")
+        growing = runs
+        row += 1
+
+    if len(pacman_starts) != 1:
+        raise ValueError(f"{name}: a level needs exactly one Pac-Man start, found {len(pacman_starts)}")
+    return Level(name, WallList(walls), pellet_positions, pacman_starts[0], ghost_starts, fruit_positions)
+
+
+def format_level(walls, pellet_positions, pacman_start, ghost_starts, fruit_positions=(), tile_size=TILE_SIZE):
+    """
+    Write a level as text (the opposite of parse_level).
+    Walls must line up with the tile grid, and positions are rounded down to their tile.
+    Returns:
+        str: The level's text.
+    """
+    right = max([wall.right for wall in walls] + [x + tile_size for x, y in pellet_positions] + [WIDTH])
+    bottom = max([wall.bottom for wall in walls] + [y + tile_size for x, y in pellet_positions] + [HEIGHT])
+    grid = [[" "] * (right // tile_size) for _ in range(bottom // tile_size)]
+    for wall in walls:
+        for row in range(wall.top // tile_size, wall.bottom // tile_size):
+            for column in range(wall.left // tile_size, wall.right // tile_size):
+                grid[row][column] = "#"
+
+    def mark(position, char):
+        row, column = position[1] // tile_size, position[0] // tile_size
+        # Lower case marks something standing on a pellet
+        grid[row][column] = char.lower() if grid[row][column] == "." else char
+
+    for x, y in pellet_positions:
+        grid[y // tile_size][x // tile_size] = "."
+    for position in fruit_positions:
+        mark(position, "F")
+    for x, y, color in ghost_starts:
+        mark((x, y), "G")
+    mark(pacman_start, "P")
+    return "\n".join("".join(line).rstrip() for line in grid) + "\n"
+
+
+# --- Compiled cache ---
+
+def source_hash(source, tile_size=TILE_SIZE):
+    """Hash of a level's text and of the settings its compiled data depends on"""
+    settings = f"{tile_size},{HITBOX_SIZE},{WIDTH},{HEIGHT}".encode()
+    return hashlib.blake2b(source + b"\0" + settings, digest_size=16).digest()
+
+
+def cache_path(path):
+    """Return where the compiled copy of a level file is kept"""
+    folder, file_name = os.path.split(path)
+    return os.path.join(folder, "__pycache__", os.path.splitext(file_name)[0] + CACHE_SUFFIX)
+
+
+def walkable_grid(walls, tile_size=TILE_SIZE):
+    """
+    Work out which navigation cells a hitbox fits in, the way NavGrid does.
+    Returns:
+        bytes: One byte per cell, row by row; 1 is walkable.
+    """
+    wall_index = get_wall_index(walls)
+    columns = -(-max([WIDTH] + [wall.right for wall in walls]) // tile_size)
+    rows = -(-max([HEIGHT] + [wall.bottom for wall in walls]) // tile_size)
+    half = tile_size // 2
+    return bytes(wall_index.is_free(column * tile_size + half, row * tile_size + half)
+                 for row in range(rows) for column in range(columns))
+
+
+def _int_array(values):
+    numbers = array('i', values)
+    if sys.byteorder == "big":
+        numbers.byteswap()  # The file is always little-endian
+    return numbers
+
+
+def compile_level(path, tile_size=TILE_SIZE):
+    """
+    Compile a text level and write its cache file.
+    Parameters:
+        path (str): The level's text file.
+        tile_size (int): Pixels per character.
+    Returns:
+        Level: The compiled level.
+    """
+    with open(path, "rb") as file:
+        source = file.read()
+    name = os.path.splitext(os.path.basename(path))[0]
+    level = parse_level(source.decode(), name, tile_size)
+    walkable = walkable_grid(level.walls, tile_size)
+    level = Level(name, level.walls, level.pellet_positions, level.pacman_start, level.ghost_starts,
+                  level.fruit_positions, walkable)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, source_hash(source, tile_size), tile_size,
+                         len(level.walls), len(level.pellet_positions), len(level.ghost_starts),
+                         len(level.fruit_positions), len(walkable), *level.pacman_start)
+    sections = [
+        _int_array(number for wall in level.walls for number in wall),
+        _int_array(number for position in level.pellet_positions for number in position),
+        _int_array(number for x, y, color in level.ghost_starts for number in (x, y, *color[:3])),
+        _int_array(number for position in level.fruit_positions for number in position),
+    ]
+    target = cache_path(path)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write to a temporary name first so a half-written cache is never read
+        with open(target + ".tmp", "wb") as file:
+            file.write(header)
+            for section in sections:
+                file.write(section.tobytes())
+            file.write(walkable)
+        os.replace(target + ".tmp", target)
+    except OSError:
+        pass  # A read-only folder just means compiling again next time
+    return level
+
+
+def read_compiled(path, expected_hash):
+    """
+    Read a compiled level through a memory map.
+    Returns:
+        Level: The level, or None if the cache is missing, damaged or out of date.
+    """
+    try:
+        file = open(path, "rb")
+    except OSError:
+        return None
+    with file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None  # Empty file
+        with data:
+            if len(data) < HEADER.size:
+                return None
+            (magic, version, digest, tile_size, wall_count, pellet_count, ghost_count,
+             fruit_count, walkable_count, pacman_x, pacman_y) = HEADER.unpack_from(data)
+            if magic != MAGIC or version != FORMAT_VERSION or digest != expected_hash:
+                return None
+            numbers = 4 * wall_count + 2 * pellet_count + 5 * ghost_count + 2 * fruit_count
+            if len(data) != HEADER.size + 4 * numbers + walkable_count:
+                return None
+            values = array('i', data[HEADER.size:HEADER.size + 4 * numbers])
+            walkable = data[HEADER.size + 4 * numbers:]
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    def take(count, width):
+        nonlocal offset
+        rows = [tuple(values[start:start + width])
+                for start in range(offset, offset + count * width, width)]
+        offset += count * width
+        return rows
+
+    offset = 0
+    walls = WallList(pygame.Rect(wall) for wall in take(wall_count, 4))
+    pellet_positions = take(pellet_count, 2)
+    ghost_starts = [(x, y, (red, green, blue)) for x, y, red, green, blue in take(ghost_count, 5)]
+    fruit_positions = take(fruit_count, 2)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Level(name, walls, pellet_positions, (pacman_x, pacman_y), ghost_starts,
+                 fruit_positions, walkable)
+
+
+def load_level(path, tile_size=TILE_SIZE):
+    """
+    Load a text level, from its compiled cache when the text hasn't changed.
+    Parameters:
+        path (str): The level's text file.
+        tile_size (int): Pixels per character.
+    Returns:
+        Level: The loaded level.
+    """
+    with open(path, "rb") as file:
+        expected_hash = source_hash(file.read(), tile_size)
+    level = read_compiled(cache_path(path), expected_hash)
+    if level is None:
+        level = compile_level(path, tile_size)
+    return level
+
+
+def load_levels(folder=LEVEL_FOLDER):
+    """Load every level in a folder, sorted by file name"""
+    return [load_level(os.path.join(folder, file_name))
+            for file_name in sorted(os.listdir(folder)) if file_name.endswith(LEVEL_SUFFIX)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile Pac-Man level files")
+    parser.add_argument("paths", nargs="*", default=[LEVEL_FOLDER], help="level files or folders")
+    args = parser.parse_args()
+    for path in args.paths:
+        files = ([os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(LEVEL_SUFFIX)]
+                 if os.path.isdir(path) else [path])
+        for file_path in files:
+            start = time.perf_counter()
+            level = compile_level(file_path)
+            print(f"{file_path}: {len(level.walls)} walls, {len(level.pellet_positions)} pellets, "
+                  f"{len(level.ghost_starts)} ghosts ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,11 @@
 import pygame
 from settings import *
-
-# Screen settings
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Pac-Man Python Game")
+from collision import WallList, get_wall_index
 
 # Maze List with gaps
 # pygame.Rect(x, y, width, height): This function creates a rectangle with the specified position (x, y) and dimensions (width, height).
-maze_walls = [
+# WallList lets the shared collision index notice when walls are added or removed.
+maze_walls = WallList([
     pygame.Rect(50, 50, 200, 10),
     pygame.Rect(50, 50, 10, 200),
     pygame.Rect(50, 350, 10, 200),
@@ -20,8 +18,11 @@ maze_walls = [
     pygame.Rect(440, 150, 10, 200),
     pygame.Rect(540, 50, 10, 200),
     pygame.Rect(540, 350, 10, 200)
-]
+])
 
-def draw_maze():
-    for wall in maze_walls:
-        pygame.draw.rect(screen, WHITE, wall)
\ No newline at end of file
+def draw_maze(surface, walls=None):
+    """Draw the maze walls onto the given surface (the default maze if no walls are passed)"""
+    if walls is None:
+        walls = maze_walls
+    for wall in walls:
+        pygame.draw.rect(surface, WHITE, wall)
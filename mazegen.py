@@ -0,0 +1,194 @@
+"""
+Random mazes of any size, for testing how the game scales.
+
+generate_maze() carves a maze on a grid of rooms CELL_TILES tiles apart, with
+one-tile walls between them like the classic maze: the rooms are first joined
+by a random spanning tree (a maze with exactly one way between any two rooms),
+then every other wall between two rooms is kept with probability `density`.
+Density 1 gives the twistiest maze, 0 an open field with just the outer wall.
+Every room gets a pellet in its middle (or a `pellet_density` share of them),
+Pac-Man starts in the middle room and the ghosts in the corners.
+
+The same seed and settings always give the same maze.
+
+    python mazegen.py 200                        # print stats for a 200x200-tile maze
+    python mazegen.py 1000 --density 0.5 --output levels/huge.txt
+    python game.py --maze 100                    # play one
+"""
+import argparse
+import random
+import time
+import numpy as np
+from settings import *
+from levels import Level, parse_level
+
+CELL_TILES = 5  # Tiles from one wall line to the next: a 4-tile (40-pixel) corridor and a 1-tile wall
+MIN_TILES = 2 * CELL_TILES + 1  # Smallest maze: 2 x 2 rooms
+
+
+def maze_tiles(columns, rows, density=1.0, seed=0, pellet_density=1.0, ghosts=4):
+    """
+    Generate a maze as a grid of level characters (see levels.py).
+    The maze is as many whole rooms as fit in columns x rows tiles.
+    Parameters:
+        columns (int): Width in tiles (at least MIN_TILES).
+        rows (int): Height in tiles (at least MIN_TILES).
+        density (float): Share of the walls beyond the spanning tree that are kept (0-1).
+        seed (int): Random seed.
+        pellet_density (float): Share of the rooms that get a pellet (0-1).
+        ghosts (int): Number of ghosts, placed in the corners first (fewer if there are
+                      fewer rooms besides Pac-Man's).
+    Returns:
+        numpy.ndarray: uint8 characters, shape (rows, columns) rounded down to whole rooms.
+    """
+    if columns < MIN_TILES or rows < MIN_TILES:
+        raise ValueError(f"a maze needs at least {MIN_TILES} x {MIN_TILES} tiles")
+    rng = random.Random(seed)
+    room_columns, room_rows = (columns - 1) // CELL_TILES, (rows - 1) // CELL_TILES
+    # open_right[r, c]: no wall between room (c, r) and (c + 1, r); open_down likewise below it
+    open_right = np.zeros((room_rows, room_columns), dtype=bool)
+    open_down = np.zeros((room_rows, room_columns), dtype=bool)
+
+    # Spanning tree by depth-first search (long winding corridors, the hardest case
+    # for pathfinding), with an explicit stack so any size works
+    visited = np.zeros((room_rows, room_columns), dtype=bool)
+    visited[0, 0] = True
+    stack = [(0, 0)]
+    while stack:
+        column, row = stack[-1]
+        choices = [(dx, dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= column + dx < room_columns and 0 <= row + dy < room_rows
+                   and not visited[row + dy, column + dx]]
+        if not choices:
+            stack.pop()
+            continue
+        dx, dy = rng.choice(choices)
+        next_column, next_row = column + dx, row + dy
+        if dx:
+            open_right[row, min(column, next_column)] = True
+        else:
+            open_down[min(row, next_row), column] = True
+        visited[next_row, next_column] = True
+        stack.append((next_column, next_row))
+
+    # Knock out the walls the tree kept with probability 1 - density, making loops
+    numbers = np.random.default_rng(rng.getrandbits(64))
+    open_right |= numbers.random(open_right.shape) >= density
+    open_down |= numbers.random(open_down.shape) >= density
+    open_right[:, -1] = False  # The outer wall stays
+    open_down[-1, :] = False
+
+    # Paint the walls: every room owns the wall on its right and the one below it,
+    # corner posts included, and the outer wall closes the top and left. A post
+    # whose walls were all knocked out is never painted.
+    height, width = room_rows * CELL_TILES + 1, room_columns * CELL_TILES + 1
+    wall = np.zeros((height, width), dtype=bool)
+    wall[0, :] = wall[:, 0] = True
+    wall_columns = np.arange(room_columns) * CELL_TILES + CELL_TILES
+    wall_rows = np.arange(room_rows) * CELL_TILES + CELL_TILES
+    for offset in range(CELL_TILES + 1):
+        # A right wall covers its column from the room's top post to its bottom post
+        rows_of = wall_rows - CELL_TILES + offset
+        wall[rows_of[:, None], wall_columns[None, :]] |= ~open_right
+        columns_of = wall_columns - CELL_TILES + offset
+        wall[wall_rows[:, None], columns_of[None, :]] |= ~open_down
+    tiles = np.full((height, width), ord(" "), dtype=np.uint8)
+    tiles[wall] = ord("#")
+    # Markers go in the tile whose top-left corner is the middle of the room's corridor
+    middle = 1 + (CELL_TILES - 1) // 2
+    room_x = np.arange(room_columns) * CELL_TILES + middle
+    room_y = np.arange(room_rows) * CELL_TILES + middle
+    pellets = numbers.random((room_rows, room_columns)) < pellet_density
+    tiles[room_y[:, None], room_x[None, :]] = np.where(pellets, ord("."), ord(" "))
+
+    def place(room_column, room_row, marker):
+        y, x = room_y[room_row], room_x[room_column]
+        tiles[y, x] = ord(marker.lower() if tiles[y, x] == ord(".") else marker)
+
+    pacman_room = (room_columns // 2, room_rows // 2)
+    place(*pacman_room, "P")
+    # In a maze only two rooms across, Pac-Man's room is a corner too; no ghost starts on him
+    corners = [(0, 0), (room_columns - 1, room_rows - 1), (room_columns - 1, 0), (0, room_rows - 1)]
+    corners = [room for room in corners if room != pacman_room]
+    free_rooms = [(column, row) for row in range(room_rows) for column in range(room_columns)
+                  if (column, row) not in corners and (column, row) != pacman_room]
+    rng.shuffle(free_rooms)
+    for room in (corners + free_rooms)[:ghosts]:
+        place(*room, "G")
+    return tiles
+
+
+def walkable_tiles(tiles, tile_size=TILE_SIZE):
+    """
+    Work out the navigation grid of a generated maze straight from its tiles.
+    Gives the same answer as levels.walkable_grid for walls that line up with the
+    tiles, without probing every cell.
+    Returns:
+        bytes: One byte per NavGrid cell, row by row; 1 is walkable.
+    """
+    wall = tiles == ord("#")
+    rows = -(-max(HEIGHT, wall.shape[0] * tile_size) // tile_size)
+    columns = -(-max(WIDTH, wall.shape[1] * tile_size) // tile_size)
+    # A hitbox centred on a cell covers the tiles from `before` to `after` around it
+    half = tile_size // 2
+    before = (half - HITBOX_SIZE // 2) // tile_size
+    after = (half - HITBOX_SIZE // 2 + HITBOX_SIZE - 1) // tile_size
+    padded = np.zeros((rows - before + after, columns - before + after), dtype=np.int32)
+    padded[-before:-before + wall.shape[0], -before:-before + wall.shape[1]] = wall
+    # Count the walls under every hitbox with a summed-area table
+    summed = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.int32)
+    summed[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    size = after - before + 1
+    walls = (summed[size:, size:] - summed[:-size, size:] - summed[size:, :-size] + summed[:-size, :-size])
+    return (walls[:rows, :columns] == 0).astype(np.uint8).tobytes()
+
+
+def generate_maze(columns, rows=None, density=1.0, seed=0, pellet_density=1.0, ghosts=4):
+    """
+    Generate a maze level (see maze_tiles for the parameters; rows defaults to columns).
+    Returns:
+        levels.Level: The maze, with its navigation grid already worked out.
+
+    Usage:
+        level = generate_maze(200, density=0.8, seed=1)
+        engine = GameEngine(seed=1, **level.engine_options())
+    """
+    rows = columns if rows is None else rows
+    tiles = maze_tiles(columns, rows, density, seed, pellet_density, ghosts)
+    level = parse_level(maze_text(tiles), f"maze_{columns}x{rows}_{seed}")
+    return Level(level.name, level.walls, level.pellet_positions, level.pacman_start,
+                 level.ghost_starts, level.fruit_positions, walkable_tiles(tiles))
+
+
+def maze_text(tiles):
+    """Return the level text of a grid of tiles"""
+    return "\n".join(bytes(row).decode().rstrip() for row in tiles) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate random mazes for stress tests")
+    parser.add_argument("size", type=int, help="width (and height) in tiles")
+    parser.add_argument("--rows", type=int, help="height in tiles, if not square")
+    parser.add_argument("--density", type=float, default=1.0, help="share of extra walls kept (0-1)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--pellets", type=float, default=1.0, help="share of rooms with a pellet (0-1)")
+    parser.add_argument("--ghosts", type=int, default=4, help="number of ghosts")
+    parser.add_argument("--output", metavar="FILE", help="write the maze as a level file")
+    args = parser.parse_args()
+    rows = args.rows or args.size
+    start = time.perf_counter()
+    tiles = maze_tiles(args.size, rows, args.density, args.seed, args.pellets, args.ghosts)
+    text = maze_text(tiles)
+    level = parse_level(text)
+    print(f"{tiles.shape[1]}x{tiles.shape[0]} tiles: {len(level.walls)} walls, "
+          f"{len(level.pellet_positions)} pellets, {len(level.ghost_starts)} ghosts "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(f"; Generated: python mazegen.py {args.size} --rows {rows} --density {args.density} "
+                       f"--seed {args.seed} --pellets {args.pellets} --ghosts {args.ghosts}\n")
+            file.write(text)
+
+
+if __name__ == "__main__":
+    main()
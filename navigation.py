@@ -0,0 +1,171 @@
+from settings import *
+from collision import get_wall_index, wall_version
+
+
+class NavGrid:
+    """
+    Graph of the walkable cells of a maze.
+
+    The field is cut into TILE_SIZE x TILE_SIZE cells. A cell is walkable when a
+    hitbox centred on it touches no wall, and two walkable cells are connected
+    when they are next to each other. Cells are numbered row by row.
+    """
+    def __init__(self, walls, tile_size=TILE_SIZE, width=WIDTH, height=HEIGHT, walkable=None):
+        """
+        Parameters:
+            walls (list): pygame.Rect walls of the maze.
+            tile_size (int): Width and height of one cell in pixels.
+            width (int): Minimum width of the field in pixels (grows to fit the walls).
+            height (int): Minimum height of the field in pixels (grows to fit the walls).
+            walkable (bytes): Precomputed walkability, one byte per cell (e.g. from a compiled
+                              level), used instead of probing every cell when its size fits.
+        """
+        self.walls = walls
+        self.wall_index = get_wall_index(walls)
+        self.tile_size = tile_size
+        width = max([width] + [wall.right for wall in walls])
+        height = max([height] + [wall.bottom for wall in walls])
+        self.columns = -(-width // tile_size)
+        self.rows = -(-height // tile_size)
+
+        half = tile_size // 2
+        if walkable is not None and len(walkable) == self.rows * self.columns:
+            self.walkable = [bool(cell) for cell in walkable]
+        else:
+            self.walkable = [
+                self.wall_index.is_free(column * tile_size + half, row * tile_size + half)
+                for row in range(self.rows) for column in range(self.columns)
+            ]
+
+        # neighbours[cell] lists (direction, next_cell) for every walkable cell next to it
+        self.neighbours = [[] for _ in self.walkable]
+        for cell, walkable in enumerate(self.walkable):
+            row, column = divmod(cell, self.columns)
+            for direction in DIRECTIONS:
+                dx, dy = DIRECTION_STEPS[direction]
+                next_column, next_row = column + dx, row + dy
+                if 0 <= next_column < self.columns and 0 <= next_row < self.rows:
+                    next_cell = next_row * self.columns + next_column
+                    if self.walkable[next_cell]:
+                        self.neighbours[cell].append((direction, next_cell))
+        # Just the cell numbers, for the breadth-first search's inner loop
+        self.links = [tuple(next_cell for _, next_cell in cell_neighbours)
+                      for cell_neighbours in self.neighbours]
+
+    def cell_at(self, x, y):
+        """Return the number of the cell containing pixel (x, y), or None if it is off the grid"""
+        column, row = x // self.tile_size, y // self.tile_size
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return row * self.columns + column
+        return None
+
+    def cell_center(self, cell):
+        """Return the pixel (x, y) at the middle of a cell"""
+        row, column = divmod(cell, self.columns)
+        half = self.tile_size // 2
+        return column * self.tile_size + half, row * self.tile_size + half
+
+
+class FlowField:
+    """
+    Breadth-first distances from every cell to one target cell.
+
+    The field is only recomputed when the target moves into another cell, so
+    any number of ghosts chasing Pac-Man share one search per tick and each
+    reads its next step in constant time.
+    """
+    def __init__(self, nav_grid):
+        self.nav_grid = nav_grid
+        self.target_cell = None
+        self.distance = [-1] * len(nav_grid.walkable)  # -1 means the target can't be reached
+        self.recomputes = 0  # How many searches have run, for profiling
+        self.lookups = 0  # How many next steps have been read, for profiling
+
+    def retarget(self, x, y):
+        """Point the field at pixel (x, y), searching again only if that is a new cell"""
+        cell = self.nav_grid.cell_at(x, y)
+        if cell == self.target_cell:
+            return
+        self.target_cell = cell
+        distance = [-1] * len(self.distance)
+        if cell is not None:
+            # Start from the target cell even if it is not walkable itself: Pac-Man
+            # can stand near a wall where the middle of his cell is blocked.
+            links = self.nav_grid.links
+            distance[cell] = 0
+            frontier = [cell]
+            next_distance = 1
+            # Expand one whole ring of cells at a time
+            while frontier:
+                next_frontier = []
+                for current in frontier:
+                    for next_cell in links[current]:
+                        if distance[next_cell] < 0:
+                            distance[next_cell] = next_distance
+                            next_frontier.append(next_cell)
+                frontier = next_frontier
+                next_distance += 1
+        self.distance = distance
+        self.recomputes += 1
+
+    def direction_at(self, x, y):
+        """
+        Return the direction that leads from pixel (x, y) towards the target.
+        Returns:
+            str: "UP", "DOWN", "LEFT" or "RIGHT", or None when (x, y) is in the target's
+                 cell, off the grid, or can't reach the target.
+        """
+        self.lookups += 1
+        cell = self.nav_grid.cell_at(x, y)
+        if cell is None or cell == self.target_cell:
+            return None
+        best_direction = None
+        best_distance = self.distance[cell] if self.distance[cell] >= 0 else float('inf')
+        for direction, next_cell in self.nav_grid.neighbours[cell]:
+            next_distance = self.distance[next_cell]
+            if 0 <= next_distance < best_distance:
+                best_distance = next_distance
+                best_direction = direction
+        return best_direction
+
+
+# One flow field per wall list, shared by every ghost
+_flow_fields = {}
+MAX_CACHED_FIELDS = 32
+# Walkability grids handed over by compiled levels: id(walls) -> (walls, version, walkable)
+_known_walkable = {}
+
+def provide_walkable(walls, walkable):
+    """
+    Remember a precomputed walkability grid for a wall list.
+    The next flow field built for these walls uses it instead of probing every
+    cell, unless the walls have been edited since.
+    Parameters:
+        walls (list): pygame.Rect walls of the maze.
+        walkable (bytes): One byte per NavGrid cell, row by row; non-zero is walkable.
+    """
+    if len(_known_walkable) >= MAX_CACHED_FIELDS:
+        _known_walkable.clear()
+    _known_walkable[id(walls)] = (walls, wall_version(walls), walkable)
+
+
+def get_flow_field(walls):
+    """
+    Return the shared FlowField for a wall list, rebuilding it if the walls changed.
+    Parameters:
+        walls (list): pygame.Rect walls of the maze.
+    Returns:
+        FlowField: The field for these walls.
+    """
+    flow_field = _flow_fields.get(id(walls))
+    if (flow_field is None or flow_field.nav_grid.walls is not walls
+            or flow_field.nav_grid.wall_index is not get_wall_index(walls)):
+        if len(_flow_fields) >= MAX_CACHED_FIELDS:
+            _flow_fields.clear()  # Forget mazes that are no longer in use
+        walkable = None
+        known = _known_walkable.get(id(walls))
+        if known and known[0] is walls and known[1] == wall_version(walls):
+            walkable = known[2]
+        flow_field = FlowField(NavGrid(walls, walkable=walkable))
+        _flow_fields[id(walls)] = flow_field
+    return flow_field
@@ -0,0 +1,292 @@
+"""
+Precomputed shortest-path directions between every pair of navigation cells.
+
+For a maze that doesn't change, the way from any cell to any other cell never
+changes either. A NextHopTable works out, once, the first step of a shortest
+path from every cell to every other cell, so steering a ghost towards any
+point (Pac-Man, a spot ahead of him, a corner) is a single table lookup instead
+of a search.
+
+Each entry is one of the four DIRECTIONS, packed 2 bits to an entry. Entries
+only exist for cells a path can start or end in (walkable cells and the cells
+next to them), and the table gives exactly the step a FlowField pointed at the
+target would give, ties going to the first direction in DIRECTIONS order.
+
+Building the table takes a breadth-first search from every cell (run side by
+side as bit sets, see NextHopTable._build), so it is written to a __pycache__
+folder next to this file, named after a hash of the navigation grid. The
+GameEngine loads (or builds) it when it starts on a level, not in the middle of
+a tick. Editing the walls changes the grid, and the next get_next_hop_table()
+call builds (or finds) the table for the new grid.
+
+    python next_hop.py              # build the table for the default maze
+    python next_hop.py levels/      # ... and for every level in a folder
+"""
+import argparse
+import hashlib
+import os
+import struct
+import time
+from settings import *
+from navigation import get_flow_field
+
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+CACHE_SUFFIX = ".nht"
+
+# Table file layout: header (magic, format version, grid hash, number of cells in the
+# table), then one row of packed directions per target cell, (cells + 3) // 4 bytes each
+MAGIC = b"PMNH"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sH16sI")
+
+
+def grid_hash(nav_grid):
+    """Hash of everything a table depends on: the grid's size and which cells are walkable"""
+    shape = f"{nav_grid.rows},{nav_grid.columns},{nav_grid.tile_size}".encode()
+    return hashlib.blake2b(shape + b"\0" + bytes(nav_grid.walkable), digest_size=16).digest()
+
+
+def cache_path(digest):
+    """Return where the table for a grid with this hash is kept"""
+    return os.path.join(CACHE_FOLDER, "nexthop-" + digest.hex() + CACHE_SUFFIX)
+
+
+class NextHopTable:
+    """
+    First step of a shortest path between every pair of cells of a NavGrid.
+
+    Usage:
+        table = get_next_hop_table(walls)
+        direction = table.direction_at(ghost.x, ghost.y, pacman.x, pacman.y)
+    """
+    def __init__(self, nav_grid, hops=None):
+        """
+        Parameters:
+            nav_grid (NavGrid): The grid the table is for.
+            hops (bytes): Packed table read from a cache file (built from scratch if None).
+        """
+        self.nav_grid = nav_grid
+        self.lookups = 0  # How many directions have been read, for profiling
+
+        # Number the connected areas of the grid; area[cell] is a bit mask of the areas
+        # a path from or to the cell can use (none for cells no path starts or ends in)
+        links = nav_grid.links
+        self.area = [0] * len(links)
+        areas = 0
+        for cell, walkable in enumerate(nav_grid.walkable):
+            if walkable and not self.area[cell]:
+                bit = 1 << areas
+                areas += 1
+                self.area[cell] = bit
+                frontier = [cell]
+                while frontier:
+                    next_frontier = []
+                    for current in frontier:
+                        for next_cell in links[current]:
+                            if not self.area[next_cell]:
+                                self.area[next_cell] = bit
+                                next_frontier.append(next_cell)
+                    frontier = next_frontier
+        for cell, walkable in enumerate(nav_grid.walkable):
+            if not walkable:
+                for next_cell in links[cell]:
+                    self.area[cell] |= self.area[next_cell]
+
+        # The table only has rows and columns for those cells: slot[cell] is the cell's
+        # position in a row, -1 for the rest
+        self.cells = [cell for cell, area in enumerate(self.area) if area]
+        self.slot = [-1] * len(links)
+        for index, cell in enumerate(self.cells):
+            self.slot[cell] = index
+        self.stride = (len(self.cells) + 3) // 4
+        self.hops = self._build() if hops is None else hops
+
+    def _build(self):
+        """
+        Search from every cell at once and pack the first step from every other cell.
+
+        Each cell holds a bit set of targets, one bit per target. A search that
+        reaches a cell on ring n passes its bit to the cell's neighbours on ring
+        n + 1, so one pass over the grid advances every search by one ring. A
+        cell's step towards a target is the first direction (in DIRECTIONS order)
+        in which the target's bit turns up among its neighbours: the neighbour
+        nearest the target, as FlowField.direction_at picks it.
+        """
+        import numpy as np  # Only needed to build a table, not to load one
+        nav_grid, slot, cells = self.nav_grid, self.slot, self.cells
+        count = len(cells)
+        walkable = np.array([nav_grid.walkable[cell] for cell in cells], dtype=bool)
+        # step_to[d, i]: the cell a ghost in cell i steps into going in direction d, and
+        # reached_from[d, i]: the cell in direction d a search can pass cell i on from,
+        # which may be a target a ghost can't stand in. `count` is an empty extra row.
+        step_to = np.full((len(DIRECTIONS), count), count, dtype=np.intp)
+        reached_from = np.full((len(DIRECTIONS), count), count, dtype=np.intp)
+        for index, cell in enumerate(cells):
+            row, column = divmod(cell, nav_grid.columns)
+            for number, direction in enumerate(DIRECTIONS):
+                dx, dy = DIRECTION_STEPS[direction]
+                if 0 <= column + dx < nav_grid.columns and 0 <= row + dy < nav_grid.rows:
+                    next_slot = slot[cell + dy * nav_grid.columns + dx]
+                    if next_slot >= 0:
+                        reached_from[number, index] = next_slot
+                        if walkable[next_slot]:
+                            step_to[number, index] = next_slot
+
+        words = (count + 63) // 64
+        own = np.zeros((count + 1, words), dtype=np.uint64)
+        own[np.arange(count), np.arange(count) >> 6] = np.uint64(1) << (np.arange(count) & 63).astype(np.uint64)
+        frontier = own.copy()  # Searches that reached the cell on the last ring
+        visited = own[:count].copy()  # Searches that have reached the cell
+        seen = own[:count].copy()  # Searches whose direction the cell already has
+        low = np.zeros((count, words), dtype=np.uint64)  # The two bits of each direction
+        high = np.zeros((count, words), dtype=np.uint64)
+        while frontier.any():
+            for number in range(len(DIRECTIONS)):
+                found = frontier[step_to[number]] & ~seen
+                seen |= found
+                if number & 1:
+                    low |= found
+                if number & 2:
+                    high |= found
+            reached = np.bitwise_or.reduce(frontier[reached_from], axis=0) & ~visited
+            reached[~walkable] = 0  # Searches only pass through cells a ghost can stand in
+            visited |= reached
+            frontier[:count] = reached
+
+        # Bits to a (target, source) table of direction numbers, then 4 to a byte
+        def unpack(bits):
+            return np.unpackbits(bits.astype("<u8").view(np.uint8), axis=1, bitorder="little")[:, :count]
+        table = np.zeros((count, self.stride * 4), dtype=np.uint8)
+        table[:, :count] = (unpack(low) | unpack(high) << 1).T
+        table = table.reshape(count, self.stride, 4)
+        packed = table[:, :, 0] | table[:, :, 1] << 2 | table[:, :, 2] << 4 | table[:, :, 3] << 6
+        return packed.tobytes()
+
+    def direction(self, cell, target_cell):
+        """
+        Return the first step from one cell towards another.
+        Returns:
+            str: "UP", "DOWN", "LEFT" or "RIGHT", or None when the cells are the same or
+                 no step brings the ghost closer (the answers FlowField.direction_at gives).
+        """
+        if cell == target_cell or not self.area[cell] & self.area[target_cell]:
+            return None
+        nav_grid = self.nav_grid
+        if not nav_grid.walkable[target_cell] and cell in nav_grid.links[target_cell]:
+            return None  # Next to a target a ghost can't stand in: nothing is closer
+        source, target = self.slot[cell], self.slot[target_cell]
+        packed = self.hops[target * self.stride + (source >> 2)]
+        return DIRECTIONS[packed >> ((source & 3) << 1) & 3]
+
+    def direction_at(self, x, y, target_x, target_y):
+        """
+        Return the direction that leads from pixel (x, y) towards pixel (target_x, target_y).
+        Returns:
+            str: A direction, or None when both are in the same cell, either is off the
+                 grid, or the target can't be reached.
+        """
+        self.lookups += 1
+        nav_grid = self.nav_grid
+        cell, target_cell = nav_grid.cell_at(x, y), nav_grid.cell_at(target_x, target_y)
+        if cell is None or target_cell is None:
+            return None
+        return self.direction(cell, target_cell)
+
+    def save(self, path):
+        """Write the table to a cache file (quietly does nothing if the folder is read-only)"""
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, grid_hash(self.nav_grid), len(self.cells))
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first so a half-written table is never read
+            with open(temporary, "wb") as file:
+                file.write(header)
+                file.write(self.hops)
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, nav_grid, path):
+        """
+        Read a table from a cache file.
+        Returns:
+            NextHopTable: The table, or None if the file is missing, damaged or for another grid.
+        """
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, digest, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION or digest != grid_hash(nav_grid):
+            return None
+        table = cls(nav_grid, hops=b"")
+        if count != len(table.cells) or len(data) != HEADER.size + count * table.stride:
+            return None
+        table.hops = data[HEADER.size:]
+        return table
+
+
+# One table per wall list, shared by every ghost
+_tables = {}
+MAX_CACHED_TABLES = 8
+
+
+def get_next_hop_table(walls):
+    """
+    Return the shared NextHopTable for a wall list, loading or building it if the walls changed.
+    Parameters:
+        walls (list): pygame.Rect walls of the maze.
+    Returns:
+        NextHopTable: The table, or None when the maze has more than MAX_NEXT_HOP_CELLS
+                      cells to steer between, or it isn't cached and NumPy is not
+                      installed to build it (use a FlowField then).
+    """
+    nav_grid = get_flow_field(walls).nav_grid  # Rebuilt by get_flow_field when the walls change
+    cached = _tables.get(id(walls))
+    if cached is not None and cached[0] is nav_grid:
+        return cached[1]
+    if len(_tables) >= MAX_CACHED_TABLES:
+        _tables.clear()  # Forget mazes that are no longer in use
+    table = None
+    # Only cells a path can start or end in get a row and a column
+    cells = sum(1 for cell, walkable in enumerate(nav_grid.walkable) if walkable or nav_grid.links[cell])
+    if cells <= MAX_NEXT_HOP_CELLS:
+        path = cache_path(grid_hash(nav_grid))
+        table = NextHopTable.load(nav_grid, path)
+        if table is None:
+            try:
+                table = NextHopTable(nav_grid)
+                table.save(path)
+            except ImportError:
+                pass  # No NumPy to build it with: the flow field will do
+    _tables[id(walls)] = (nav_grid, table)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build next-hop tables for the maze and level files")
+    parser.add_argument("paths", nargs="*", help="level files or folders (the default maze is always built)")
+    args = parser.parse_args()
+    from maze import maze_walls
+    from levels import LEVEL_SUFFIX, load_level
+    mazes = [("default maze", maze_walls)]
+    for path in args.paths:
+        files = ([os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(LEVEL_SUFFIX)]
+                 if os.path.isdir(path) else [path])
+        mazes += [(file, load_level(file).walls) for file in files]
+    for name, walls in mazes:
+        start = time.perf_counter()
+        table = get_next_hop_table(walls)
+        if table is None:
+            print(f"{name}: too big for a table, ghosts will use a flow field")
+        else:
+            print(f"{name}: {len(table.cells)} cells, {len(table.hops) / 1024:.0f} KiB "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
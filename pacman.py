@@ -1,40 +1,42 @@
 import pygame
 from settings import *
 from maze import *
+from history import PositionHistory
 
 class PacMan:
-    def __init__(self, x, y):
+    def __init__(self, x, y, walls=None):
         self.x = x
         self.y = y
         self.speed = 8
-        self.history = []  # Store movement history
+        self.history = PositionHistory()  # Store the most recent moves (a fixed-size ring buffer)
+        # The walls Pac-Man collides with (the default maze unless a level passes its own)
+        self.walls = maze_walls if walls is None else walls
 
     def move(self, direction):
         """Move Pac-Man within screen boundaries and avoid maze walls"""
-        new_x, new_y = self.x, self.y
+        dx, dy = 0, 0
         if direction == "UP":
-            new_y -= self.speed
+            dy = -self.speed
         elif direction == "DOWN":
-            new_y += self.speed
+            dy = self.speed
         elif direction == "LEFT":
-            new_x -= self.speed
+            dx = -self.speed
         elif direction == "RIGHT":
-            new_x += self.speed
+            dx = self.speed
         
         # Check for collisions with maze walls
-        # This creates a rectangular boundary for the moving entity (e.g., Pac-Man or a ghost) at its new potential position (new_x, new_y).
-        # The pygame.Rect() function defines a rectangle using four parameters:
-        # new_x - 15: The top-left X coordinate (subtracting 15 centers it correctly).
-        # new_y - 15: The top-left Y coordinate (subtracting 15 centers it correctly).
-        # 30, 30: The width and height of the entity (assuming it's a circle with a 15-pixel radius).
-        # This rectangle acts as a hitbox for collision detection.
-        new_rect = pygame.Rect(new_x - 15, new_y - 15, 30, 30)
-        if not any(new_rect.colliderect(wall) for wall in maze_walls):
+        # The wall index slides a 30x30 hitbox (a circle with a 15-pixel radius) along
+        # the whole move and stops it where it touches a wall, so Pac-Man walks right
+        # up to walls and can't skip through one however far he moves in a tick. Only
+        # the walls in the grid cells along the way are tested, not every wall in the maze.
+        new_x, new_y, blocked = get_wall_index(self.walls).sweep(self.x, self.y, dx, dy)
+        if (new_x, new_y) != (self.x, self.y):
             self.x, self.y = new_x, new_y
             self.history.append((self.x, self.y))
 
     def get_position(self):
         return self.x, self.y
 
-    def draw(self):
-        pygame.draw.circle(screen, YELLOW, self.get_position(), 15)
+    def draw(self, surface, position=None):
+        """Draw Pac-Man (at position, if given, e.g. between two ticks) and return the rectangle that was drawn over"""
+        return pygame.draw.circle(surface, YELLOW, position or self.get_position(), 15)
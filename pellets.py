@@ -13,7 +13,7 @@ class Pellet:
         """
         self.x = x
         self.y = y
-        self.radius = 5 
+        self.radius = PELLET_RADIUS
         self.color = PELLET_COLOR
 
     def draw(self, surface): # <--- Add 'surface' as an argument
@@ -55,10 +55,104 @@ pellets = [
     
 ]
 
-def draw_pellets():
+# The set bits of every byte value, for walking a bitset a byte at a time
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+class PelletField:
+    """
+    Every pellet of a level as one bit of a Python int.
+
+    Where the pellets are is a table that never changes; which of them are still
+    on the board is the int `alive`, bit i standing for positions[i]. Eating a
+    pellet clears a bit, counting what's left is a popcount, and putting every
+    pellet back or saving the board for later is copying one int. Ints never
+    change, so a saved board stays as it was however the game goes on.
+
+    Usage:
+        field = PelletField([(100, 100), (200, 100)])
+        for index in field.near(pacman.x, pacman.y, PELLET_DISTANCE):
+            field.eat(index)
+        saved = field.alive
+        field.alive = saved  # Back as it was
+    """
+    def __init__(self, positions, cell_size=HASH_CELL_SIZE):
+        """
+        Parameters:
+            positions (list): (x, y) of every pellet of the level.
+            cell_size (int): Width and height of the cells near() looks in, in pixels.
+        """
+        self.positions = tuple((x, y) for x, y in positions)
+        self.full = (1 << len(self.positions)) - 1
+        self.alive = self.full  # Bit i is set while positions[i] is on the board
+        self.cell_size = cell_size
+        # The pellets in each cell of a grid, so near() only looks at a few of them
+        cells = {}
+        for index, (x, y) in enumerate(self.positions):
+            cells.setdefault((x // cell_size, y // cell_size), []).append(index)
+        self.cells = {cell: tuple(indices) for cell, indices in cells.items()}
+
+    def __len__(self):
+        """Number of pellets still on the board"""
+        return self.alive.bit_count()
+
+    def __contains__(self, index):
+        """Check if pellet number index is still on the board"""
+        return self.alive >> index & 1 == 1
+
+    def eat(self, index):
+        """Take pellet number index off the board"""
+        self.alive &= ~(1 << index)
+
+    def reset(self):
+        """Put every pellet back"""
+        self.alive = self.full
+
+    def near(self, x, y, radius, bits=None):
+        """
+        Return the pellets on the board whose position may be within radius of (x, y).
+        This is a broadphase like SpatialHash.query: callers do their own exact test.
+        Parameters:
+            bits (int): Pellets to look among (the ones on the board by default).
+        Returns:
+            list: Pellet numbers, in the order SpatialHash.query would find them.
+        """
+        cell_size = self.cell_size
+        cells = self.cells
+        alive = self.alive if bits is None else bits
+        found = []
+        for column in range(int(x - radius) // cell_size, int(x + radius) // cell_size + 1):
+            for row in range(int(y - radius) // cell_size, int(y + radius) // cell_size + 1):
+                for index in cells.get((column, row), ()):
+                    if alive >> index & 1:
+                        found.append(index)
+        return found
+
+    def indices(self, bits=None):
+        """Return the numbers of the set bits of bits (the pellets on the board by default), lowest first"""
+        if bits is None:
+            bits = self.alive
+        found = []
+        for offset, value in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+            if value:
+                found.extend(offset * 8 + bit for bit in BYTE_BITS[value])
+        return found
+
+    def draw(self, surface, indices=None):
+        """Draw the pellets on the board (or just the given pellet numbers) onto a surface"""
+        positions = self.positions
+        for index in self.indices() if indices is None else indices:
+            pygame.draw.circle(surface, PELLET_COLOR, positions[index], PELLET_RADIUS)
+
+
+def draw_pellets(surface, field=None):
     """
-    Draw all pellets on the screen.
-    Loops through the list of pellet objects and calls their draw method.
+    Draw all pellets on the given surface.
+    Draws straight from the field's bitset, so eaten pellets cost nothing.
+    Parameters:
+        surface (pygame.Surface): The surface to draw the pellets on.
+        field (PelletField): The pellets to draw (defaults to the module's pellet list).
     """
-    for pellet in pellets:
-        pellet.draw(screen)
\ No newline at end of file
+    if field is None:
+        field = PelletField((pellet.x, pellet.y) for pellet in pellets)
+    field.draw(surface)
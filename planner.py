@@ -0,0 +1,208 @@
+"""
+Ghost decisions worked out in the background, off the frame thread.
+
+A GhostPlanner runs a planning function in a worker process (or thread). At the
+end of every tick the engine sends it where Pac-Man and the ghosts are, and at
+the start of the next tick it takes whatever plan has come back, so the ghosts
+steer by where Pac-Man was a tick ago. A plan that isn't back in time is
+dropped and every ghost takes its cheap greedy step (Ghost.chase_greedy)
+instead, so a slow planner costs the game smarter ghosts, never frame time.
+
+Planning functions are made in the worker by a factory, given the walls:
+
+    def make_plan(walls):
+        def plan(pacman, ghosts):       # (x, y) and a list of (x, y)
+            return ["UP", None, ...]    # a direction (or None) per ghost
+        return plan
+
+    planner = GhostPlanner(engine.walls, make_plan)
+    engine = GameEngine(ghost_planner=planner)
+
+With a process worker the factory has to be a module-level function, so it can
+be sent to the new process. When plans arrive depends on timing, so a game with
+a planner does not replay exactly unless it waits for every plan (wait=None).
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+import pygame
+from settings import *
+from collision import WallList
+
+
+def chase_plan(walls):
+    """
+    Default planning function: every ghost takes the first step of its shortest path to Pac-Man.
+    Parameters:
+        walls (list): pygame.Rect walls of the maze.
+    Returns:
+        function: plan(pacman, ghosts) returning a direction (or None) per ghost.
+    """
+    from next_hop import get_next_hop_table
+    from navigation import get_flow_field
+
+    def plan(pacman, ghosts):
+        table = get_next_hop_table(walls)
+        if table is not None:
+            return [table.direction_at(x, y, *pacman) for x, y in ghosts]
+        flow_field = get_flow_field(walls)
+        flow_field.retarget(*pacman)
+        return [flow_field.direction_at(x, y) for x, y in ghosts]
+    return plan
+
+
+def _work(connection, wall_rects, make_plan, game_end=None):
+    """Worker loop: answer every request with a plan and the seconds it took, until told to stop"""
+    if game_end is not None:
+        game_end.close()  # A forked worker's copy; without this it never notices the game is gone
+    # The worker gets its own wall list, so its caches are never shared with the game's
+    plan = make_plan(WallList(pygame.Rect(rect) for rect in wall_rects))
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break  # The game has exited
+        if request is None:
+            break
+        key, pacman, ghosts = request
+        start = time.perf_counter()
+        directions = plan(pacman, ghosts)
+        connection.send((key, directions, time.perf_counter() - start))
+    connection.close()
+
+
+class GhostPlanner:
+    """
+    Runs a ghost planning function in a worker, one plan at a time.
+
+    Usage:
+        planner = GhostPlanner(walls)
+        planner.submit(tick, (pacman.x, pacman.y), ghost_positions)  # end of a tick
+        plan = planner.take(tick)  # start of that tick; None means fall back
+        planner.close()
+    """
+    def __init__(self, walls, make_plan=chase_plan, use_process=True, wait=0.0):
+        """
+        Parameters:
+            walls (list): pygame.Rect walls of the maze.
+            make_plan (function): Factory that turns the walls into a planning function.
+            use_process (bool): Plan in a separate process (True) or in a thread (False). A
+                                thread shares the interpreter lock with the game, so only a
+                                process keeps pure-Python planning from slowing frames.
+            wait (float): Seconds take() may wait for a plan that is still being made, or
+                          None to always wait (every plan is used, and games replay exactly).
+        """
+        self.connection, worker_end = multiprocessing.Pipe()
+        rects = [tuple(wall) for wall in walls]
+        if use_process:
+            self.worker = multiprocessing.Process(target=_work, daemon=True,
+                                                  args=(worker_end, rects, make_plan, self.connection))
+        else:
+            self.worker = threading.Thread(target=_work, args=(worker_end, rects, make_plan), daemon=True)
+        self.worker.start()
+        if use_process:
+            worker_end.close()  # The worker has its own copy
+        self.wait = wait
+        self.generation = 0  # Bumped by reset(), so plans for an earlier game are ignored
+        self.pending = None  # (key, time sent) of the plan being made
+        self.ready = None  # (key, plan) of the last plan that came back
+        self.latencies = deque(maxlen=PROFILER_HISTORY)  # Seconds from request until the plan was picked up
+        self.think_times = deque(maxlen=PROFILER_HISTORY)  # Seconds the worker spent on each plan
+        self.requests = 0  # Plans asked for
+        self.plans_used = 0  # Ticks that ran on a plan
+        self.fallbacks = 0  # Ticks that ran on the greedy step instead
+        self.late_plans = 0  # Plans that came back after their tick had run
+        self.skipped = 0  # Ticks with no request, as the worker was still busy
+
+    def submit(self, tick, pacman, ghosts):
+        """
+        Ask for the plan for a tick, unless the worker is still busy with an earlier one.
+        Parameters:
+            tick (int): The tick the plan is for.
+            pacman (tuple): Pac-Man's (x, y).
+            ghosts (list): Every ghost's (x, y).
+        """
+        self._collect(0)
+        if self.pending is not None:
+            self.skipped += 1
+            return
+        key = (self.generation, tick)
+        self.connection.send((key, pacman, ghosts))
+        self.pending = (key, time.perf_counter())
+        self.requests += 1
+
+    def take(self, tick):
+        """
+        Return the plan for a tick, waiting up to `wait` seconds if it is still being made.
+        Returns:
+            list: A direction (or None) per ghost, or None if there is no plan in time.
+        """
+        key = (self.generation, tick)
+        if self.pending is not None and self.pending[0] == key:
+            self._collect(self.wait)
+        ready, self.ready = self.ready, None
+        if ready is not None and ready[0] == key:
+            self.plans_used += 1
+            return ready[1]
+        if ready is not None and ready[0][0] == self.generation:
+            self.late_plans += 1
+        self.fallbacks += 1
+        return None
+
+    def _collect(self, timeout):
+        """Pick up the plan being made if it comes back within timeout seconds (None waits)"""
+        if self.pending is not None and self.connection.poll(timeout):
+            key, plan, think_time = self.connection.recv()
+            self.latencies.append(time.perf_counter() - self.pending[1])
+            self.think_times.append(think_time)
+            self.pending = None
+            self.ready = (key, plan)
+
+    def reset(self):
+        """Forget plans made for the game so far (call when the game restarts or jumps)"""
+        self.generation += 1
+        if self.wait is None:
+            # A plan for the old game still being made would make the next submit()
+            # skip its request, and whether it is back by then depends on timing
+            self._collect(None)
+        self.ready = None
+
+    def stats(self):
+        """
+        Summarise how the planner kept up.
+        Returns:
+            dict: requests, plans_used, fallbacks, fallback_rate (0-1), late_plans, skipped, and
+                  over the last PROFILER_HISTORY plans, in milliseconds: mean and p95 latency (request
+                  until the game picked the plan up, so never much under a tick) and think time
+                  (spent in the planning function).
+        """
+        def mean(times):
+            return sum(times) * 1000 / len(times) if times else 0.0
+        def percentile(times, fraction):
+            times = sorted(times)
+            return times[min(len(times) - 1, int(fraction * len(times)))] * 1000 if times else 0.0
+        ticks = self.plans_used + self.fallbacks
+        return {
+            "requests": self.requests,
+            "plans_used": self.plans_used,
+            "fallbacks": self.fallbacks,
+            "fallback_rate": self.fallbacks / ticks if ticks else 0.0,
+            "late_plans": self.late_plans,
+            "skipped": self.skipped,
+            "latency_mean": mean(self.latencies),
+            "latency_p95": percentile(self.latencies, 0.95),
+            "think_mean": mean(self.think_times),
+            "think_p95": percentile(self.think_times, 0.95),
+        }
+
+    def close(self):
+        """Stop the worker"""
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass  # The worker is already gone
+        self.worker.join(timeout=1)
+        if isinstance(self.worker, multiprocessing.Process) and self.worker.is_alive():
+            self.worker.terminate()  # Stuck in a long plan
+        self.connection.close()
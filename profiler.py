@@ -0,0 +1,162 @@
+import json
+import time
+from collections import deque
+import pygame
+from settings import *
+
+
+class FrameProfiler:
+    """
+    Records how long each phase of every frame takes.
+
+    Call begin_frame() at the top of the loop, lap("name") after each phase
+    (the time since the previous lap is charged to that phase) and end_frame()
+    at the bottom. Laps with the same name in one frame add up, so a phase that
+    runs once per tick is summed when several ticks run in one frame.
+    Counters, such as collision probes, are sampled once per frame.
+
+    Usage:
+        profiler = FrameProfiler()
+        profiler.add_counter("collision_probes", lambda: wall_index.probes)
+        profiler.begin_frame()
+        handle_events()
+        profiler.lap("events")
+        ...
+        profiler.end_frame()
+        profiler.export_chrome_trace("trace.json")
+    """
+    def __init__(self, history=PROFILER_HISTORY, trace_frames=PROFILER_TRACE_FRAMES):
+        """
+        Parameters:
+            history (int): Frames kept for the overlay statistics.
+            trace_frames (int): Frames kept for the Chrome trace export.
+        """
+        self.frames = deque(maxlen=history)  # (start, frame time, {phase: seconds}) per frame
+        self.trace = deque(maxlen=trace_frames)  # (start, end, [(phase, start, end)], {counter: delta})
+        self.counters = {}  # name -> (function returning a running total, last value)
+        self.clock = time.perf_counter
+        self.origin = self.clock()
+        self.frame_start = None
+        self.last_lap = None
+        self.phases = {}
+        self.spans = []
+        self.font = None
+
+    def add_counter(self, name, read):
+        """
+        Sample a running total once per frame and record how much it grew.
+        Parameters:
+            name (str): Counter name, e.g. "collision_probes".
+            read (function): Returns the current running total.
+        """
+        self.counters[name] = (read, read())
+
+    def begin_frame(self):
+        self.frame_start = self.last_lap = self.clock()
+        self.phases = {}
+        self.spans = []
+
+    def lap(self, phase):
+        """Charge the time since the last lap (or the start of the frame) to a phase"""
+        if self.frame_start is None:
+            return  # Not inside a frame
+        now = self.clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last_lap
+        self.spans.append((phase, self.last_lap, now))
+        self.last_lap = now
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        now = self.clock()
+        counts = {}
+        for name, (read, last) in self.counters.items():
+            value = read()
+            # A total that went down belongs to a rebuilt object; count from zero
+            counts[name] = value - last if value >= last else value
+            self.counters[name] = (read, value)
+        self.frames.append((self.frame_start, now - self.frame_start, self.phases))
+        self.trace.append((self.frame_start, now, self.spans, counts))
+        self.frame_start = self.last_lap = None
+
+    def stats(self):
+        """
+        Summarise the recorded frames.
+        Frame times cover begin_frame() to end_frame(), so time spent waiting for
+        the frame limiter outside them is not counted; fps is measured on the wall clock.
+        Returns:
+            dict: fps, p50/p95/p99 frame times in milliseconds, average milliseconds per
+                  phase, and the slowest phase. Empty if no frame has been recorded.
+        """
+        if not self.frames:
+            return {}
+        times = sorted(frame_time for _, frame_time, _ in self.frames)
+        def percentile(fraction):
+            return times[min(len(times) - 1, int(fraction * len(times)))] * 1000
+        totals = {}
+        for _, _, phases in self.frames:
+            for phase, seconds in phases.items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        averages = {phase: seconds * 1000 / len(self.frames) for phase, seconds in totals.items()}
+        span = self.frames[-1][0] - self.frames[0][0]
+        return {
+            "fps": (len(self.frames) - 1) / span if span > 0 else 0.0,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "phases": averages,
+            "slowest_phase": max(averages, key=averages.get) if averages else None,
+        }
+
+    def draw_overlay(self, surface):
+        """
+        Draw FPS, frame-time percentiles, the slowest phase and the latest counters.
+        Returns:
+            pygame.Rect: The area drawn over.
+        """
+        stats = self.stats()
+        if not stats:
+            return None
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        lines = [
+            f"FPS {stats['fps']:.0f}",
+            f"frame ms p50 {stats['p50']:.1f}  p95 {stats['p95']:.1f}  p99 {stats['p99']:.1f}",
+        ]
+        if stats["slowest_phase"]:
+            slowest = stats["slowest_phase"]
+            lines.append(f"slowest: {slowest} {stats['phases'][slowest]:.2f} ms")
+        if self.trace:
+            lines.extend(f"{name} {count}" for name, count in self.trace[-1][3].items())
+
+        rendered = [self.font.render(line, True, WHITE) for line in lines]
+        width = max(text.get_width() for text in rendered) + 8
+        height = sum(text.get_height() for text in rendered) + 8
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        y = 4
+        for text in rendered:
+            panel.blit(text, (4, y))
+            y += text.get_height()
+        return surface.blit(panel, (4, 4))
+
+    def export_chrome_trace(self, path):
+        """
+        Write the recorded frames as a Chrome/Perfetto trace_event JSON file.
+        Open it at ui.perfetto.dev or chrome://tracing.
+        """
+        def microseconds(seconds):
+            return round((seconds - self.origin) * 1e6, 1)
+
+        events = []
+        for frame_start, frame_end, spans, counts in self.trace:
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": microseconds(frame_start), "dur": round((frame_end - frame_start) * 1e6, 1)})
+            for phase, start, end in spans:
+                events.append({"name": phase, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": microseconds(start), "dur": round((end - start) * 1e6, 1)})
+            for name, count in counts.items():
+                events.append({"name": name, "ph": "C", "pid": 1, "ts": microseconds(frame_start),
+                               "args": {name: count}})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,190 @@
+import pygame
+from settings import *
+from maze import draw_maze
+from pellets import draw_pellets
+from collision import wall_version
+from camera import Camera, ChunkCache, level_size
+
+
+def interpolate(old_position, new_position, alpha):
+    """Return the point alpha of the way from old_position to new_position"""
+    (old_x, old_y), (new_x, new_y) = old_position, new_position
+    return round(old_x + (new_x - old_x) * alpha), round(old_y + (new_y - old_y) * alpha)
+
+
+class Renderer:
+    """
+    Draws the game using cached layers and dirty rectangles.
+
+    The maze is drawn once onto a background surface, and the pellets onto a
+    copy of it that only changes when a pellet is eaten. Each frame only the
+    areas under the moving sprites (Pac-Man, ghosts, fruits) are restored from
+    that layer and redrawn, and only those areas are sent to the display.
+
+    Pac-Man and the ghosts can be drawn part-way between the previous and the
+    current tick, so movement looks smooth when frames are drawn more often
+    than the game ticks.
+
+    A level bigger than the window is drawn through a Camera that follows
+    Pac-Man instead: the maze is drawn in chunks kept in a ChunkCache, and each
+    frame only the chunks and sprites in view are drawn (see camera.py).
+
+    Usage:
+        renderer = Renderer(screen, engine)
+        state, events = engine.step(action)
+        renderer.draw(engine, events)
+    """
+    def __init__(self, screen, engine):
+        """
+        Parameters:
+            screen (pygame.Surface): The display surface.
+            engine (GameEngine): The game to draw.
+        """
+        self.screen = screen
+        self.profiler = None  # Set to a FrameProfiler to time drawing and display updates
+        self.overlays = []  # Functions drawn on top of everything: overlay(surface) -> Rect
+        self.rebuild(engine)
+
+    def rebuild(self, engine):
+        """Redraw the cached layers from scratch (after a reset or when the walls change)"""
+        self.walls = engine.walls
+        self.walls_version = wall_version(engine.walls)
+        self.sprite_rects = []  # Areas the sprites covered last frame
+        self.full_redraw = True
+        world_size = level_size(engine.walls, self.screen.get_size())
+        if world_size != self.screen.get_size():
+            self.camera = Camera(self.screen.get_size(), world_size)
+            self.chunks = ChunkCache(engine.walls, engine.pellets.positions, self.screen)
+            self.background = self.pellet_layer = None
+            return
+        self.camera = self.chunks = None
+        self.background = pygame.Surface(self.screen.get_size()).convert(self.screen)
+        self.background.fill(BLACK)
+        draw_maze(self.background, engine.walls)
+        self.pellet_layer = self.background.copy()
+        draw_pellets(self.pellet_layer, engine.pellets)
+
+    def erase_pellet(self, engine, x, y):
+        """
+        Take an eaten pellet off the pellet layer.
+        Returns:
+            pygame.Rect: The area of the screen that changed.
+        """
+        radius = PELLET_RADIUS
+        area = pygame.Rect(x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)
+        self.pellet_layer.blit(self.background, area, area)
+        # Put back any neighbouring pellet that overlapped the erased area
+        positions = engine.pellets.positions
+        overlapping = [index for index in engine.pellets.near(x, y, radius * 2)
+                       if area.colliderect(pygame.Rect(positions[index][0] - radius, positions[index][1] - radius,
+                                                       radius * 2 + 1, radius * 2 + 1))]
+        engine.pellets.draw(self.pellet_layer, overlapping)
+        return area
+
+    def draw(self, engine, events=(), previous=None, alpha=1.0):
+        """
+        Draw one frame and push the changed areas to the display.
+        Parameters:
+            engine (GameEngine): The game to draw.
+            events (list): The events returned by the engine.step() calls since the last frame.
+            previous (dict): The engine state one tick before the current one, from get_state().
+            alpha (float): How far between previous (0.0) and the current state (1.0) to draw.
+        """
+        if engine.walls is not self.walls or wall_version(engine.walls) != self.walls_version:
+            self.rebuild(engine)
+        if self.camera is not None:
+            self.draw_scrolling(engine, events, previous, alpha)
+            return
+
+        screen = self.screen
+        dirty = []
+        for name, data in events:
+            if name == "PELLET_EATEN":
+                dirty.append(self.erase_pellet(engine, *data))
+
+        if self.full_redraw:
+            screen.blit(self.pellet_layer, (0, 0))
+            dirty = [screen.get_rect()]
+            self.full_redraw = False
+        else:
+            # Rub out last frame's sprites and eaten pellets by copying the layer back
+            for rect in self.sprite_rects + dirty:
+                screen.blit(self.pellet_layer, rect, rect)
+            dirty.extend(self.sprite_rects)
+
+        sprite_rects = []
+        for fruit in engine.fruits:
+            sprite_rects.append(fruit.draw(screen))
+        if previous is None or alpha >= 1.0:
+            sprite_rects.append(engine.pacman.draw(screen))
+            for ghost in engine.ghosts:
+                sprite_rects.append(ghost.draw(screen))
+        else:
+            sprite_rects.append(engine.pacman.draw(
+                screen, interpolate(previous["pacman"], engine.pacman.get_position(), alpha)))
+            for ghost, old_position in zip(engine.ghosts, previous["ghosts"]):
+                sprite_rects.append(ghost.draw(
+                    screen, interpolate(old_position, (ghost.x, ghost.y), alpha)))
+        for overlay in self.overlays:
+            sprite_rects.append(overlay(screen))
+        sprite_rects = [rect for rect in sprite_rects if rect]
+
+        dirty.extend(sprite_rects)
+        self.sprite_rects = sprite_rects
+        if self.profiler:
+            self.profiler.lap("draw")
+        pygame.display.update(dirty)
+        if self.profiler:
+            self.profiler.lap("display")
+
+    def draw_scrolling(self, engine, events=(), previous=None, alpha=1.0):
+        """Draw one frame of a level bigger than the window, following Pac-Man (see draw())"""
+        erased = []
+        for name, data in events:
+            if name == "PELLET_EATEN":
+                erased.append(self.chunks.erase_pellet(*data, engine.pellets))
+
+        if previous is None or alpha >= 1.0:
+            pacman = engine.pacman.get_position()
+            ghosts = [(ghost.x, ghost.y) for ghost in engine.ghosts]
+        else:
+            pacman = interpolate(previous["pacman"], engine.pacman.get_position(), alpha)
+            ghosts = [interpolate(old_position, (ghost.x, ghost.y), alpha)
+                      for ghost, old_position in zip(engine.ghosts, previous["ghosts"])]
+        camera = self.camera
+        last_view = camera.rect.copy()
+        camera.follow(*pacman)
+
+        screen = self.screen
+        if self.full_redraw or camera.rect != last_view:
+            # Everything in the window moved: copy all of it from the chunks in view
+            self.chunks.draw(screen, camera, engine.pellets)
+            dirty = [screen.get_rect()]
+            self.full_redraw = False
+        else:
+            # The camera stood still, so only last frame's sprites and eaten pellets need rubbing out
+            dirty = self.sprite_rects + [area.move(-camera.rect.x, -camera.rect.y) for area in erased]
+            for rect in dirty:
+                self.chunks.draw(screen, camera, engine.pellets, rect)
+
+        # Only sprites in view are drawn
+        sprite_rects = []
+        for fruit in engine.fruits:
+            if fruit.is_active and camera.sees(fruit.rect):
+                sprite_rects.append(screen.blit(fruit.image, fruit.rect.move(-camera.rect.x, -camera.rect.y)))
+        radius = HITBOX_SIZE // 2
+        for ghost, (x, y) in zip(engine.ghosts, ghosts):
+            if camera.sees((x - radius, y - radius, radius * 2, radius * 2)):
+                sprite_rects.append(ghost.draw(screen, camera.to_screen(x, y)))
+        sprite_rects.append(engine.pacman.draw(screen, camera.to_screen(*pacman)))
+        for overlay in self.overlays:
+            sprite_rects.append(overlay(screen))
+        sprite_rects = [rect for rect in sprite_rects if rect]
+
+        dirty.extend(sprite_rects)
+        self.sprite_rects = sprite_rects
+        if self.profiler:
+            self.profiler.lap("draw")
+        pygame.display.update(dirty)
+        if self.profiler:
+            self.profiler.lap("display")
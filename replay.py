@@ -0,0 +1,173 @@
+import mmap
+import struct
+import zlib
+from settings import *
+
+# File layout:
+#   header   magic, format version, seed, keyframe interval, level checksum
+#   chunks   [keyframe length][keyframe: engine.save_state()][one byte per tick ...]
+# Every chunk except the last holds exactly keyframe_interval input bytes, so
+# tick t is found by jumping to chunk t // keyframe_interval.
+MAGIC = b"PMRP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHqHI")
+KEYFRAME_LENGTH = struct.Struct("<I")
+
+# Input byte for each action: 0 is "no key pressed"
+ACTION_CODES = {None: 0, "UP": 1, "DOWN": 2, "LEFT": 3, "RIGHT": 4}
+ACTIONS = [None, "UP", "DOWN", "LEFT", "RIGHT"]
+
+
+def level_checksum(engine):
+    """Checksum of the engine's level, so a replay isn't played on the wrong maze"""
+    layout = (
+        [tuple(wall) for wall in engine.walls],
+        engine.pellet_positions,
+        engine.pacman_start,
+        [(x, y) for x, y, _ in engine.ghost_starts],
+    )
+    return zlib.crc32(repr(layout).encode())
+
+
+class ReplayRecorder:
+    """
+    Writes a game's inputs to a compact binary replay file.
+
+    Each tick costs one byte. Every keyframe_interval ticks a full snapshot of
+    the engine is written as well, so playback can jump near any tick without
+    simulating the game from the start.
+
+    Usage:
+        engine = GameEngine(seed=42)
+        with ReplayRecorder("game.rpl", engine) as recorder:
+            state, events = recorder.step(action)
+    """
+    def __init__(self, path, engine, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Parameters:
+            path (str): File to write.
+            engine (GameEngine): The game to record; it must have an integer seed.
+            keyframe_interval (int): Ticks between keyframes.
+        """
+        if engine.seed is None:
+            raise ValueError("only games with an integer seed can be recorded")
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.ticks = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, engine.seed, keyframe_interval,
+                                    level_checksum(engine)))
+
+    def record(self, action):
+        """Log the input for the tick that is about to run (call before engine.step)"""
+        if self.ticks % self.keyframe_interval == 0:
+            keyframe = self.engine.save_state()
+            self.file.write(KEYFRAME_LENGTH.pack(len(keyframe)))
+            self.file.write(keyframe)
+        self.file.write(bytes((ACTION_CODES[action],)))
+        self.ticks += 1
+
+    def step(self, action=None):
+        """Record the action and advance the engine with it; returns engine.step()'s result"""
+        self.record(action)
+        return self.engine.step(action)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Replay:
+    """
+    Reads a replay file through a memory map.
+
+    Only the chunk headers are read when the file is opened, to find where
+    each keyframe starts. seek() restores the nearest keyframe before the
+    wanted tick and replays at most keyframe_interval inputs from there.
+
+    Usage:
+        with Replay("game.rpl") as replay:
+            engine = GameEngine(seed=replay.seed)
+            replay.seek(engine, 5000)
+            for state, events in replay.play(engine):
+                ...
+    """
+    def __init__(self, path):
+        """
+        Parameters:
+            path (str): Replay file to open.
+        """
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, self.keyframe_interval, self.checksum = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} replay file")
+
+        # (keyframe offset, keyframe length) per chunk; a file cut short by a
+        # crash still plays up to its last complete tick
+        self.chunks = []
+        self.ticks = 0
+        offset = HEADER.size
+        size = len(self.data)
+        while offset + KEYFRAME_LENGTH.size <= size:
+            (length,) = KEYFRAME_LENGTH.unpack_from(self.data, offset)
+            keyframe_offset = offset + KEYFRAME_LENGTH.size
+            if keyframe_offset + length > size:
+                break
+            inputs = min(self.keyframe_interval, size - keyframe_offset - length)
+            self.chunks.append((keyframe_offset, length))
+            self.ticks += inputs
+            offset = keyframe_offset + length + inputs
+
+    def __len__(self):
+        return self.ticks
+
+    def action_at(self, tick):
+        """Return the action recorded for a tick (counted from the start of the recording)"""
+        if not 0 <= tick < self.ticks:
+            raise IndexError("tick out of range")
+        keyframe_offset, length = self.chunks[tick // self.keyframe_interval]
+        return ACTIONS[self.data[keyframe_offset + length + tick % self.keyframe_interval]]
+
+    def seek(self, engine, tick):
+        """
+        Put the engine in the state it was in just before the given tick ran.
+        Parameters:
+            engine (GameEngine): An engine set up with the recorded level.
+            tick (int): Tick to seek to (counted from the start of the recording).
+        """
+        if level_checksum(engine) != self.checksum:
+            raise ValueError("the engine's level is not the one this replay was recorded on")
+        if not 0 <= tick <= self.ticks:
+            raise IndexError("tick out of range")
+        chunk = min(tick // self.keyframe_interval, len(self.chunks) - 1)
+        keyframe_offset, length = self.chunks[chunk]
+        engine.load_state(self.data[keyframe_offset:keyframe_offset + length])
+        for replayed in range(chunk * self.keyframe_interval, tick):
+            engine.step(self.action_at(replayed))
+        self.position = tick
+
+    def play(self, engine, start=0):
+        """
+        Replay the recording from a tick onwards.
+        Yields:
+            tuple: (state, events) from every engine.step().
+        """
+        self.seek(engine, start)
+        for tick in range(start, self.ticks):
+            yield engine.step(self.action_at(tick))
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
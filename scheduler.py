@@ -0,0 +1,107 @@
+import heapq
+import itertools
+
+
+class Timer:
+    """A callback waiting in a Scheduler; keep it to cancel the callback later"""
+    __slots__ = ("time", "callback", "args", "cancelled")
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class Scheduler:
+    """
+    Runs callbacks at set times on the simulation clock.
+
+    Timers wait in a heap ordered by due time, so nothing is checked each frame:
+    advance_to() only looks at the timers that are due. The clock is whatever
+    the owner says it is (the engine sets it from the tick count), so a game
+    runs the same in real time, fast-forwarded or headless. Cancelled timers
+    are skipped when they reach the top of the heap.
+
+    Usage:
+        scheduler = Scheduler()
+        timer = scheduler.schedule(10000, fruit.disappear)  # in 10 seconds
+        scheduler.cancel(timer)                             # changed our mind
+        scheduler.advance_to(engine_time_ms)                # once per tick
+    """
+    def __init__(self, now=0):
+        """
+        Parameters:
+            now (float): Starting time in milliseconds.
+        """
+        self.now = now
+        self.heap = []  # (due time, sequence number, Timer); the number keeps equal times in order
+        self.sequence = itertools.count()
+        self.cancelled = 0  # Cancelled timers still in the heap
+
+    def __len__(self):
+        """Number of timers still waiting to run"""
+        return len(self.heap) - self.cancelled
+
+    def schedule(self, delay, callback, *args):
+        """
+        Run callback(*args) delay milliseconds from now.
+        Returns:
+            Timer: Pass it to cancel() to stop the callback.
+        """
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    def schedule_at(self, time, callback, *args):
+        """
+        Run callback(*args) once the clock reaches time (in milliseconds).
+        Returns:
+            Timer: Pass it to cancel() to stop the callback.
+        """
+        timer = Timer(time, callback, args)
+        heapq.heappush(self.heap, (time, next(self.sequence), timer))
+        return timer
+
+    def cancel(self, timer):
+        """Stop a timer's callback from running (does nothing if it already ran)"""
+        if timer is None or timer.cancelled or timer.callback is None:
+            return
+        timer.cancelled = True
+        timer.callback = timer.args = None
+        self.cancelled += 1
+        if self.cancelled > 64 and self.cancelled > len(self.heap) // 2:
+            # Mostly dead entries: rebuild the heap without them
+            self.heap = [entry for entry in self.heap if not entry[2].cancelled]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+
+    def advance_to(self, time):
+        """
+        Move the clock forward, running every timer due by then in time order.
+        A callback sees the clock at its own due time, and timers it schedules
+        run in this call too if they fall due before `time`.
+        """
+        heap = self.heap
+        while heap and heap[0][0] <= time:
+            due, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                self.cancelled -= 1
+                continue
+            self.now = max(self.now, due)
+            callback, args = timer.callback, timer.args
+            timer.callback = timer.args = None  # Marks the timer as done
+            callback(*args)
+        self.now = max(self.now, time)
+
+    def advance(self, milliseconds):
+        """Move the clock forward by a number of milliseconds (see advance_to)"""
+        self.advance_to(self.now + milliseconds)
+
+    def clear(self, now=None):
+        """Drop every timer, optionally setting the clock (used when a game restarts)"""
+        for _, _, timer in self.heap:
+            timer.cancelled = True
+            timer.callback = timer.args = None
+        self.heap = []
+        self.cancelled = 0
+        if now is not None:
+            self.now = now
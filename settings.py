@@ -1,5 +1,7 @@
 # Screen settings
 WIDTH, HEIGHT = 600, 600
+CHUNK_SIZE = 256  # Size of the squares a level bigger than the window is drawn in (see camera.py)
+MAX_CHUNKS = 64  # Chunk surfaces kept for such a level (64 chunks of 256 pixels take 16 MB)
 
 # Tuples for Colors
 YELLOW = (255, 255, 0)
@@ -9,4 +11,52 @@ WHITE = (255, 255, 255)
 ORANGE = (255, 165, 0)
 BLUE = (0, 0, 255)
 GRAY = (128, 128, 128,)
-PELLET_COLOR = ORANGE
\ No newline at end of file
+PELLET_COLOR = ORANGE
+PELLET_RADIUS = 5
+
+# Movement directions, in the order the ghosts try them
+DIRECTIONS = ["UP", "DOWN", "LEFT", "RIGHT"]
+DIRECTION_STEPS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+
+# Game rules
+PACMAN_START = (300, 300)
+GHOST_STARTS = [(100, 100, RED)]  # (x, y, color) for every ghost
+CATCH_DISTANCE = 20  # Pac-Man is caught when a ghost is closer than this
+PELLET_DISTANCE = 20  # Pac-Man eats a pellet when it is closer than this
+PELLET_POINTS = 10
+
+# Timing settings (speeds are in pixels per tick)
+TICK_RATE = 30  # Simulation ticks per second
+MAX_FPS = 120  # Upper limit for the render rate
+MAX_FRAME_SKIP = 5  # Most ticks simulated before a frame has to be drawn
+
+# Recording settings
+HISTORY_LENGTH = 1024  # Moves kept in Pac-Man's movement history
+KEYFRAME_INTERVAL = 600  # Ticks between full-state keyframes in a replay file
+
+# Profiler settings
+PROFILER_HISTORY = 300  # Frames used for the overlay's FPS and percentiles
+PROFILER_TRACE_FRAMES = 3600  # Frames kept for the Chrome trace export
+
+# Levels
+LEVEL_FOLDER = "levels"  # Where level text files are looked for
+
+# Streaming settings
+STREAM_PORT = 50007  # Local TCP port spectators connect to
+STREAM_KEYFRAME_INTERVAL = 150  # Ticks between full-state keyframes in the stream
+STREAM_MAX_BACKLOG = 1 << 20  # Bytes a spectator may fall behind before it is dropped
+
+# Collision settings
+HITBOX_SIZE = 30  # Pac-Man and the ghosts are circles with a 15-pixel radius
+WALL_CELL_SIZE = 50  # Size of one bucket in the wall collision grid
+
+# Navigation settings
+TILE_SIZE = 10  # Size of one cell of the ghosts' navigation grid (the walls are 10 pixels thick)
+MAX_NEXT_HOP_CELLS = 4096  # Largest maze (in navigation cells) that gets a next-hop table
+HASH_CELL_SIZE = 40  # Size of one cell of the spatial hash (fruits and ghosts) and of the pellet buckets
+TOUCH_RADIUS = 40  # Furthest centre-to-centre distance at which Pac-Man can touch anything
+
+# Autopilot settings
+AUTOPILOT_BUDGET = 0.02  # Seconds the autopilot thinks per decision (a tick is 33 ms)
+AUTOPILOT_ACTION_TICKS = 4  # Ticks the autopilot holds each move for
+AUTOPILOT_DEPTH = 60  # Ticks the autopilot looks ahead (2 seconds)
@@ -0,0 +1,250 @@
+"""
+The game ticked on a thread of its own and drawn from a triple buffer.
+
+Normally game.py reads input, ticks the game and draws it one after another,
+so a slow display update (waiting for vsync or a busy compositor) holds the
+next tick back. With `python game.py --threaded` a SimulationThread ticks the
+engine TICK_RATE times a second by itself and after every tick publishes an
+immutable Frame (engine snapshots after the tick and before it) into a
+TripleBuffer. The window takes the newest frame whenever it is ready to draw,
+so the game never waits for the display and the display never waits for the
+game. A frame the display was too slow to pick up is dropped; a frame drawn
+again because no new tick came yet is duplicated. Both are counted.
+
+The window only reads frames, never the engine, so nothing is locked while
+ticking or drawing; only swapping the buffer's slots takes a lock. Keys are
+still read by the window (SDL only reads input on the main thread), once per
+drawn frame, and the simulation picks up the latest move at its next tick.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+from settings import *
+from stream import SpectatorView
+
+# snapshot: the engine's Snapshot after a tick; previous: the one before it, for
+# drawing part-way between the two; time: time.perf_counter() when it was published
+Frame = namedtuple("Frame", "snapshot previous time")
+
+
+class TripleBuffer:
+    """
+    Hands the newest of a stream of values from one thread to another, without either waiting.
+
+    The writer fills the back slot and swaps it with the middle one; the reader
+    swaps the middle slot to the front when it holds something new, and keeps
+    the front to itself while it uses it. The values have to be immutable
+    (or at least never changed after publishing).
+
+    Usage:
+        buffer = TripleBuffer()
+        buffer.publish(frame)  # writer thread, any number of times
+        frame = buffer.take()  # reader thread: the newest frame (None before the first)
+    """
+    def __init__(self):
+        self.slots = [None, None, None]
+        self.back, self.middle, self.front = 0, 1, 2
+        self.fresh = False  # The middle slot holds a value the reader hasn't taken
+        self.lock = threading.Lock()
+        self.published = 0  # Values published
+        self.seen = 0  # Values published up to the last take()
+        self.dropped = 0  # Values replaced before the reader took them
+        self.duplicated = 0  # take() calls that had nothing new and gave the last value again
+        self.depths = deque(maxlen=PROFILER_HISTORY)  # Values published between takes, per take
+
+    def publish(self, value):
+        """Make value the newest (writer thread)"""
+        self.slots[self.back] = value
+        with self.lock:
+            self.back, self.middle = self.middle, self.back
+            if self.fresh:
+                self.dropped += 1
+            self.fresh = True
+            self.published += 1
+
+    def take(self):
+        """
+        Return the newest value (reader thread).
+        Returns:
+            The newest published value, or None if nothing has been published yet.
+        """
+        with self.lock:
+            depth = self.published - self.seen
+            self.seen = self.published
+            if self.fresh:
+                self.front, self.middle = self.middle, self.front
+                self.fresh = False
+            elif self.slots[self.front] is not None:
+                self.duplicated += 1
+        self.depths.append(depth)
+        return self.slots[self.front]
+
+
+class SimulationThread:
+    """
+    Ticks a GameEngine TICK_RATE times a second on its own thread, publishing every tick.
+
+    Usage:
+        simulation = SimulationThread(engine)
+        simulation.start()
+        simulation.action = "LEFT"  # from the window's input
+        frame = simulation.buffer.take()
+        simulation.stop()
+    """
+    def __init__(self, engine, step=None, next_action=None, on_tick=None, max_ticks=None):
+        """
+        Parameters:
+            engine (GameEngine): The game to tick. Only this thread may touch it once started.
+            step (function): Runs one tick, step(action) -> (state, events) (engine.step if
+                             None, or e.g. a ReplayRecorder's step).
+            next_action (function): Called on the simulation thread before every tick,
+                                    next_action(tick) -> action (a replay or the autopilot);
+                                    if None, the tick uses `action`.
+            on_tick (function): Called on the simulation thread with every tick's events
+                                (e.g. StateStreamer.publish).
+            max_ticks (int): Stop after this tick (e.g. the end of a replay).
+        """
+        self.engine = engine
+        self.step = engine.step if step is None else step
+        self.next_action = next_action
+        self.on_tick = on_tick
+        self.max_ticks = max_ticks
+        self.action = None  # Move for the next tick, set by the window's input
+        self.buffer = TripleBuffer()
+        self.buffer.publish(Frame(engine.snapshot(), engine.snapshot(), time.perf_counter()))
+        self.stopping = threading.Event()
+        self.finished = threading.Event()  # Set when the game is over or the thread stopped
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.ticks = 0
+        self.skipped_ticks = 0  # Ticks given up on after falling more than MAX_FRAME_SKIP behind
+        self.lateness = deque(maxlen=PROFILER_HISTORY)  # Seconds each tick started after it was due
+        self.step_times = deque(maxlen=PROFILER_HISTORY)  # Seconds each tick took
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        """Stop ticking and wait for the current tick to finish"""
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def run(self):
+        """Thread body: tick on schedule until the game is over or stop() is called"""
+        engine = self.engine
+        clock = time.perf_counter
+        tick_time = 1.0 / TICK_RATE
+        previous = engine.snapshot()
+        due = clock()
+        try:
+            while not self.stopping.is_set():
+                now = clock()
+                if now < due:
+                    self.stopping.wait(due - now)
+                    continue
+                if now - due > MAX_FRAME_SKIP * tick_time:
+                    # Too far behind to catch up (the machine stalled): drop the backlog
+                    self.skipped_ticks += int((now - due) / tick_time)
+                    due = now
+                self.lateness.append(now - due)
+                action = self.next_action(engine.tick) if self.next_action else self.action
+                state, events = self.step(action)
+                self.step_times.append(clock() - now)
+                if self.on_tick:
+                    self.on_tick(events)
+                snapshot = engine.snapshot()
+                self.buffer.publish(Frame(snapshot, previous, clock()))
+                previous = snapshot
+                self.ticks += 1
+                due += tick_time
+                if engine.game_over or (self.max_ticks is not None and engine.tick >= self.max_ticks):
+                    break
+        finally:
+            self.finished.set()
+
+    def stats(self):
+        """
+        Summarise how regularly the game ticked and how the display kept up.
+        Returns:
+            dict: ticks, skipped_ticks, frames published, dropped (never drawn) and
+                  duplicated (drawn again), and over the last PROFILER_HISTORY ticks or
+                  frames, in milliseconds: mean and p95 tick lateness (started after it
+                  was due) and mean tick time; and the mean and max queue depth (ticks
+                  published between two drawn frames: 1 is in step, 0 a duplicate,
+                  more means drops).
+        """
+        def mean(values, scale=1000):
+            return sum(values) * scale / len(values) if values else 0.0
+        def percentile(values, fraction):
+            values = sorted(values)
+            return values[min(len(values) - 1, int(fraction * len(values)))] * 1000 if values else 0.0
+        buffer = self.buffer
+        return {
+            "ticks": self.ticks,
+            "skipped_ticks": self.skipped_ticks,
+            "published": buffer.published,
+            "dropped": buffer.dropped,
+            "duplicated": buffer.duplicated,
+            "late_mean": mean(self.lateness),
+            "late_p95": percentile(self.lateness, 0.95),
+            "tick_mean": mean(self.step_times),
+            "depth_mean": mean(buffer.depths, scale=1),
+            "depth_max": max(buffer.depths, default=0),
+        }
+
+
+class FrameView(SpectatorView):
+    """
+    The game as the last frame taken from a SimulationThread shows it.
+    It has the attributes Renderer reads from a GameEngine, so it can be drawn the same way.
+
+    Usage:
+        view = FrameView(engine)
+        renderer = Renderer(screen, view)
+        events, previous, alpha = view.show(simulation.buffer.take())
+        renderer.draw(view, events, previous, alpha)
+    """
+    def __init__(self, engine):
+        """
+        Parameters:
+            engine (GameEngine): The game, read once for the level (before the thread starts).
+        """
+        super().__init__(engine.walls, engine.pellets.positions, [ghost.color for ghost in engine.ghosts])
+        self.show(Frame(engine.snapshot(), engine.snapshot(), time.perf_counter()))
+
+    def show(self, frame):
+        """
+        Bring the view up to a frame.
+        Returns:
+            tuple: (events, previous, alpha) for Renderer.draw(): a ("PELLET_EATEN", (x, y))
+                   event per pellet gone since the last frame shown (or ("KEYFRAME", None) if
+                   pellets came back, when the renderer has to rebuild its layers), the
+                   positions a tick before as in get_state(), and how far to draw between
+                   them, from how long ago the frame was published.
+        """
+        snapshot, previous = frame.snapshot, frame.previous
+        events = []
+        alive = snapshot.pellets
+        if alive & ~self.pellets.alive:
+            events.append(("KEYFRAME", None))  # A new game
+        else:
+            positions = self.pellets.positions
+            events.extend(("PELLET_EATEN", positions[index])
+                          for index in self.pellets.indices(self.pellets.alive & ~alive))
+        self.pellets.alive = alive
+
+        self.tick, self.score, self.game_over = snapshot.tick, snapshot.score, snapshot.game_over
+        self.pacman.x, self.pacman.y = snapshot.pacman[:2]
+        for index, ghost in enumerate(self.ghosts):
+            ghost.x, ghost.y = snapshot.ghosts[4 * index:4 * index + 2]
+        fruits = {(type_number, x, y) for type_number, x, y, age in snapshot.fruits}
+        for key in list(self.fruit_keys):
+            if key not in fruits:
+                self.remove_fruit(key)
+        for key in fruits - set(self.fruit_keys):
+            self.add_fruit(key)
+
+        before = {"pacman": previous.pacman[:2],
+                  "ghosts": [previous.ghosts[4 * index:4 * index + 2] for index in range(len(self.ghosts))]}
+        alpha = min(1.0, (time.perf_counter() - frame.time) * TICK_RATE)
+        return events, before, alpha
@@ -0,0 +1,91 @@
+from settings import *
+
+
+class SpatialHash:
+    """
+    Objects bucketed by the grid cell their centre is in.
+
+    Used as a broadphase: asking what is near a point only looks at the few
+    cells around it, so it costs the same however many objects the level has.
+    Adding, moving and removing an object are O(1).
+
+    Usage:
+        items = SpatialHash()
+        items.insert(pellet, pellet.x, pellet.y)
+        nearby = items.query(pacman.x, pacman.y, TOUCH_RADIUS)
+    """
+    def __init__(self, cell_size=HASH_CELL_SIZE):
+        """
+        Parameters:
+            cell_size (int): Width and height of one cell in pixels.
+        """
+        self.cell_size = cell_size
+        # Each cell is a dict used as an ordered set, so queries always return
+        # objects in the same order and a seeded game plays out the same way
+        self.cells = {}  # (column, row) -> {item: None}
+        self.item_cells = {}  # item -> the (column, row) it is stored in
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def __contains__(self, item):
+        return item in self.item_cells
+
+    def _cell(self, x, y):
+        return int(x) // self.cell_size, int(y) // self.cell_size
+
+    def insert(self, item, x, y):
+        """Add an object whose centre is at (x, y)"""
+        if item in self.item_cells:
+            self.move(item, x, y)
+            return
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, {})[item] = None
+        self.item_cells[item] = cell
+
+    def remove(self, item):
+        """Remove an object (does nothing if it is not in the hash)"""
+        cell = self.item_cells.pop(item, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        del bucket[item]
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, item, x, y):
+        """Update an object's position; only touches the buckets if it changed cell"""
+        cell = self._cell(x, y)
+        old_cell = self.item_cells.get(item)
+        if cell == old_cell:
+            return
+        if old_cell is not None:
+            self.remove(item)
+        self.cells.setdefault(cell, {})[item] = None
+        self.item_cells[item] = cell
+
+    def query(self, x, y, radius):
+        """
+        Return the objects whose centre may be within radius of (x, y).
+        This is a broadphase: callers still do their own exact test on the results.
+        Parameters:
+            x (int): X-coordinate of the centre of the search.
+            y (int): Y-coordinate of the centre of the search.
+            radius (int): How far from (x, y) to look, in pixels.
+        Returns:
+            list: Objects in the cells overlapping the square around (x, y).
+        """
+        cell_size = self.cell_size
+        cells = self.cells
+        found = []
+        for column in range(int(x - radius) // cell_size, int(x + radius) // cell_size + 1):
+            for row in range(int(y - radius) // cell_size, int(y + radius) // cell_size + 1):
+                bucket = cells.get((column, row))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def clear(self):
+        """Remove every object"""
+        self.cells.clear()
+        self.item_cells.clear()
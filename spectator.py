@@ -0,0 +1,66 @@
+import argparse
+import socket
+import pygame
+from settings import *
+from renderer import Renderer
+from fruits import fruit_atlas
+from stream import StreamDecoder
+
+
+def main(host="127.0.0.1", port=STREAM_PORT):
+    """
+    Watch a game published with `python game.py --stream`.
+    Runs no game logic: everything drawn comes from the stream.
+    Parameters:
+        host (str): Address of the machine running the game.
+        port (int): Port the game streams on.
+    """
+    connection = socket.create_connection((host, port))
+    connection.setblocking(False)
+    decoder = StreamDecoder()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Pac-Man Spectator")
+    fruit_atlas.load()
+    clock = pygame.time.Clock()
+    renderer = None
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        # Take in everything that arrived since the last frame
+        events = []
+        while True:
+            try:
+                data = connection.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not data:
+                print("The game has ended")
+                running = False
+                break
+            events.extend(decoder.feed(data))
+
+        if decoder.synced:
+            view = decoder.view
+            if renderer is None:
+                renderer = Renderer(screen, view)
+            elif any(name in ("LEVEL", "KEYFRAME") for name, data in events):
+                renderer.rebuild(view)  # Pellets may have come back (a new game)
+            renderer.draw(view, events)
+        clock.tick(TICK_RATE)
+
+    connection.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a streamed Pac-Man game")
+    parser.add_argument("--host", default="127.0.0.1", help="machine running the game")
+    parser.add_argument("--port", type=int, default=STREAM_PORT, help="port the game streams on")
+    args = parser.parse_args()
+    main(host=args.host, port=args.port)
@@ -0,0 +1,390 @@
+"""
+Live game state streamed to spectators over a local socket.
+
+The game publishes one small message per tick: what changed since the tick
+before (Pac-Man's and the ghosts' moves, the pellets eaten, fruits that came
+or went). Every STREAM_KEYFRAME_INTERVAL ticks, and whenever a spectator
+joins or the game jumps (a reset or a loaded state), the whole state is sent
+instead, so a spectator never has to replay the game from the start.
+
+    python game.py --stream          # play and publish on STREAM_PORT
+    python spectator.py              # watch in another window
+
+Every message is [u32 length][u8 kind][body], little-endian.
+"""
+import random
+import socket
+import struct
+import sys
+from array import array
+import pygame
+from settings import *
+from collision import WallList
+from pacman import PacMan
+from ghosts import Ghost
+from pellets import PelletField
+from fruits import Fruit, FRUIT_DATA
+
+LEVEL, KEYFRAME, DELTA = 0, 1, 2
+FRAME_LENGTH = struct.Struct("<I")
+# kind, wall count, pellet count, ghost count; then x, y, width, height per wall,
+# x, y per pellet and red, green, blue per ghost
+LEVEL_HEADER = struct.Struct("<BIIH")
+# kind, tick, score, game over, Pac-Man x, y, ghost count, pellet count, fruit count;
+# then x, y per ghost, one bit per pellet still on the board and the fruits
+KEYFRAME_HEADER = struct.Struct("<BIiBiiHIB")
+# kind, tick, score, game over, Pac-Man's move, eaten pellets, fruits added, fruits removed;
+# then one bit per ghost that moved, its move, the eaten pellet numbers and the fruits
+DELTA_HEADER = struct.Struct("<BIiBbbHBB")
+FRUIT = struct.Struct("<Bii")  # fruit type number, centre x, centre y
+FRUIT_TYPES = list(FRUIT_DATA)
+
+
+def _ints(values):
+    numbers = array('i', values)
+    if sys.byteorder == "big":
+        numbers.byteswap()  # The stream is always little-endian
+    return numbers.tobytes()
+
+
+def _frame(body):
+    return FRAME_LENGTH.pack(len(body)) + body
+
+
+def _fits_byte(value):
+    return -128 <= value <= 127
+
+
+class StateStreamer:
+    """
+    Publishes a GameEngine's state to every spectator connected on a local TCP port.
+
+    publish() never blocks the game: sockets are non-blocking, bytes a
+    spectator can't take yet wait in its own buffer, and a spectator more
+    than STREAM_MAX_BACKLOG bytes behind is dropped.
+
+    Usage:
+        streamer = StateStreamer(engine)
+        state, events = engine.step(action)
+        streamer.publish(events)
+    """
+    def __init__(self, engine, port=STREAM_PORT, host="127.0.0.1",
+                 keyframe_interval=STREAM_KEYFRAME_INTERVAL, max_backlog=STREAM_MAX_BACKLOG):
+        """
+        Parameters:
+            engine (GameEngine): The game to publish.
+            port (int): TCP port to listen on (0 lets the system pick one, see self.port).
+            host (str): Address to listen on; the default only accepts local spectators.
+            keyframe_interval (int): Ticks between full-state messages.
+            max_backlog (int): Bytes a spectator may fall behind before it is dropped.
+        """
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.max_backlog = max_backlog
+        self.server = socket.create_server((host, port))
+        self.server.setblocking(False)
+        self.port = self.server.getsockname()[1]
+        self.clients = {}  # socket -> bytearray still to be sent
+        self.pellet_numbers = {position: index for index, position in enumerate(engine.pellets.positions)}
+        self.previous = None  # What the spectators last saw, or None if the next message must be a keyframe
+        self.since_keyframe = 0
+        self.bytes_sent = 0
+        self.messages = 0
+        self.keyframes = 0
+
+    def publish(self, events=()):
+        """
+        Send this tick's changes to every spectator and let new ones in.
+        Parameters:
+            events (list): The events returned by the engine.step() call just made.
+        """
+        if self.clients:
+            message = None
+            if self.previous is not None and self.since_keyframe < self.keyframe_interval:
+                message = self._delta(events)
+            if message is None:
+                message = self._keyframe()
+            for client in list(self.clients):
+                self._queue(client, message)
+            self.messages += 1
+        else:
+            self.previous = None  # Nobody is watching; the next spectator starts from a keyframe
+
+        self._accept()
+        self._flush()
+
+    def _accept(self):
+        while True:
+            try:
+                client, address = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client.setblocking(False)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.clients[client] = bytearray()
+            self._queue(client, self._level())
+            keyframe = self._keyframe()
+            # The others get the same keyframe, so everyone shares one snapshot to diff against
+            for other in list(self.clients):  # _queue() may drop a spectator that fell behind
+                self._queue(other, keyframe)
+
+    def _queue(self, client, message):
+        backlog = self.clients.get(client)
+        if backlog is None:
+            return
+        backlog += message
+        if len(backlog) > self.max_backlog:
+            self._drop(client)
+
+    def _flush(self):
+        for client, backlog in list(self.clients.items()):
+            if not backlog:
+                continue
+            try:
+                sent = client.send(backlog)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                self._drop(client)  # The spectator went away
+                continue
+            del backlog[:sent]
+            self.bytes_sent += sent
+
+    def _drop(self, client):
+        self.clients.pop(client, None)
+        client.close()
+
+    def close(self):
+        for client in list(self.clients):
+            self._drop(client)
+        self.server.close()
+
+    # --- Encoding ---
+
+    def _snapshot(self):
+        """Remember what the spectators have now seen"""
+        engine = self.engine
+        self.previous = {
+            "tick": engine.tick,
+            "pacman": (engine.pacman.x, engine.pacman.y),
+            "ghosts": engine.ghost_positions(),
+            "pellets_left": len(engine.pellets),
+            "fruits": self._fruits(),
+        }
+
+    def _fruits(self):
+        return {(FRUIT_TYPES.index(fruit.type), *fruit.rect.center) for fruit in self.engine.fruits}
+
+    def _level(self):
+        engine = self.engine
+        body = [LEVEL_HEADER.pack(LEVEL, len(engine.walls), len(engine.pellets.positions), len(engine.ghosts)),
+                _ints(number for wall in engine.walls for number in wall),
+                _ints(number for position in engine.pellets.positions for number in position),
+                bytes(channel for ghost in engine.ghosts for channel in ghost.color[:3])]
+        return _frame(b"".join(body))
+
+    def _keyframe(self):
+        engine = self.engine
+        pellet_count = len(engine.pellets.positions)
+        fruits = sorted(self._fruits())
+        body = [KEYFRAME_HEADER.pack(KEYFRAME, engine.tick, engine.score, engine.game_over,
+                                     engine.pacman.x, engine.pacman.y, len(engine.ghosts),
+                                     pellet_count, len(fruits)),
+                _ints(number for position in engine.ghost_positions() for number in position),
+                engine.pellets.alive.to_bytes((pellet_count + 7) // 8, "little")]
+        body.extend(FRUIT.pack(*fruit) for fruit in fruits)
+        self._snapshot()
+        self.since_keyframe = 0
+        self.keyframes += 1
+        return _frame(b"".join(body))
+
+    def _delta(self, events):
+        """Encode the changes since the last message, or return None if a keyframe is needed"""
+        engine = self.engine
+        previous = self.previous
+        pacman_dx = engine.pacman.x - previous["pacman"][0]
+        pacman_dy = engine.pacman.y - previous["pacman"][1]
+        eaten = [self.pellet_numbers[data] for name, data in events if name == "PELLET_EATEN"]
+        if (engine.tick != previous["tick"] + 1 or len(engine.ghosts) != len(previous["ghosts"])
+                or len(engine.pellets) != previous["pellets_left"] - len(eaten)
+                or not (_fits_byte(pacman_dx) and _fits_byte(pacman_dy))):
+            return None  # The game jumped (reset, loaded state) or moved too far to encode
+
+        moved = 0
+        moves = bytearray()
+        ghosts = engine.ghost_positions()
+        for index, ((x, y), (old_x, old_y)) in enumerate(zip(ghosts, previous["ghosts"])):
+            if x != old_x or y != old_y:
+                dx, dy = x - old_x, y - old_y
+                if not (_fits_byte(dx) and _fits_byte(dy)):
+                    return None
+                moved |= 1 << index
+                moves += struct.pack("<bb", dx, dy)
+
+        fruits = self._fruits()
+        added = sorted(fruits - previous["fruits"])
+        removed = sorted(previous["fruits"] - fruits)
+        body = [DELTA_HEADER.pack(DELTA, engine.tick, engine.score, engine.game_over, pacman_dx, pacman_dy,
+                                  len(eaten), len(added), len(removed)),
+                moved.to_bytes((len(ghosts) + 7) // 8, "little"), moves,
+                _ints(eaten)]
+        body.extend(FRUIT.pack(*fruit) for fruit in added + removed)
+
+        previous["tick"] = engine.tick
+        previous["pacman"] = (engine.pacman.x, engine.pacman.y)
+        previous["ghosts"] = ghosts
+        previous["pellets_left"] = len(engine.pellets)
+        previous["fruits"] = fruits
+        self.since_keyframe += 1
+        return _frame(b"".join(body))
+
+
+class SpectatorView:
+    """
+    The game as a spectator sees it, rebuilt from the stream.
+    It has the attributes Renderer reads from a GameEngine, so it can be drawn the same way.
+    """
+    def __init__(self, walls, pellet_positions, ghost_colors):
+        self.walls = walls
+        self.pellets = PelletField(pellet_positions)
+        self.pacman = PacMan(0, 0, walls=walls)
+        rng = random.Random(0)  # Ghost() picks a starting direction; spectators don't use it
+        self.ghosts = [Ghost(0, 0, color, walls=walls, rng=rng) for color in ghost_colors]
+        self.fruit_keys = {}  # (type number, centre x, centre y) -> Fruit
+        self.tick = 0
+        self.score = 0
+        self.game_over = False
+
+    @property
+    def fruits(self):
+        return list(self.fruit_keys.values())
+
+    def get_state(self):
+        """Return the same small state dict as GameEngine.get_state()"""
+        return {
+            "tick": self.tick,
+            "score": self.score,
+            "pacman": (self.pacman.x, self.pacman.y),
+            "ghosts": [(ghost.x, ghost.y) for ghost in self.ghosts],
+            "pellets_left": len(self.pellets),
+            "game_over": self.game_over,
+        }
+
+    def add_fruit(self, key):
+        type_number, x, y = key
+        self.fruit_keys[key] = Fruit(FRUIT_TYPES[type_number], (x, y))
+
+    def remove_fruit(self, key):
+        fruit = self.fruit_keys.pop(key, None)
+        if fruit is not None:
+            fruit.is_active = False
+
+
+class StreamDecoder:
+    """
+    Turns the bytes of a stream back into a SpectatorView.
+
+    Usage:
+        decoder = StreamDecoder()
+        events = decoder.feed(sock.recv(65536))
+        renderer.draw(decoder.view, events)
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.view = None  # Created by the first LEVEL message
+        self.synced = False  # True once a keyframe has arrived
+
+    def feed(self, data):
+        """
+        Add received bytes and apply every complete message.
+        Returns:
+            list: Events for Renderer.draw(): ("PELLET_EATEN", (x, y)) per eaten pellet, plus
+                  ("LEVEL", None) or ("KEYFRAME", None) when the view was replaced or resynced.
+        """
+        self.buffer += data
+        events = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_LENGTH.size:
+            (length,) = FRAME_LENGTH.unpack_from(self.buffer, offset)
+            start = offset + FRAME_LENGTH.size
+            if len(self.buffer) - start < length:
+                break
+            body = memoryview(self.buffer)[start:start + length]
+            kind = body[0]
+            if kind == LEVEL:
+                self._level(body)
+                events.append(("LEVEL", None))
+            elif kind == KEYFRAME:
+                self._keyframe(body)
+                events.append(("KEYFRAME", None))
+            elif kind == DELTA and self.synced:
+                self._delta(body, events)
+            body.release()
+            offset = start + length
+        del self.buffer[:offset]
+        return events
+
+    def _level(self, body):
+        kind, wall_count, pellet_count, ghost_count = LEVEL_HEADER.unpack_from(body)
+        numbers = struct.unpack_from(f"<{4 * wall_count + 2 * pellet_count}i", body, LEVEL_HEADER.size)
+        walls = WallList(pygame.Rect(numbers[index:index + 4]) for index in range(0, 4 * wall_count, 4))
+        pellets = [numbers[index:index + 2] for index in range(4 * wall_count, len(numbers), 2)]
+        colors_offset = LEVEL_HEADER.size + 4 * len(numbers)
+        colors = [tuple(body[colors_offset + 3 * index:colors_offset + 3 * index + 3])
+                  for index in range(ghost_count)]
+        self.view = SpectatorView(walls, pellets, colors)
+        self.synced = False
+
+    def _keyframe(self, body):
+        view = self.view
+        (kind, view.tick, view.score, game_over, view.pacman.x, view.pacman.y,
+         ghost_count, pellet_count, fruit_count) = KEYFRAME_HEADER.unpack_from(body)
+        view.game_over = bool(game_over)
+        offset = KEYFRAME_HEADER.size
+        positions = struct.unpack_from(f"<{2 * ghost_count}i", body, offset)
+        offset += 8 * ghost_count
+        for index, ghost in enumerate(view.ghosts):
+            ghost.x, ghost.y = positions[2 * index], positions[2 * index + 1]
+        mask_size = (pellet_count + 7) // 8
+        view.pellets.alive = int.from_bytes(body[offset:offset + mask_size], "little")
+        offset += mask_size
+        fruits = set()
+        for _ in range(fruit_count):
+            fruits.add(FRUIT.unpack_from(body, offset))
+            offset += FRUIT.size
+        for key in list(view.fruit_keys):
+            if key not in fruits:
+                view.remove_fruit(key)
+        for key in fruits - set(view.fruit_keys):
+            view.add_fruit(key)
+        self.synced = True
+
+    def _delta(self, body, events):
+        view = self.view
+        (kind, view.tick, view.score, game_over, pacman_dx, pacman_dy,
+         eaten_count, added_count, removed_count) = DELTA_HEADER.unpack_from(body)
+        view.game_over = bool(game_over)
+        view.pacman.x += pacman_dx
+        view.pacman.y += pacman_dy
+        offset = DELTA_HEADER.size
+        mask_size = (len(view.ghosts) + 7) // 8
+        moved = int.from_bytes(body[offset:offset + mask_size], "little")
+        offset += mask_size
+        index = 0
+        while moved:
+            if moved & 1:
+                ghost = view.ghosts[index]
+                dx, dy = struct.unpack_from("<bb", body, offset)
+                ghost.x += dx
+                ghost.y += dy
+                offset += 2
+            moved >>= 1
+            index += 1
+        for number in struct.unpack_from(f"<{eaten_count}I", body, offset):
+            view.pellets.eat(number)
+            events.append(("PELLET_EATEN", view.pellets.positions[number]))
+        offset += 4 * eaten_count
+        for count, change in ((added_count, view.add_fruit), (removed_count, view.remove_fruit)):
+            for _ in range(count):
+                change(FRUIT.unpack_from(body, offset))
+                offset += FRUIT.size
@@ -0,0 +1,194 @@
+import random
+import numpy as np
+from settings import *
+from maze import maze_walls
+from collision import get_wall_index
+from navigation import get_flow_field
+from ghosts import Ghost
+
+# Direction codes used in the swarm's arrays, in DIRECTIONS order
+STEP_X = np.array([DIRECTION_STEPS[direction][0] for direction in DIRECTIONS], dtype=np.int32)
+STEP_Y = np.array([DIRECTION_STEPS[direction][1] for direction in DIRECTIONS], dtype=np.int32)
+UNREACHABLE = 1 << 20  # Flow distance given to cells that can't reach Pac-Man
+
+
+class GhostSwarm:
+    """
+    Many ghosts stored as NumPy arrays (one row per ghost).
+
+    Positions, speeds and directions live in arrays, and move_towards() picks and
+    applies a step for every ghost in one vectorized pass, so hundreds of ghosts
+    cost about as much as a handful. Indexing the swarm (swarm[i]) returns a
+    Ghost that reads and writes its row, so code written for single ghosts
+    keeps working.
+    """
+    def __init__(self, ghost_starts, walls=None, speed=4, rng=None):
+        """
+        Parameters:
+            ghost_starts (list): (x, y, color) for every ghost.
+            walls (list): pygame.Rect walls of the maze (defaults to maze.maze_walls).
+            speed (int): Pixels every ghost moves per tick.
+            rng (random.Random): Random number source for the starting directions.
+        """
+        self.walls = maze_walls if walls is None else walls
+        self.rng = random if rng is None else rng
+        count = len(ghost_starts)
+        self.x = np.array([start[0] for start in ghost_starts], dtype=np.int32).reshape(count)
+        self.y = np.array([start[1] for start in ghost_starts], dtype=np.int32).reshape(count)
+        self.speed = np.full(count, speed, dtype=np.int32)
+        self.direction = np.array([self.rng.randrange(len(DIRECTIONS)) for _ in range(count)],
+                                  dtype=np.int8)
+        self.colors = [start[2] for start in ghost_starts]
+        self._distance_grid = None
+        self._distance_field = None
+
+    def __len__(self):
+        return len(self.colors)
+
+    def __getitem__(self, index):
+        return GhostView(self, index)
+
+    def __iter__(self):
+        return (GhostView(self, index) for index in range(len(self)))
+
+    def _flow_distances(self, flow_field):
+        """Return the flow field's distances as a (rows, columns) array, converted once per search"""
+        key = (flow_field, flow_field.recomputes)
+        if self._distance_field != key:
+            nav_grid = flow_field.nav_grid
+            grid = np.array(flow_field.distance, dtype=np.int32).reshape(nav_grid.rows, nav_grid.columns)
+            grid[grid < 0] = UNREACHABLE
+            self._distance_grid = grid
+            self._distance_field = key
+        return self._distance_grid
+
+    def move_towards(self, pacman):
+        """
+        Move every ghost one step closer to Pac-Man, avoiding maze walls.
+        Makes the same choices as Ghost.move_towards, but for all ghosts at once.
+        Ghosts with no free step are moved one by one by Ghost.move_towards, which
+        follows the wall.
+        """
+        count = len(self)
+        if not count:
+            return
+        flow_field = get_flow_field(self.walls)
+        flow_field.retarget(pacman.x, pacman.y)
+        nav_grid = flow_field.nav_grid
+        tile_size = nav_grid.tile_size
+        distances = self._flow_distances(flow_field)
+        wall_index = get_wall_index(self.walls)
+        ghosts = np.arange(count)
+        # Every ghost checks four steps and maybe a sideways slide (counted for profiling)
+        wall_index.probes += 5 * count
+        flow_field.lookups += count
+
+        # Candidate positions, one column per direction: shape (ghosts, 4)
+        new_x = self.x[:, None] + STEP_X[None, :] * self.speed[:, None]
+        new_y = self.y[:, None] + STEP_Y[None, :] * self.speed[:, None]
+        can_move = wall_index.are_clear(self.x[:, None], self.y[:, None], new_x - self.x[:, None],
+                                        new_y - self.y[:, None])
+
+        # 1. Follow the flow field: step towards the neighbouring cell closest to Pac-Man
+        column, row = self.x // tile_size, self.y // tile_size
+        on_grid = (column >= 0) & (column < nav_grid.columns) & (row >= 0) & (row < nav_grid.rows)
+        column = np.clip(column, 0, nav_grid.columns - 1)
+        row = np.clip(row, 0, nav_grid.rows - 1)
+        next_column = column[:, None] + STEP_X[None, :]
+        next_row = row[:, None] + STEP_Y[None, :]
+        inside = ((next_column >= 0) & (next_column < nav_grid.columns)
+                  & (next_row >= 0) & (next_row < nav_grid.rows))
+        next_distance = distances[np.clip(next_row, 0, nav_grid.rows - 1),
+                                  np.clip(next_column, 0, nav_grid.columns - 1)]
+        next_distance = np.where(inside, next_distance, UNREACHABLE)
+        path = next_distance.argmin(axis=1)
+        has_path = on_grid & (next_distance[ghosts, path] < distances[row, column])
+        follows = has_path & can_move[ghosts, path]
+
+        # 2. Too far off the middle of the corridor: slide sideways towards the cell centre
+        center_x = column * tile_size + tile_size // 2
+        center_y = row * tile_size + tile_size // 2
+        horizontal = STEP_X[path] != 0
+        slide_x = np.where(horizontal, self.x, self.x + np.clip(center_x - self.x, -self.speed, self.speed))
+        slide_y = np.where(horizontal, self.y + np.clip(center_y - self.y, -self.speed, self.speed), self.y)
+        slides = (has_path & ~follows & ((slide_x != self.x) | (slide_y != self.y))
+                  & wall_index.are_clear(self.x, self.y, slide_x - self.x, slide_y - self.y))
+
+        # 3. Otherwise take the free step with the smallest squared distance to Pac-Man
+        squared_distance = (new_x - pacman.x).astype(np.int64) ** 2 + (new_y - pacman.y).astype(np.int64) ** 2
+        squared_distance[~can_move] = np.iinfo(np.int64).max
+        greedy = squared_distance.argmin(axis=1)
+        chases = ~follows & ~slides & can_move[ghosts, greedy]
+        stuck = ~follows & ~slides & ~chases
+
+        self.x[follows] = new_x[follows, path[follows]]
+        self.y[follows] = new_y[follows, path[follows]]
+        self.direction[follows] = path[follows]
+        self.x[slides] = slide_x[slides]
+        self.y[slides] = slide_y[slides]
+        self.x[chases] = new_x[chases, greedy[chases]]
+        self.y[chases] = new_y[chases, greedy[chases]]
+        for index in stuck.nonzero()[0].tolist():
+            Ghost.move_towards(self[index], pacman)
+
+    def state(self):
+        """Return every ghost's x, y, speed and direction number as one flat tuple (for snapshots)"""
+        return tuple(np.column_stack((self.x, self.y, self.speed, self.direction)).ravel().tolist())
+
+    def set_state(self, values):
+        """Load a flat tuple made by state()"""
+        rows = np.array(values, dtype=np.int32).reshape(-1, 4)
+        self.x[:], self.y[:], self.speed[:], self.direction[:] = rows.T
+
+    def contact_mask(self, pacman, threshold=CATCH_DISTANCE):
+        """
+        Check every ghost against Pac-Man at once.
+        Returns:
+            numpy.ndarray: Boolean array, True for each ghost touching Pac-Man.
+        """
+        dx = self.x - pacman.x
+        dy = self.y - pacman.y
+        return dx * dx + dy * dy < threshold * threshold
+
+
+class GhostView(Ghost):
+    """A Ghost whose position, speed and direction are one row of a GhostSwarm"""
+    def __init__(self, swarm, index):
+        # Ghost.__init__ is skipped on purpose: the state already lives in the swarm
+        self.swarm = swarm
+        self.index = index
+        self.color = swarm.colors[index]
+        self.walls = swarm.walls
+        self.rng = swarm.rng
+
+    @property
+    def x(self):
+        return int(self.swarm.x[self.index])
+
+    @x.setter
+    def x(self, value):
+        self.swarm.x[self.index] = value
+
+    @property
+    def y(self):
+        return int(self.swarm.y[self.index])
+
+    @y.setter
+    def y(self, value):
+        self.swarm.y[self.index] = value
+
+    @property
+    def speed(self):
+        return int(self.swarm.speed[self.index])
+
+    @speed.setter
+    def speed(self, value):
+        self.swarm.speed[self.index] = value
+
+    @property
+    def direction(self):
+        return DIRECTIONS[self.swarm.direction[self.index]]
+
+    @direction.setter
+    def direction(self, value):
+        self.swarm.direction[self.index] = DIRECTIONS.index(value)
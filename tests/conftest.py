@@ -0,0 +1,12 @@
+"""
+Shared setup for the tests: the game's modules live in the folder above, and
+pygame gets a dummy display so the tests run without a window.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
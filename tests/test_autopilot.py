@@ -0,0 +1,46 @@
+import pytest
+
+from settings import *
+from engine import GameEngine
+from autopilot import ForwardModel, pack
+from test_engine import actions
+
+
+def level_options(level):
+    if level == "default":
+        return {}
+    pytest.importorskip("numpy")
+    from mazegen import generate_maze
+    # The small maze steers by a next-hop table; the big one has too many cells
+    # for one, so the model falls back on flow fields
+    return generate_maze(40 if level == "small" else 100, density=0.7, seed=3).engine_options()
+
+
+@pytest.mark.parametrize("level", ["default", "small", "big"])
+@pytest.mark.parametrize("seed", range(3))
+def test_model_plays_like_the_engine(level, seed):
+    engine = GameEngine(seed=seed, **level_options(level))
+    model = ForwardModel(engine)
+    pacman, ghosts, alive = model.state(engine)
+    for tick, move in enumerate(actions(400, seed=seed)):
+        direction = -1 if move is None else DIRECTIONS.index(move)
+        pacman, alive, played, caught = model.advance(pacman, ghosts, alive, direction, 1)
+        engine.step(move)
+        assert played == 1
+        assert pacman == pack(engine.pacman.x, engine.pacman.y), tick
+        assert ghosts == [pack(ghost.x, ghost.y) for ghost in engine.ghosts], tick
+        assert alive == engine.pellets.alive
+        assert caught == engine.game_over
+        if caught:
+            break
+
+
+def test_model_stops_when_pacman_is_caught():
+    engine = GameEngine(seed=0)
+    model = ForwardModel(engine)
+    pacman, ghosts, alive = model.state(engine)
+    pacman, alive, played, caught = model.advance(pacman, ghosts, alive, -1, 10000)
+    for _ in range(played):
+        engine.step(None)
+    assert caught and engine.game_over
+    assert ghosts == [pack(ghost.x, ghost.y) for ghost in engine.ghosts]
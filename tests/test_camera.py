@@ -0,0 +1,51 @@
+import pygame
+import pytest
+
+from engine import GameEngine
+from camera import Camera, ChunkCache, level_size
+
+
+@pytest.fixture
+def screen():
+    pygame.display.init()
+    yield pygame.display.set_mode((200, 200))
+    pygame.display.quit()
+
+
+def pixels(surface):
+    return pygame.image.tostring(surface, "RGB")
+
+
+def test_least_recently_used_chunk_is_evicted(screen):
+    engine = GameEngine(seed=0, ghost_starts=[])
+    chunks = ChunkCache(engine.walls, engine.pellets.positions, screen, chunk_size=100, max_chunks=3)
+    first = pixels(chunks.get((0, 0), engine.pellets))
+    chunks.get((1, 0), engine.pellets)
+    chunks.get((2, 0), engine.pellets)
+    chunks.get((0, 0), engine.pellets)  # Seen again: (1, 0) is now the oldest
+    assert chunks.renders == 3 and chunks.evictions == 0
+    chunks.get((3, 0), engine.pellets)
+    assert list(chunks.chunks) == [(2, 0), (0, 0), (3, 0)]
+    assert chunks.evictions == 1
+    chunks.get((1, 0), engine.pellets)  # Thrown away, so drawn again
+    assert list(chunks.chunks) == [(0, 0), (3, 0), (1, 0)]
+    assert chunks.renders == 5 and chunks.evictions == 2
+    # The reused surface was drawn afresh: nothing of the chunk it held before shows
+    chunks.get((2, 0), engine.pellets)
+    chunks.get((0, 0), engine.pellets)
+    assert pixels(chunks.get((0, 0), engine.pellets)) == first
+
+
+def test_drawing_through_a_small_cache_matches_a_big_one(screen):
+    engine = GameEngine(seed=0, ghost_starts=[])
+    camera = Camera(screen.get_size(), level_size(engine.walls))
+    small = ChunkCache(engine.walls, engine.pellets.positions, screen, chunk_size=100, max_chunks=9)
+    big = ChunkCache(engine.walls, engine.pellets.positions, screen, chunk_size=100, max_chunks=100)
+    expected = pygame.Surface(screen.get_size())
+    for x, y in [(0, 0), (600, 0), (600, 600), (0, 600), (300, 300), (0, 0)]:
+        camera.follow(x, y)
+        small.draw(screen, camera, engine.pellets)
+        big.draw(expected, camera, engine.pellets)
+        assert pixels(screen) == pixels(expected), (x, y)
+    assert len(small.chunks) <= 9 and small.evictions > 0
+    assert big.evictions == 0
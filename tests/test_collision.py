@@ -0,0 +1,68 @@
+import random
+import pygame
+import pytest
+
+from settings import *
+from collision import WallIndex, WallList, get_wall_index
+from maze import maze_walls
+
+
+def test_fast_move_stops_at_a_thin_wall():
+    index = WallIndex(WallList([pygame.Rect(100, 0, 10, 200)]))
+    half = HITBOX_SIZE // 2
+    # Faster than the wall is thick: testing only the end of the move would jump through it
+    for speed in (10, 11, 48, 200):
+        x, y, blocked = index.sweep(80, 100, speed, 0)
+        assert blocked and (x, y) == (100 - half, 100), speed
+        x, y, blocked = index.sweep(130, 100, -speed, 0)
+        assert blocked and (x, y) == (110 + half, 100), speed
+    assert index.sweep(80, 100, 0, 48) == (80, 148, False)
+
+
+def test_contact_point_is_exact():
+    index = WallIndex(WallList([pygame.Rect(0, 300, 200, 10)]))
+    half = HITBOX_SIZE // 2
+    x, y, blocked = index.sweep(50, 200, 0, 97)
+    assert blocked and (x, y) == (50, 300 - half)
+    assert index.is_free(x, y) and not index.is_free(x, y + 1)
+    # Exactly reaching the wall isn't blocked; one pixel more is
+    assert index.sweep(50, 200, 0, 300 - half - 200) == (50, 300 - half, False)
+    assert index.sweep(50, 200, 0, 300 - half - 199)[2]
+
+
+def test_diagonal_moves_along_x_first():
+    index = WallIndex(WallList([pygame.Rect(100, 0, 10, 50)]))
+    # The x move hits the wall's bottom end; the y move then goes on from there
+    x, y, blocked = index.sweep(60, 40, 40, 40)
+    assert blocked and (x, y) == (100 - HITBOX_SIZE // 2, 80)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_vectorized_checks_match_sweep(seed):
+    np = pytest.importorskip("numpy")
+    from benchmark import make_level
+    walls = maze_walls if seed == 0 else make_level(100, 1, 1, size=1200, seed=seed)["walls"]
+    index = WallIndex(walls)
+    rng = random.Random(seed)
+    points = [(rng.randrange(-40, 1240), rng.randrange(-40, 1240)) for _ in range(3000)]
+    points = [(x, y) for x, y in points if index.is_free(x, y)]
+    x, y = np.array(points).T
+    for dx, dy in [(4, 0), (-4, 0), (0, 4), (0, -4), (37, 0), (0, -37), (5, -6), (-13, 9)]:
+        expected = [index.is_clear(point_x, point_y, dx, dy) for point_x, point_y in points]
+        assert index.are_clear(x, y, dx, dy).tolist() == expected, (dx, dy)
+    for direction in DIRECTIONS:
+        step_x, step_y = DIRECTION_STEPS[direction]
+        expected = []
+        for point_x, point_y in points:
+            end_x, end_y, blocked = index.sweep(point_x, point_y, step_x * 40, step_y * 40)
+            expected.append(abs(end_x - point_x) + abs(end_y - point_y))
+        assert index.travels(x, y, step_x, step_y, 40).tolist() == expected, direction
+
+
+def test_replacing_a_wall_rebuilds_the_shared_index():
+    walls = WallList([pygame.Rect(100, 0, 10, 200)])
+    assert not get_wall_index(walls).is_free(100, 100)
+    walls[0] = pygame.Rect(300, 0, 10, 200)
+    assert get_wall_index(walls).is_free(100, 100)
+    with pytest.raises(TypeError):
+        get_wall_index([pygame.Rect(100, 0, 10, 200)])  # A plain list wouldn't notice that change
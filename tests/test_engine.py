@@ -0,0 +1,59 @@
+import random
+import pytest
+
+from settings import *
+from engine import GameEngine
+from levels import load_level
+
+
+def actions(count, seed=0):
+    """A random move held for 8 ticks at a time"""
+    rng = random.Random(seed)
+    moves = []
+    for tick in range(count):
+        if tick % 8 == 0:
+            move = rng.choice(DIRECTIONS + [None])
+        moves.append(move)
+    return moves
+
+
+def play(engine, moves):
+    """Run the moves and return the snapshot after every tick"""
+    snapshots = []
+    for move in moves:
+        engine.step(move)
+        snapshots.append(engine.snapshot())
+    return snapshots
+
+
+@pytest.fixture(params=["default", "classic"])
+def options(request):
+    return {} if request.param == "default" else load_level(f"{LEVEL_FOLDER}/classic.txt").engine_options()
+
+
+def test_same_seed_plays_the_same(options):
+    moves = actions(400)
+    assert play(GameEngine(seed=3, **options), moves) == play(GameEngine(seed=3, **options), moves)
+
+
+def test_restore_plays_on_the_same(options):
+    engine = GameEngine(seed=3, **options)
+    moves = actions(400, seed=1)
+    play(engine, moves[:150])
+    snapshot = engine.snapshot()
+    expected = play(engine, moves[150:])
+    engine.restore(snapshot)
+    assert engine.snapshot() == snapshot
+    assert play(engine, moves[150:]) == expected
+
+
+def test_save_state_loads_into_a_new_engine(options):
+    engine = GameEngine(seed=3, **options)
+    moves = actions(400, seed=2)
+    play(engine, moves[:200])
+    data = engine.save_state()
+    copy = GameEngine(seed=3, **options)
+    copy.load_state(data)
+    assert copy.snapshot() == engine.snapshot()
+    assert copy.save_state() == data
+    assert play(copy, moves[200:]) == play(engine, moves[200:])
@@ -0,0 +1,49 @@
+import os
+
+from settings import *
+from navigation import get_flow_field
+from levels import cache_path, load_level, parse_level, read_compiled, source_hash, walkable_grid
+
+LEVEL_TEXT = """\
+; A small test level
+############
+#p . . G  F#
+#  ####    #
+#g .  . .  #
+############
+"""
+
+
+def write_level(folder, text=LEVEL_TEXT):
+    path = str(folder / "small.txt")
+    with open(path, "w") as file:
+        file.write(text)
+    return path
+
+
+def test_compiled_cache_round_trip(tmp_path):
+    path = write_level(tmp_path)
+    level = load_level(path)  # Compiles and writes the cache
+    assert os.path.exists(cache_path(path))
+    with open(path, "rb") as file:
+        cached = read_compiled(cache_path(path), source_hash(file.read()))
+    assert cached is not None
+    parsed = parse_level(LEVEL_TEXT, "small")
+    for loaded in (level, cached):
+        assert [tuple(wall) for wall in loaded.walls] == [tuple(wall) for wall in parsed.walls]
+        assert list(loaded.pellet_positions) == list(parsed.pellet_positions)
+        assert tuple(loaded.pacman_start) == tuple(parsed.pacman_start)
+        assert [tuple(ghost) for ghost in loaded.ghost_starts] == [tuple(ghost) for ghost in parsed.ghost_starts]
+        assert list(loaded.fruit_positions) == list(parsed.fruit_positions)
+    # The cached navigation grid is the one probing the walls would give
+    assert bytes(get_flow_field(cached.walls).nav_grid.walkable) == walkable_grid(parsed.walls)
+
+
+def test_changed_text_is_compiled_again(tmp_path):
+    path = write_level(tmp_path)
+    load_level(path)
+    changed = LEVEL_TEXT.replace("G", " ")
+    write_level(tmp_path, changed)
+    with open(path, "rb") as file:
+        assert read_compiled(cache_path(path), source_hash(file.read())) is None
+    assert len(load_level(path).ghost_starts) == 1
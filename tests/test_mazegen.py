@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from levels import walkable_grid
+from mazegen import MIN_TILES, generate_maze, maze_tiles, walkable_tiles
+
+
+@pytest.mark.parametrize("size", range(MIN_TILES, 61))
+def test_every_size_generates(size):
+    level = generate_maze(size, seed=size)
+    x, y = level.pacman_start
+    assert all((ghost_x, ghost_y) != (x, y) for ghost_x, ghost_y, color in level.ghost_starts)
+    assert level.ghost_starts
+    assert level.pellet_positions
+
+
+@pytest.mark.parametrize("columns, rows", [(MIN_TILES, 40), (40, MIN_TILES), (23, 17)])
+def test_rectangular_mazes_generate(columns, rows):
+    level = generate_maze(columns, rows)
+    assert level.ghost_starts
+
+
+@pytest.mark.parametrize("size", range(MIN_TILES, 61))
+def test_walkable_cells_match_probing_the_walls(size):
+    tiles = maze_tiles(size, size, density=0.7, seed=size)
+    level = generate_maze(size, density=0.7, seed=size)
+    assert walkable_tiles(tiles) == walkable_grid(level.walls)
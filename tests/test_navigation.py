@@ -0,0 +1,73 @@
+import pygame
+
+from settings import *
+from collision import WallList
+from maze import maze_walls
+from navigation import FlowField, NavGrid
+
+
+def bfs_distances(nav_grid, target):
+    """Plain breadth-first search over walkable (row, column) neighbours, to check the field against"""
+    distance = {target: 0}
+    queue = [target]
+    for cell in queue:
+        row, column = divmod(cell, nav_grid.columns)
+        for next_row, next_column in ((row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1)):
+            next_cell = next_row * nav_grid.columns + next_column
+            if (0 <= next_row < nav_grid.rows and 0 <= next_column < nav_grid.columns
+                    and nav_grid.walkable[next_cell] and next_cell not in distance):
+                distance[next_cell] = distance[cell] + 1
+                queue.append(next_cell)
+    return [distance.get(cell, -1) for cell in range(len(nav_grid.walkable))]
+
+
+def test_distances_in_an_open_field_are_manhattan():
+    nav_grid = NavGrid(WallList())
+    flow_field = FlowField(nav_grid)
+    flow_field.retarget(305, 205)
+    target_row, target_column = 20, 30
+    for cell, distance in enumerate(flow_field.distance):
+        row, column = divmod(cell, nav_grid.columns)
+        assert distance == abs(row - target_row) + abs(column - target_column)
+
+
+def test_distances_match_a_plain_search():
+    nav_grid = NavGrid(maze_walls)
+    flow_field = FlowField(nav_grid)
+    for x, y in [PACMAN_START, (100, 100), (500, 500)]:
+        flow_field.retarget(x, y)
+        assert flow_field.distance == bfs_distances(nav_grid, nav_grid.cell_at(x, y))
+
+
+def test_each_step_gets_closer():
+    nav_grid = NavGrid(maze_walls)
+    flow_field = FlowField(nav_grid)
+    flow_field.retarget(*PACMAN_START)
+    for cell, distance in enumerate(flow_field.distance):
+        if distance <= 0:
+            continue
+        x, y = nav_grid.cell_center(cell)
+        dx, dy = DIRECTION_STEPS[flow_field.direction_at(x, y)]
+        next_cell = nav_grid.cell_at(x + dx * nav_grid.tile_size, y + dy * nav_grid.tile_size)
+        assert flow_field.distance[next_cell] == distance - 1
+
+
+def test_walled_off_cells_have_no_direction():
+    # A box with 10-pixel walls around (300, 300): nothing inside can reach out
+    box = WallList([pygame.Rect(240, 240, 130, 10), pygame.Rect(240, 360, 130, 10),
+                    pygame.Rect(240, 240, 10, 130), pygame.Rect(360, 240, 10, 130)])
+    flow_field = FlowField(NavGrid(box))
+    flow_field.retarget(100, 100)
+    assert flow_field.distance[flow_field.nav_grid.cell_at(305, 305)] == -1
+    assert flow_field.direction_at(305, 305) is None
+    assert flow_field.direction_at(100, 100) is None  # Already in the target's cell
+    assert flow_field.direction_at(-5, 100) is None  # Off the grid
+
+
+def test_search_runs_again_only_in_a_new_cell():
+    flow_field = FlowField(NavGrid(maze_walls))
+    flow_field.retarget(300, 300)
+    flow_field.retarget(309, 305)
+    assert flow_field.recomputes == 1
+    flow_field.retarget(310, 305)
+    assert flow_field.recomputes == 2
@@ -0,0 +1,25 @@
+import random
+import pytest
+
+pytest.importorskip("numpy")
+
+from maze import maze_walls
+from navigation import FlowField, get_flow_field
+from next_hop import NextHopTable
+
+
+def generated_walls():
+    from mazegen import generate_maze
+    return generate_maze(40, density=0.6, seed=2).walls
+
+
+@pytest.mark.parametrize("make_walls", [lambda: maze_walls, generated_walls], ids=["default", "generated"])
+def test_table_steps_like_the_flow_field(make_walls):
+    nav_grid = get_flow_field(make_walls()).nav_grid
+    table = NextHopTable(nav_grid)
+    flow_field = FlowField(nav_grid)
+    for target in random.Random(0).sample(table.cells, 40):
+        flow_field.retarget(*nav_grid.cell_center(target))
+        for cell in table.cells:
+            assert table.direction(cell, target) == flow_field.direction_at(*nav_grid.cell_center(cell)), \
+                (cell, target)
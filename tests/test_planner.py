@@ -0,0 +1,42 @@
+import time
+
+from maze import maze_walls
+from engine import GameEngine
+from planner import GhostPlanner, chase_plan
+from test_engine import actions, play
+
+
+def slow_chase_plan(walls):
+    """chase_plan, taking long enough that a plan is still being made when the game jumps"""
+    plan = chase_plan(walls)
+    def slow_plan(pacman, ghosts):
+        time.sleep(0.02)
+        return plan(pacman, ghosts)
+    return slow_plan
+
+
+def test_waiting_planner_plays_the_same_every_time():
+    games = []
+    for _ in range(2):
+        planner = GhostPlanner(maze_walls, use_process=False, wait=None)
+        try:
+            games.append(play(GameEngine(seed=4, ghost_planner=planner), actions(120, seed=3)))
+            assert planner.fallbacks == 0
+        finally:
+            planner.close()
+    assert games[0] == games[1]
+
+
+def test_waiting_planner_uses_every_plan_after_a_restore():
+    planner = GhostPlanner(maze_walls, slow_chase_plan, use_process=False, wait=None)
+    try:
+        engine = GameEngine(seed=1, ghost_planner=planner)
+        moves = actions(60, seed=5)
+        play(engine, moves[:30])
+        snapshot = engine.snapshot()
+        expected = play(engine, moves[30:])
+        engine.restore(snapshot)  # While the plan asked for after the last tick is still being made
+        assert play(engine, moves[30:]) == expected
+        assert planner.fallbacks == 0
+    finally:
+        planner.close()
@@ -0,0 +1,26 @@
+from engine import GameEngine
+from replay import Replay, ReplayRecorder
+from test_engine import actions
+
+
+def test_seek_matches_full_playback(tmp_path):
+    path = str(tmp_path / "game.rpl")
+    engine = GameEngine(seed=7)
+    recorded = [engine.snapshot()]  # recorded[t]: the state just before tick t ran
+    with ReplayRecorder(path, engine, keyframe_interval=50) as recorder:
+        for move in actions(300, seed=4):
+            recorder.step(move)
+            recorded.append(engine.snapshot())
+
+    with Replay(path) as replay:
+        assert len(replay) == 300
+        engine = GameEngine(seed=7)
+        played = [engine.snapshot()]
+        for state, events in replay.play(engine):
+            played.append(engine.snapshot())
+        assert played == recorded
+
+        for tick in (0, 1, 49, 50, 51, 149, 173, 299, 300):
+            engine = GameEngine(seed=7)
+            replay.seek(engine, tick)
+            assert engine.snapshot() == recorded[tick], f"tick {tick}"
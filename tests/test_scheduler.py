@@ -0,0 +1,88 @@
+from settings import *
+from engine import GameEngine
+from fruits import FRUIT_DATA
+from scheduler import Scheduler
+
+
+def test_timers_run_in_due_order():
+    scheduler = Scheduler()
+    ran = []
+    scheduler.schedule(30, ran.append, "c")
+    scheduler.schedule(10, ran.append, "a")
+    scheduler.schedule(30, ran.append, "d")  # Same time as "c": runs after it
+    scheduler.schedule(20, lambda: ran.append(("b", scheduler.now)))
+    scheduler.advance_to(25)
+    assert ran == ["a", ("b", 20)]
+    assert scheduler.now == 25
+    scheduler.advance(100)
+    assert ran == ["a", ("b", 20), "c", "d"]
+    assert len(scheduler) == 0
+
+
+def test_timer_scheduled_by_a_callback_runs_in_the_same_advance():
+    scheduler = Scheduler()
+    ran = []
+    scheduler.schedule(10, lambda: scheduler.schedule(5, ran.append, scheduler.now))
+    scheduler.advance_to(15)
+    assert ran == [10]  # Scheduled at time 10 for time 15
+
+
+def test_cancel():
+    scheduler = Scheduler()
+    ran = []
+    keep = scheduler.schedule(10, ran.append, "keep")
+    drop = scheduler.schedule(5, ran.append, "drop")
+    scheduler.cancel(drop)
+    scheduler.cancel(drop)  # A second cancel changes nothing
+    assert len(scheduler) == 1
+    scheduler.advance_to(20)
+    assert ran == ["keep"]
+    scheduler.cancel(keep)  # Already ran: nothing to cancel
+    assert len(scheduler) == 0 and scheduler.cancelled == 0
+
+
+def test_cancelled_timers_are_compacted():
+    scheduler = Scheduler()
+    ran = []
+    timers = [scheduler.schedule(delay, ran.append, delay) for delay in range(200)]
+    for timer in timers[:150]:
+        scheduler.cancel(timer)
+    # The heap was rebuilt without the dead entries once they were most of it
+    assert len(scheduler.heap) < 200
+    assert len(scheduler) == 50
+    scheduler.advance_to(1000)
+    assert ran == list(range(150, 200))
+
+
+def test_fruit_expires_on_the_game_clock():
+    engine = GameEngine(seed=0, ghost_starts=[])
+    engine.spawn_fruit("cherry", (500, 500))
+    # Expiry is due at the tick whose end reaches the fruit's duration
+    last_tick = -(-FRUIT_DATA["cherry"]["duration"] * TICK_RATE // 1000) - 1
+    for tick in range(last_tick):
+        assert engine.step(None)[1] == []
+    assert engine.step(None)[1] == [("FRUIT_EXPIRED", "cherry")]
+    assert not engine.fruits and len(engine.scheduler) == 0
+
+
+def test_eaten_fruit_cancels_its_timer():
+    engine = GameEngine(seed=0, ghost_starts=[])
+    engine.spawn_fruit("banana", PACMAN_START)
+    assert ("FRUIT_EATEN", "banana") in engine.step(None)[1]
+    assert len(engine.scheduler) == 0
+
+
+def test_restored_fruit_expires_at_the_same_tick():
+    engine = GameEngine(seed=0, ghost_starts=[])
+    engine.spawn_fruit("key", (500, 500))
+    for _ in range(50):
+        engine.step(None)
+    snapshot = engine.snapshot()
+    expired_at = None
+    while expired_at is None:
+        if engine.step(None)[1]:
+            expired_at = engine.tick
+    engine.restore(snapshot)
+    while not engine.step(None)[1]:
+        pass
+    assert engine.tick == expired_at
@@ -0,0 +1,32 @@
+from simulation import TripleBuffer
+
+
+def test_take_before_publish():
+    buffer = TripleBuffer()
+    assert buffer.take() is None
+    assert buffer.duplicated == 0
+
+
+def test_dropped_and_duplicated_counts():
+    buffer = TripleBuffer()
+    buffer.publish(1)
+    assert buffer.take() == 1
+    assert buffer.take() == 1  # Nothing new: the same value again
+    assert buffer.duplicated == 1
+
+    for value in (2, 3, 4):
+        buffer.publish(value)
+    assert buffer.take() == 4  # Only the newest is seen
+    assert buffer.dropped == 2
+    assert buffer.published == 4
+    assert list(buffer.depths) == [1, 0, 3]
+
+
+def test_slots_are_not_shared_between_writer_and_reader():
+    buffer = TripleBuffer()
+    buffer.publish("a")
+    front = buffer.take()
+    buffer.publish("b")
+    buffer.publish("c")
+    assert front == "a"  # The reader's value is untouched by later publishes
+    assert buffer.take() == "c"
@@ -0,0 +1,33 @@
+import select
+import socket
+
+from engine import GameEngine
+from stream import StateStreamer, StreamDecoder
+from autopilot import Autopilot
+
+
+def test_spectator_view_follows_the_game():
+    engine = GameEngine(seed=5)
+    # A short keyframe interval, so the game is sent as both keyframes and deltas
+    streamer = StateStreamer(engine, port=0, keyframe_interval=10)
+    client = socket.create_connection(streamer.server.getsockname())
+    decoder = StreamDecoder()
+    pilot = Autopilot(engine, rollouts=20)
+    kinds = set()
+    try:
+        streamer.publish()
+        while not engine.game_over and engine.tick < 400:
+            streamer.publish(engine.step(pilot.act())[1])
+            # Read until the spectator has caught up with this tick
+            while not (decoder.synced and decoder.view.tick == engine.tick):
+                assert select.select([client], [], [], 5)[0], "the stream stalled"
+                kinds.update(name for name, data in decoder.feed(client.recv(65536)))
+            view = decoder.view
+            assert view.get_state() == engine.get_state()
+            assert view.pellets.alive == engine.pellets.alive
+            assert {(fruit.type, fruit.rect.center) for fruit in view.fruits} == \
+                   {(fruit.type, fruit.rect.center) for fruit in engine.fruits}
+    finally:
+        client.close()
+        streamer.close()
+    assert {"LEVEL", "KEYFRAME", "PELLET_EATEN"} <= kinds
@@ -0,0 +1,28 @@
+import random
+import pytest
+
+pytest.importorskip("numpy")
+
+from settings import *
+from engine import GameEngine
+from benchmark import make_level
+
+
+@pytest.mark.parametrize("seed", [0, 5, 8, 9])
+def test_swarm_moves_like_single_ghosts(seed):
+    # Random levels whose ghosts reach the edge of the collision bitmap early on
+    single = GameEngine(seed=1, **make_level(12, 24, 20, seed=seed))
+    swarm = GameEngine(seed=1, use_swarm=True, **make_level(12, 24, 20, seed=seed))
+    policy = random.Random(seed)
+    action = None
+    for tick in range(400):
+        if tick % 8 == 0:
+            action = policy.choice(DIRECTIONS)
+        single.step(action)
+        swarm.step(action)
+        assert [(ghost.x, ghost.y) for ghost in swarm.ghosts] == \
+               [(ghost.x, ghost.y) for ghost in single.ghosts], f"tick {tick}"
+        assert swarm.game_over == single.game_over
+        if single.game_over:
+            single.reset()
+            swarm.reset()
@@ -0,0 +1,37 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from settings import *
+from engine import GameEngine
+from levels import load_level
+from vec_env import VecPacmanEnv
+
+
+@pytest.mark.parametrize("level", ["default", "classic"])
+def test_games_play_like_the_engine(level):
+    options = {} if level == "default" else load_level(f"{LEVEL_FOLDER}/classic.txt").engine_options()
+    env = VecPacmanEnv(8, **options)
+    engines = [GameEngine(seed=index, **options) for index in range(env.num_envs)]
+    policy = random.Random(0)
+    ended = 0
+    for tick in range(600):
+        if tick % 8 == 0:
+            actions = np.array([policy.randrange(5) for _ in engines])
+        observations, rewards, dones, info = env.step(actions)
+        for index, engine in enumerate(engines):
+            action = actions[index]
+            state, events = engine.step(DIRECTIONS[action - 1] if action else None)
+            assert rewards[index] == sum(PELLET_POINTS for name, data in events if name == "PELLET_EATEN")
+            done = engine.game_over or not engine.pellets or engine.tick >= env.max_ticks
+            assert dones[index] == done, (tick, index)
+            if done:
+                assert info["score"][index] == engine.score
+                engine.reset()
+                ended += 1
+                continue
+            assert (env.pacman_x[index], env.pacman_y[index]) == (engine.pacman.x, engine.pacman.y)
+            assert list(zip(env.ghost_x[index].tolist(), env.ghost_y[index].tolist())) == \
+                   [(ghost.x, ghost.y) for ghost in engine.ghosts], (tick, index)
+    assert ended  # The ghosts caught Pac-Man at least once
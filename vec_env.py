@@ -0,0 +1,242 @@
+import numpy as np
+from settings import *
+from maze import maze_walls
+from pellets import pellets
+from collision import get_wall_index
+from navigation import FlowField, get_flow_field
+
+# Action codes: 0 stands still, 1-4 move in DIRECTIONS order (the same codes as replay files)
+STEP_X = np.array([0] + [DIRECTION_STEPS[direction][0] for direction in DIRECTIONS], dtype=np.int32)
+STEP_Y = np.array([0] + [DIRECTION_STEPS[direction][1] for direction in DIRECTIONS], dtype=np.int32)
+UNREACHABLE = 1 << 20  # Flow distance given to cells that can't reach the target
+MAX_CACHED_DISTANCES = 1 << 24  # Flow distances kept (64 MB) before the cache starts over
+
+
+class VecPacmanEnv:
+    """
+    Many independent games stepped together, for training agents.
+
+    Every game's Pac-Man, ghosts and pellets live in NumPy arrays with one row
+    per game, and step() moves all of them in a single vectorized pass: wall
+    checks are vectorized sweeps (WallIndex.travels and WallIndex.are_clear),
+    and pellet and catch checks compare every game at once.
+
+    The rules are the engine's: Pac-Man slides until his hitbox touches a wall
+    (WallIndex.sweep), then every ghost chases him along the shortest path as
+    Ghost.steer_towards does, then Pac-Man eats every pellet within
+    PELLET_DISTANCE and is caught by any ghost within the catch distance. The
+    ghosts read flow field distances to their game's Pac-Man cell; each cell
+    Pac-Man reaches is searched once and kept, so after the first few hundred
+    ticks no game needs a search. The one difference is that there are no fruits.
+
+    A game ends when Pac-Man is caught, the last pellet is eaten or it reaches
+    max_ticks, and it is reset at once, so step() can be called forever.
+
+    Usage:
+        env = VecPacmanEnv(1024)
+        observations = env.reset()
+        actions = np.random.randint(0, 5, size=1024)
+        observations, rewards, dones, info = env.step(actions)
+    """
+    def __init__(self, num_envs, walls=None, pellet_positions=None, pacman_start=PACMAN_START,
+                 ghost_starts=None, pacman_speed=8, ghost_speed=4, catch_distance=CATCH_DISTANCE,
+                 max_ticks=3000):
+        """
+        Parameters:
+            num_envs (int): Number of games.
+            walls (list): pygame.Rect walls of the maze (defaults to maze.maze_walls).
+            pellet_positions (list): (x, y) pellet positions (defaults to the pellets in pellets.py).
+            pacman_start (tuple): Pac-Man's (x, y) start position.
+            ghost_starts (list): (x, y, color) for every ghost (defaults to GHOST_STARTS).
+            pacman_speed (int): Pac-Man's speed in pixels per tick.
+            ghost_speed (int): Every ghost's speed in pixels per tick.
+            catch_distance (int): How close a ghost has to get to catch Pac-Man.
+            max_ticks (int): Ticks after which a game is cut off and reset.
+        """
+        self.num_envs = num_envs
+        self.walls = maze_walls if walls is None else walls
+        if pellet_positions is None:
+            pellet_positions = [(pellet.x, pellet.y) for pellet in pellets]
+        ghost_starts = GHOST_STARTS if ghost_starts is None else ghost_starts
+        self.wall_index = get_wall_index(self.walls)
+        self.nav_grid = get_flow_field(self.walls).nav_grid
+        self.flow_field = FlowField(self.nav_grid)  # Our own, so the engine's shared field keeps its target
+        self.walkable = np.array(self.nav_grid.walkable, dtype=bool)
+        self._forget_distances()
+        self.width = max([WIDTH] + [wall.right for wall in self.walls])
+        self.height = max([HEIGHT] + [wall.bottom for wall in self.walls])
+        self.pacman_start = np.array(pacman_start, dtype=np.int32)
+        self.ghost_starts = np.array([(x, y) for x, y, _ in ghost_starts], dtype=np.int32).reshape(-1, 2)
+        self.pellet_x = np.array([x for x, y in pellet_positions], dtype=np.int32)
+        self.pellet_y = np.array([y for x, y in pellet_positions], dtype=np.int32)
+        self.pacman_speed = pacman_speed
+        self.ghost_speed = ghost_speed
+        self.catch_distance = catch_distance
+        self.max_ticks = max_ticks
+
+        ghost_count, pellet_count = len(self.ghost_starts), len(self.pellet_x)
+        self.pacman_x = np.empty(num_envs, dtype=np.int32)
+        self.pacman_y = np.empty(num_envs, dtype=np.int32)
+        self.ghost_x = np.empty((num_envs, ghost_count), dtype=np.int32)
+        self.ghost_y = np.empty((num_envs, ghost_count), dtype=np.int32)
+        self.pellets = np.empty((num_envs, pellet_count), dtype=bool)  # True while a pellet is on the board
+        self.score = np.empty(num_envs, dtype=np.int64)
+        self.tick = np.empty(num_envs, dtype=np.int64)
+        # Observation: Pac-Man's x, y, every ghost's x, y (scaled to 0-1), then the pellet mask
+        self.observation_size = 2 + 2 * ghost_count + pellet_count
+        self.scale = np.float32(1 / max(self.width, self.height))
+        self.reset()
+
+    def reset(self):
+        """
+        Start every game again.
+        Returns:
+            numpy.ndarray: Observations, shape (num_envs, observation_size).
+        """
+        self._reset_games(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    def _reset_games(self, mask):
+        self.pacman_x[mask] = self.pacman_start[0]
+        self.pacman_y[mask] = self.pacman_start[1]
+        self.ghost_x[mask] = self.ghost_starts[:, 0]
+        self.ghost_y[mask] = self.ghost_starts[:, 1]
+        self.pellets[mask] = True
+        self.score[mask] = 0
+        self.tick[mask] = 0
+
+    def _forget_distances(self):
+        # distances[distance_row[cell]] holds every cell's flow distance to target cell
+        # `cell`; row 0, which nothing reaches, stands for targets not searched yet
+        cells = len(self.walkable)
+        self.distances = np.full((1, cells), UNREACHABLE, dtype=np.int32)
+        self.distance_row = np.zeros(cells, dtype=np.intp)
+
+    def _distance_rows(self, target_cells):
+        """Return the row of self.distances for each target cell (-1 is off the grid), searching new ones"""
+        on_grid = target_cells >= 0
+        new = np.unique(target_cells[on_grid & (self.distance_row[np.maximum(target_cells, 0)] == 0)])
+        if len(new):
+            cells = len(self.walkable)
+            if (len(self.distances) + len(new)) * cells > MAX_CACHED_DISTANCES:
+                self._forget_distances()
+                new = np.unique(target_cells[on_grid])
+            rows = []
+            for cell in new.tolist():
+                self.flow_field.retarget(*self.nav_grid.cell_center(cell))
+                rows.append(self.flow_field.distance)
+                self.distance_row[cell] = len(self.distances) + len(rows) - 1
+            rows = np.array(rows, dtype=np.int32)
+            rows[rows < 0] = UNREACHABLE
+            self.distances = np.concatenate([self.distances, rows])
+        return np.where(on_grid, self.distance_row[np.maximum(target_cells, 0)], 0)
+
+    def _cells_at(self, x, y):
+        """Vectorized NavGrid.cell_at: the cell of every (x, y), -1 off the grid"""
+        nav_grid = self.nav_grid
+        column, row = x // nav_grid.tile_size, y // nav_grid.tile_size
+        on_grid = (column >= 0) & (column < nav_grid.columns) & (row >= 0) & (row < nav_grid.rows)
+        return np.where(on_grid, row * nav_grid.columns + column, -1)
+
+    def step(self, actions):
+        """
+        Advance every game by one tick.
+        Parameters:
+            actions (numpy.ndarray): One action code per game (0 stands still, 1-4 are DIRECTIONS).
+        Returns:
+            tuple: (observations, rewards, dones, info). rewards are the points scored this
+                   tick and dones marks the games that ended (and were reset). info holds
+                   "score", "ticks" and "caught" arrays describing how those games ended.
+        """
+        actions = np.asarray(actions)
+
+        # Pac-Man: move as far as he can, up to his speed, towards the first wall in the way
+        moving = actions > 0
+        travel = np.where(moving, self.wall_index.travels(self.pacman_x, self.pacman_y, STEP_X[actions],
+                                                          STEP_Y[actions], self.pacman_speed), 0)
+        self.pacman_x = self.pacman_x + STEP_X[actions] * travel
+        self.pacman_y = self.pacman_y + STEP_Y[actions] * travel
+        pacman_x, pacman_y = self.pacman_x[:, None], self.pacman_y[:, None]
+
+        self._move_ghosts(pacman_x, pacman_y)
+
+        # Pellets within reach of Pac-Man are eaten
+        dx, dy = self.pellet_x - pacman_x, self.pellet_y - pacman_y
+        eaten = self.pellets & (dx * dx + dy * dy < PELLET_DISTANCE * PELLET_DISTANCE)
+        self.pellets &= ~eaten
+        rewards = eaten.sum(axis=1) * PELLET_POINTS
+        self.score += rewards
+        self.tick += 1
+
+        dx, dy = self.ghost_x - pacman_x, self.ghost_y - pacman_y
+        caught = (dx * dx + dy * dy < self.catch_distance * self.catch_distance).any(axis=1)
+        dones = caught | ~self.pellets.any(axis=1) | (self.tick >= self.max_ticks)
+        info = {"score": self.score.copy(), "ticks": self.tick.copy(), "caught": caught}
+        if dones.any():
+            self._reset_games(dones)
+        return self.observe(), rewards, dones, info
+
+    def _move_ghosts(self, pacman_x, pacman_y):
+        """Move every ghost as Ghost.steer_towards would, towards its game's Pac-Man (shape (games, 1))"""
+        def pick(values, choice):
+            return np.take_along_axis(values, choice[:, :, None], axis=2)[:, :, 0]
+
+        ghost_x, ghost_y, speed = self.ghost_x, self.ghost_y, self.ghost_speed
+        nav_grid = self.nav_grid
+        tile_size, columns, rows = nav_grid.tile_size, nav_grid.columns, nav_grid.rows
+        # Four candidate steps for every ghost, shape (games, ghosts, 4)
+        step_x, step_y = STEP_X[1:] * speed, STEP_Y[1:] * speed
+        candidate_x = ghost_x[:, :, None] + step_x
+        candidate_y = ghost_y[:, :, None] + step_y
+        can_move = self.wall_index.are_clear(ghost_x[:, :, None], ghost_y[:, :, None], step_x, step_y)
+
+        # 1. Follow the flow field: step towards the neighbouring walkable cell closest to Pac-Man
+        target_rows = self._distance_rows(self._cells_at(pacman_x[:, 0], pacman_y[:, 0]))[:, None]
+        column, row = ghost_x // tile_size, ghost_y // tile_size
+        on_grid = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+        own_distance = self.distances[target_rows, np.where(on_grid, row * columns + column, 0)]
+        next_column, next_row = column[:, :, None] + STEP_X[1:], row[:, :, None] + STEP_Y[1:]
+        inside = (next_column >= 0) & (next_column < columns) & (next_row >= 0) & (next_row < rows)
+        next_cell = np.where(inside, next_row * columns + next_column, 0)
+        next_distance = self.distances[target_rows[:, :, None], next_cell]
+        next_distance[~inside | ~self.walkable[next_cell]] = UNREACHABLE
+        path = next_distance.argmin(axis=2)
+        has_path = on_grid & (pick(next_distance, path) < own_distance)
+        follows = has_path & pick(can_move, path)
+
+        # 2. Too far off the middle of the corridor: slide sideways towards the cell centre
+        center_x = column * tile_size + tile_size // 2
+        center_y = row * tile_size + tile_size // 2
+        horizontal = STEP_X[1:][path] != 0
+        slide_x = np.where(horizontal, ghost_x, ghost_x + np.clip(center_x - ghost_x, -speed, speed))
+        slide_y = np.where(horizontal, ghost_y + np.clip(center_y - ghost_y, -speed, speed), ghost_y)
+        slides = (has_path & ~follows & ((slide_x != ghost_x) | (slide_y != ghost_y))
+                  & self.wall_index.are_clear(ghost_x, ghost_y, slide_x - ghost_x, slide_y - ghost_y))
+
+        # 3. Otherwise the free step that ends closest to Pac-Man in a straight line
+        # (Ghost.chase_point); a ghost with no free step can't follow the wall either
+        squared_distance = ((candidate_x - pacman_x[:, :, None]).astype(np.int64) ** 2
+                            + (candidate_y - pacman_y[:, :, None]).astype(np.int64) ** 2)
+        squared_distance[~can_move] = np.iinfo(np.int64).max
+        greedy = squared_distance.argmin(axis=2)
+        chases = ~follows & ~slides & pick(can_move, greedy)
+
+        step = np.where(follows, path, greedy)
+        steps = follows | chases
+        self.ghost_x = np.where(steps, pick(candidate_x, step), np.where(slides, slide_x, ghost_x))
+        self.ghost_y = np.where(steps, pick(candidate_y, step), np.where(slides, slide_y, ghost_y))
+
+    def observe(self):
+        """
+        Return every game's observation as one array.
+        Returns:
+            numpy.ndarray: float32, shape (num_envs, observation_size).
+        """
+        observations = np.empty((self.num_envs, self.observation_size), dtype=np.float32)
+        ghost_count = self.ghost_x.shape[1]
+        observations[:, 0] = self.pacman_x * self.scale
+        observations[:, 1] = self.pacman_y * self.scale
+        observations[:, 2:2 + 2 * ghost_count:2] = self.ghost_x * self.scale
+        observations[:, 3:3 + 2 * ghost_count:2] = self.ghost_y * self.scale
+        observations[:, 2 + 2 * ghost_count:] = self.pellets
+        return observations